@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # زمان‌سنجی و بودجه‌ی هر درخواست؛ اول از همه تا هزینه‌ی بقیه‌ی middlewareها هم حساب شود
+    'dashboard.middleware.RequestBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -154,6 +156,14 @@ STATICFILES_DIRS = [
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media' # 
+# فایل‌های کارهای پس‌زمینه (مثل دامپ آپلودشده برای ریستور)؛ عمداً خارج از MEDIA_ROOT
+JOB_FILES_ROOT = BASE_DIR / 'job_files'
+# کار «در حال اجرا» که worker آن این مدت (ثانیه) پیشرفتی ثبت نکرده شکست‌خورده حساب می‌شود
+JOB_STALE_SECONDS = 15 * 60
+# حداکثر حجم فایل ریستور و SQL بعد از باز شدن gzip (مگابایت)؛ client_max_body_size در nginx را هم ببینید
+RESTORE_MAX_SIZE = int(os.getenv('RESTORE_MAX_SIZE_MB', 1024)) * 1024 * 1024
+# بک‌آپ افزایشی (manage.py incremental_backup): هر چند روز یک بار پایه‌ی کامل جدید
+INCREMENTAL_FULL_EVERY_DAYS = 7
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -195,4 +205,54 @@ PWA_APP_ICONS_APPLE = [
 ]
 PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'static', 'js', 'serviceworker.js')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
\ No newline at end of file
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+# آدرس Bot API (برای تست یا Bot API Server محلی قابل تغییر است)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+# Bot API فایل بالای ۵۰ مگابایت نمی‌پذیرد؛ بک‌آپ در بخش‌هایی با این حداکثر حجم ارسال می‌شود
+TELEGRAM_PART_SIZE = int(os.getenv('TELEGRAM_PART_SIZE_MB', '45')) * 1024 * 1024
+# تلاش مجدد هر بخش (خطای شبکه، 429، 5xx) با تأخیر TELEGRAM_RETRY_BACKOFF × 2^n ثانیه
+TELEGRAM_UPLOAD_RETRIES = 5
+TELEGRAM_RETRY_BACKOFF = 2.0
+# بازه‌ی سال‌های شمسی جدول تقویم (برای گروه‌بندی گزارش‌ها بر اساس ماه شمسی)
+# برای افزایش بازه: python manage.py fill_jalali_calendar --start-year ... --end-year ...
+JALALI_CALENDAR_YEARS = (1390, 1430)
+
+# مدت نگهداری گزارش‌های کش‌شده (ثانیه)؛ با تغییر داده‌ها کلید کش عوض می‌شود
+# (dashboard/report_cache.py) و با هر بک‌اند CACHES جنگو کار می‌کند.
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+# زمان‌سنجی درخواست‌ها (dashboard.middleware.RequestBudgetMiddleware)
+# هدر Server-Timing در DevTools مرورگر (تب Network > Timing) دیده می‌شود
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True') == 'True'
+# بودجه‌ی هر ویو بر اساس نام (app_name:name)؛ کلیدها: queries, db_ms, template_ms, view_ms, total_ms
+REQUEST_BUDGETS = {
+    'default': {'queries': 50, 'db_ms': 300, 'total_ms': 1000},
+    'dashboard:financial_report': {'queries': 30},
+    'dashboard:main_dashboard': {'queries': 30},
+    # بک‌آپ و بازیابی ذاتاً طولانی هستند
+    'dashboard:backup_download': {'total_ms': 60000, 'view_ms': 60000},
+    'dashboard:backup_telegram': {'total_ms': 60000, 'view_ms': 60000},
+    'dashboard:backup_restore': {'total_ms': 60000, 'view_ms': 60000},
+    'dashboard:mobile_backup': {'total_ms': 60000, 'view_ms': 60000},
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # عبور از بودجه در سطح WARNING؛ با PERFORMANCE_LOG_LEVEL=DEBUG هر درخواست یک خط JSON
+        'dashboard.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'dashboard.jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
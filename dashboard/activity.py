@@ -0,0 +1,217 @@
+# Accounting/dashboard/activity.py
+
+"""
+فید ادغام‌شده‌ی فعالیت‌ها (هزینه، درآمد و اشتراک‌های پرداخت‌شده) و لیست
+تراکنش‌های یک ماه در موبایل.
+
+مرتب‌سازی و صفحه‌بندی در خود دیتابیس با UNION ALL از ستون‌های سبک انجام
+می‌شود و صفحه‌بندی از نوع keyset با نشانگر (ستون مرتب‌سازی، kind, id) است؛
+پس هزینه‌ی هر صفحه به اندازه‌ی صفحه بستگی دارد، نه به کل تاریخچه.
+"""
+
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import jdatetime
+from django.db import connection
+from django.db.models import BooleanField, CharField, DateField, F, IntegerField, Q, Value
+from django.db.models.functions import Coalesce
+
+from dashboard.models import Expense, OtherIncome, Subscription
+from dashboard.reports import jalali_month_range
+
+# ترتیب نوع‌ها در نشانگر (برای شکستن تساوی created_at)
+EXPENSE, INCOME, SUBSCRIPTION = 1, 2, 3
+KIND_NAMES = {EXPENSE: 'expense', INCOME: 'income', SUBSCRIPTION: 'subscription'}
+
+FEED_FIELDS = ('kind', 'id', 'created_at', 'title', 'volume', 'price', 'date')
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(row):
+    """نشانگر متنی (قابل استفاده در URL) برای یک ردیف فید."""
+    micros = (row['created_at'] - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{row['kind']}.{row['id']}"
+
+
+def decode_cursor(value):
+    """نشانگر را به (created_at, kind, id) برمی‌گرداند؛ برای مقدار نامعتبر None."""
+    try:
+        micros, kind, pk = (int(part) for part in value.split('.'))
+        return _EPOCH + timedelta(microseconds=micros), kind, pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def _feed_sources(user):
+    """(نوع، کوئری) برای هر بخش فید؛ ستون‌های همه‌ی بخش‌ها یکسان نام‌گذاری شده‌اند."""
+    zero = Value(0, output_field=IntegerField())
+    return (
+        (EXPENSE, Expense.objects.filter(creator=user).annotate(
+            title=F('issue'), volume=zero, date=F('spending_date'))),
+        (INCOME, OtherIncome.objects.filter(creator=user).annotate(
+            title=F('name'), volume=zero, date=F('deposit_date'))),
+        (SUBSCRIPTION, Subscription.objects.filter(creator=user, status='success').annotate(
+            title=F('customer__name'), volume=F('giga'), date=F('payment_date'))),
+    )
+
+
+def _cursor_q(kind, cursor, older, field='created_at'):
+    """شرط keyset برای یک بخش از UNION (نوع هر بخش ثابت است)."""
+    value, cursor_kind, pk = cursor
+    lookup = 'lt' if older else 'gt'
+    condition = Q(**{f'{field}__{lookup}': value})
+    if kind == cursor_kind:
+        condition |= Q(**{field: value, f'id__{lookup}': pk})
+    elif (kind < cursor_kind) == older:
+        condition |= Q(**{field: value})
+    return condition
+
+
+def get_activity_page(user, cursor=None, older=True, page_size=20):
+    """
+    یک صفحه از فید فعالیت‌ها.
+
+    بدون نشانگر جدیدترین ردیف‌ها برگردانده می‌شوند. با ``older=True`` ردیف‌های
+    قدیمی‌تر از نشانگر و با ``older=False`` ردیف‌های جدیدتر از آن (صفحه‌ی قبل).
+    خروجی دیکشنری شامل ``activities`` و نشانگرهای صفحه‌ی بعد/قبل است.
+    """
+    descending = older or cursor is None
+    ordering = ('-created_at', '-kind', '-id') if descending else ('created_at', 'kind', 'id')
+    # یک ردیف اضافه برای تشخیص وجود صفحه‌ی بعد
+    limit = page_size + 1
+
+    parts = []
+    for kind, queryset in _feed_sources(user):
+        if cursor is not None:
+            queryset = queryset.filter(_cursor_q(kind, cursor, older))
+        queryset = queryset.annotate(kind=Value(kind, output_field=IntegerField())).values(*FEED_FIELDS)
+        if connection.features.supports_slicing_ordering_in_compound:
+            # هر بخش فقط به اندازه‌ی یک صفحه از ایندکس (creator, created_at) خوانده می‌شود
+            queryset = queryset.order_by(*ordering)[:limit]
+        else:
+            queryset = queryset.order_by()
+        parts.append(queryset)
+
+    rows = list(parts[0].union(*parts[1:], all=True).order_by(*ordering)[:limit])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not descending:
+        rows.reverse()
+
+    activities = rows
+    for row in activities:
+        row['kind_name'] = KIND_NAMES[row['kind']]
+        row['jalali_date'] = ''
+        if row['date']:
+            row['jalali_date'] = jdatetime.date.fromgregorian(date=row['date']).strftime('%Y/%m/%d')
+
+    if descending:
+        has_older, has_newer = has_more, cursor is not None
+    else:
+        has_older, has_newer = True, has_more
+    return {
+        'activities': activities,
+        'next_cursor': encode_cursor(activities[-1]) if activities and has_older else None,
+        'previous_cursor': encode_cursor(activities[0]) if activities and has_newer else None,
+    }
+
+
+# ===================================================================
+# لیست تراکنش‌های یک ماه (موبایل، اسکرول بی‌پایان)
+# ===================================================================
+
+TRANSACTION_FIELDS = ('kind', 'id', 'sort_date', 'title', 'subtitle', 'price', 'state', 'is_server')
+# اشتراک‌های پرداخت‌نشده تاریخ ندارند و در انتهای لیست می‌آیند
+NO_DATE = date(1, 1, 1)
+
+
+def encode_date_cursor(row):
+    return f"{row['sort_date'].toordinal()}.{row['kind']}.{row['id']}"
+
+
+def decode_date_cursor(value):
+    """نشانگر را به (sort_date, kind, id) برمی‌گرداند؛ برای مقدار نامعتبر None."""
+    try:
+        ordinal, kind, pk = (int(part) for part in value.split('.'))
+        return date.fromordinal(ordinal), kind, pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def get_transaction_sources(user, year, month, filter_type='all', status_filter='all', search_query=''):
+    """
+    (نوع، کوئری) برای تراکنش‌های یک ماه شمسی با همان فیلترهای صفحه‌ی موبایل.
+    نام بانک، مشتری و معرف با join در همان کوئری خوانده می‌شوند.
+    """
+    start, end = jalali_month_range(year, month)
+    empty = Value('', output_field=CharField())
+    sources = []
+
+    if filter_type in ('all', 'expense'):
+        expenses = Expense.objects.filter(creator=user, spending_date__range=(start, end))
+        if search_query:
+            expenses = expenses.filter(Q(issue__icontains=search_query) | Q(description__icontains=search_query))
+        sources.append((EXPENSE, expenses.annotate(
+            sort_date=F('spending_date'), title=F('issue'), subtitle=F('source_bank__bank_name'), state=empty,
+            is_server=F('is_server_cost'))))
+
+    if filter_type in ('all', 'income'):
+        incomes = OtherIncome.objects.filter(creator=user, deposit_date__range=(start, end))
+        if search_query:
+            incomes = incomes.filter(Q(name__icontains=search_query) | Q(description__icontains=search_query))
+        sources.append((INCOME, incomes.annotate(
+            sort_date=F('deposit_date'), title=F('name'), subtitle=F('destination_bank__bank_name'), state=empty,
+            is_server=Value(False, output_field=BooleanField()))))
+
+    if filter_type in ('all', 'sub'):
+        subs = Subscription.objects.filter(creator=user, year=year, month=month)
+        if status_filter == 'paid':
+            subs = subs.filter(status='success')
+        elif status_filter == 'unpaid':
+            subs = subs.filter(status='pending')
+        if search_query:
+            subs = subs.filter(Q(customer__name__icontains=search_query) | Q(referrer__name__icontains=search_query))
+        sources.append((SUBSCRIPTION, subs.annotate(
+            sort_date=Coalesce('payment_date', Value(NO_DATE, output_field=DateField())),
+            title=F('customer__name'), subtitle=F('referrer__name'), state=F('status'),
+            is_server=Value(False, output_field=BooleanField()))))
+
+    return sources
+
+
+def get_transaction_page(sources, cursor=None, page_size=30):
+    """
+    یک صفحه (حداکثر ``page_size`` ردیف) از تراکنش‌ها، جدیدترین تاریخ اول.
+    خروجی دیکشنری شامل ``transactions`` و ``next_cursor`` (یا None) است.
+    """
+    ordering = ('-sort_date', '-kind', '-id')
+    limit = page_size + 1
+
+    parts = []
+    for kind, queryset in sources:
+        if cursor is not None:
+            queryset = queryset.filter(_cursor_q(kind, cursor, older=True, field='sort_date'))
+        queryset = queryset.annotate(kind=Value(kind, output_field=IntegerField())).values(*TRANSACTION_FIELDS)
+        if connection.features.supports_slicing_ordering_in_compound:
+            queryset = queryset.order_by(*ordering)[:limit]
+        else:
+            queryset = queryset.order_by()
+        parts.append(queryset)
+
+    if not parts:
+        return {'transactions': [], 'next_cursor': None}
+
+    combined = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    rows = list(combined.order_by(*ordering)[:limit])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    for row in rows:
+        row['kind_name'] = KIND_NAMES[row['kind']]
+        row['jalali_date'] = ''
+        if row['sort_date'] != NO_DATE:
+            row['jalali_date'] = jdatetime.date.fromgregorian(date=row['sort_date']).strftime('%Y/%m/%d')
+
+    return {
+        'transactions': rows,
+        'next_cursor': encode_date_cursor(rows[-1]) if rows and has_more else None,
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        # ثبت سیگنال‌های همگام‌سازی جداول مشتق‌شده
+        from dashboard import signals  # noqa: F401
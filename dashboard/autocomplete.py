@@ -0,0 +1,48 @@
+# Accounting/dashboard/autocomplete.py
+
+"""
+داده‌ی راه دور select2 برای انتخاب مشتری/معرف و بانک.
+
+فرم‌ها به جای رندر کردن همه‌ی مشتری‌ها به صورت <option>، فقط گزینه‌ی
+انتخاب‌شده را رندر می‌کنند (RemoteSelect در forms) و select2 بقیه را با
+جستجوی پیشوندی از این endpointها می‌گیرد. جستجوی پیشوندی (LIKE 'q%') روی
+کلید یکسان‌شده‌ی search_key از ایندکس (creator, search_key) استفاده می‌کند،
+پس ی/ک عربی، نیم‌فاصله و اعداد فارسی در عبارت جستجو مهم نیستند.
+"""
+
+from dashboard.models import BankAccount, CustomerProfile
+from dashboard.persian import normalize_search_key
+
+AUTOCOMPLETE_LIMIT = 20
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+# نام منبع در URL ← (مدل، فیلد متن)
+SOURCES = {
+    'customers': (CustomerProfile, 'name'),
+    'banks': (BankAccount, 'bank_name'),
+}
+
+
+def parse_limit(value):
+    try:
+        return max(1, min(int(value), MAX_AUTOCOMPLETE_LIMIT))
+    except (TypeError, ValueError):
+        return AUTOCOMPLETE_LIMIT
+
+
+def autocomplete(user, source, term='', limit=AUTOCOMPLETE_LIMIT):
+    """
+    حداکثر ``limit`` گزینه از منبع ``source`` که متنشان با ``term`` شروع
+    می‌شود، به قالب نتیجه‌ی select2: ``{'results': [{'id', 'text'}], 'more'}``.
+    """
+    model, field = SOURCES[source]
+    queryset = model.objects.filter(creator=user)
+    term = normalize_search_key(term)
+    if term:
+        queryset = queryset.filter(search_key__startswith=term)
+    # یک ردیف اضافه برای اینکه کاربر بداند باید دقیق‌تر جستجو کند
+    rows = list(queryset.order_by('search_key', 'pk').values_list('pk', field)[:limit + 1])
+    return {
+        'results': [{'id': pk, 'text': text} for pk, text in rows[:limit]],
+        'more': len(rows) > limit,
+    }
@@ -0,0 +1,622 @@
+# Accounting/dashboard/backup.py
+
+"""
+بک‌آپ و ریستور دیتابیس (mysqldump / mysql) به صورت جریانی.
+
+خروجی mysqldump در تکه‌های ثابت خوانده و همان لحظه با gzip فشرده می‌شود؛
+پس حافظه‌ی مصرفی هر بک‌آپ مستقل از حجم دیتابیس است. برای تلگرام خروجی
+فشرده بخش‌به‌بخش (هر بار فقط یک بخش در فایل موقت) ارسال می‌شود. رمز عبور
+از طریق متغیر محیطی MYSQL_PWD به mysqldump داده می‌شود تا در خط فرمان (و
+خروجی ps) دیده نشود.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('dashboard.backup')
+
+CHUNK_SIZE = 64 * 1024
+# wbits=31 یعنی خروجی با هدر و تریلر gzip (قابل باز شدن با gunzip)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# از stderr کلاینت mysql فقط همین مقدار آخر برای پیام خطا نگه داشته می‌شود
+STDERR_TAIL = 16 * 1024
+
+
+class BackupError(Exception):
+    """اجرای mysqldump/mysql یا ارسال بک‌آپ با خطا تمام شد."""
+
+
+def mysql_connection_args(alias='default'):
+    db = settings.DATABASES[alias]
+    args = ['--skip-ssl', '-h', db.get('HOST') or 'localhost', '-u', db.get('USER') or '']
+    if db.get('PORT'):
+        args += ['-P', str(db['PORT'])]
+    return args
+
+
+def mysql_env(alias='default'):
+    env = os.environ.copy()
+    env['MYSQL_PWD'] = settings.DATABASES[alias].get('PASSWORD') or ''
+    return env
+
+
+def mysqldump_command(alias='default'):
+    # --single-transaction: دامپ سازگار بدون قفل کردن جدول‌ها در طول دانلود (InnoDB)
+    return ['mysqldump', *mysql_connection_args(alias), '--no-tablespaces', '--single-transaction',
+            settings.DATABASES[alias]['NAME']]
+
+
+def mysql_command(alias='default'):
+    return ['mysql', *mysql_connection_args(alias), settings.DATABASES[alias]['NAME']]
+
+
+def backup_filename(suffix='.sql.gz'):
+    return f"backup_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{suffix}"
+
+
+def stream_gzip_dump(alias='default', chunk_size=CHUNK_SIZE, command=None, header=b''):
+    """
+    mysqldump را اجرا می‌کند و یک GzipDump (iterable از تکه‌های gzip شده) برمی‌گرداند.
+
+    اولین تکه قبل از برگرداندن خوانده می‌شود تا خطاهای فوری (مثلاً رمز
+    اشتباه) به صورت BackupError و پیش از ارسال هدرهای پاسخ گزارش شوند.
+    ``header`` (اختیاری) قبل از خروجی mysqldump در فایل نوشته می‌شود
+    (مثلاً یک توضیح SQL)؛ ``command`` برای تست‌ها است.
+    """
+    process = subprocess.Popen(
+        command or mysqldump_command(alias), stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=mysql_env(alias))
+    stderr = _drain_stderr(process)
+    first = process.stdout.read(chunk_size)
+    if not first and process.wait() != 0:
+        process.stdout.close()
+        raise BackupError(_stderr_text(process, stderr) or f'exit code {process.returncode}')
+    return GzipDump(process, header + first, chunk_size, stderr)
+
+
+class GzipDump:
+    """
+    خروجی فشرده‌ی یک پروسه‌ی mysqldump.
+
+    بعد از پیمایش کامل، ``completed`` مشخص می‌کند دامپ سالم تمام شده یا نه
+    (و ``error`` متن خطا). اگر زودتر بسته شود (قطع اتصال کاربر یا خطای
+    آپلود)، پروسه‌ی mysqldump کشته می‌شود.
+    """
+
+    def __init__(self, process, first_chunk, chunk_size=CHUNK_SIZE, stderr=None):
+        self.process = process
+        # stderr باید همزمان با stdout خوانده شود؛ وگرنه پر شدن بافرش mysqldump را قفل می‌کند
+        self.stderr = stderr or _drain_stderr(process)
+        self.first_chunk = first_chunk
+        self.chunk_size = chunk_size
+        self.completed = False
+        self.error = None
+        self.closed = False
+
+    def __iter__(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+        chunk, self.first_chunk = self.first_chunk, b''
+        try:
+            while chunk:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+                chunk = self.process.stdout.read(self.chunk_size)
+
+            if self.process.wait() != 0:
+                # تریلر gzip نوشته نمی‌شود تا فایل ناقص هنگام باز کردن خطا بدهد
+                self.error = _stderr_text(self.process, self.stderr) or f'exit code {self.process.returncode}'
+                logger.error('backup dump failed (exit code %s): %s', self.process.returncode, self.error)
+                return
+            yield compressor.flush()
+            self.completed = True
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.process.poll() is None:
+            # کاربر اتصال را قطع کرده یا پاسخ زودتر بسته شده است
+            self.process.kill()
+        self.process.wait()
+        self.process.stdout.close()
+        _stderr_text(self.process, self.stderr)
+        if not self.completed:
+            logger.warning('backup stream was not completed')
+
+
+# ===================================================================
+# ارسال به تلگرام (آپلود چندبخشی با تلاش مجدد)
+# ===================================================================
+#
+# Bot API فایل‌های بزرگ‌تر از ۵۰ مگابایت را نمی‌پذیرد؛ فایل فشرده به بخش‌هایی
+# حداکثر TELEGRAM_PART_SIZE بایتی (name.001, name.002, ...) تقسیم و هر بخش
+# جداگانه (با تلاش مجدد) ارسال می‌شود. بخش‌ها با دستور join_backup_parts
+# دوباره یکی می‌شوند. فایلی که در یک بخش جا شود با همان نام اصلی می‌رود.
+
+# سقف تأخیر بین تلاش‌ها (ثانیه)؛ retry_after خود تلگرام همیشه رعایت می‌شود
+MAX_BACKOFF = 60
+PART_NAME = re.compile(r'^(?P<name>.+)\.(?P<number>\d{3})$')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def telegram_session():
+    """requests.Session مشترک تا اتصال (و TLS) بین بخش‌ها و بک‌آپ‌ها دوباره استفاده شود."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def multipart_body(boundary, fields, file_field, filename, content_type, chunks):
+    """
+    بدنه‌ی multipart/form-data به صورت generator؛ محتوای فایل همان
+    تکه‌های ``chunks`` است و هیچ‌وقت کل فایل در حافظه نیست.
+    """
+    for name, value in fields.items():
+        yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+               f'{value}\r\n').encode('utf-8')
+    yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+           f'Content-Type: {content_type}\r\n\r\n').encode('utf-8')
+    yield from chunks
+    yield f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+
+def _counted(chunks, on_progress, start=0):
+    sent = start
+    for chunk in chunks:
+        yield chunk
+        sent += len(chunk)
+        on_progress(sent)
+
+
+def _file_range(path, offset, length, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as source:
+        source.seek(offset)
+        while length > 0 and (chunk := source.read(min(chunk_size, length))):
+            length -= len(chunk)
+            yield chunk
+
+
+def _telegram_config(token, chat_id, api_url):
+    token = token or settings.TELEGRAM_BOT_TOKEN
+    chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+    api_url = (api_url or getattr(settings, 'TELEGRAM_API_URL', 'https://api.telegram.org')).rstrip('/')
+    if not token or not chat_id:
+        raise BackupError('Bot Token or Chat ID is missing in settings.')
+    return token, chat_id, api_url
+
+
+def _telegram_result(response):
+    try:
+        result = response.json()
+    except ValueError:
+        result = {'ok': False, 'description': response.text}
+    if response.status_code != 200 or not result.get('ok'):
+        raise BackupError(f'Telegram Error: {result}')
+    return result
+
+
+def _retry_after(response):
+    try:
+        return float(response.json()['parameters']['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def send_part(read_chunks, filename, caption, token, chat_id, api_url):
+    """
+    یک فایل را به sendDocument می‌فرستد. خطای شبکه، 429 و 5xx تا
+    TELEGRAM_UPLOAD_RETRIES بار با تأخیر نمایی (TELEGRAM_RETRY_BACKOFF × 2^n)
+    تکرار می‌شوند؛ بقیه‌ی خطاها (مثلاً chat not found) فوراً BackupError می‌دهند.
+    ``read_chunks`` تابعی است که برای هر تلاش تکه‌های فایل را از اول می‌دهد.
+    """
+    retries = getattr(settings, 'TELEGRAM_UPLOAD_RETRIES', 5)
+    backoff = getattr(settings, 'TELEGRAM_RETRY_BACKOFF', 2.0)
+    for attempt in range(retries + 1):
+        boundary = uuid.uuid4().hex
+        body = multipart_body(boundary, {'chat_id': chat_id, 'caption': caption}, 'document',
+                              filename, 'application/gzip', read_chunks())
+        delay = min(backoff * 2 ** attempt, MAX_BACKOFF)
+        try:
+            response = telegram_session().post(
+                f'{api_url}/bot{token}/sendDocument', data=body,
+                headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                timeout=(10, 600),
+            )
+        except requests.RequestException as e:
+            error = f'Telegram upload failed: {e}'
+        else:
+            if response.status_code != 429 and response.status_code < 500:
+                return _telegram_result(response)
+            error = f'Telegram Error: HTTP {response.status_code} {response.text[:200]}'
+            delay = _retry_after(response) or delay
+
+        if attempt == retries:
+            raise BackupError(error)
+        logger.warning('telegram upload of %s failed (attempt %s of %s), retrying in %.1fs: %s',
+                       filename, attempt + 1, retries + 1, delay, error)
+        time.sleep(delay)
+
+
+def _load_upload_state(state_path, key):
+    if state_path and os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as state_file:
+            state = json.load(state_file)
+        if {name: state.get(name) for name in key} == key:
+            return state
+    return {**key, 'sent': []}
+
+
+def _save_upload_state(state_path, state):
+    # نوشتن در فایل موقت و جایگزینی، تا قطع برق وسط نوشتن state را خراب نکند
+    with open(state_path + '.tmp', 'w', encoding='utf-8') as state_file:
+        json.dump(state, state_file)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def upload_file_to_telegram(path, caption, filename=None, token=None, chat_id=None, api_url=None,
+                            part_size=None, state_path=None, on_progress=None):
+    """
+    فایل ``path`` را (در صورت نیاز چندبخشی) به تلگرام می‌فرستد و لیست پاسخ‌های
+    تلگرام (یکی برای هر بخش) را برمی‌گرداند.
+
+    اگر ``state_path`` داده شود، بعد از هر بخش موفق وضعیت در آن ذخیره می‌شود
+    و اجرای بعدی برای همان فایل از اولین بخش ارسال‌نشده ادامه می‌دهد؛ بعد از
+    اتمام کار فایل وضعیت پاک می‌شود. ``on_progress`` با تعداد بایت‌های ارسال‌شده صدا زده می‌شود.
+    """
+    token, chat_id, api_url = _telegram_config(token, chat_id, api_url)
+    part_size = part_size or getattr(settings, 'TELEGRAM_PART_SIZE', 45 * 1024 * 1024)
+    filename = filename or os.path.basename(path)
+    size = os.path.getsize(path)
+    count = max(1, -(-size // part_size))
+
+    state = _load_upload_state(state_path, {'filename': filename, 'size': size, 'part_size': part_size})
+    if state['sent']:
+        logger.info('resuming telegram upload of %s from part %s of %s', filename, len(state['sent']) + 1, count)
+    for number in range(len(state['sent']) + 1, count + 1):
+        offset = (number - 1) * part_size
+
+        def read_chunks(offset=offset):
+            chunks = _file_range(path, offset, part_size)
+            return _counted(chunks, on_progress, offset) if on_progress else chunks
+
+        if count == 1:
+            result = send_part(read_chunks, filename, caption, token, chat_id, api_url)
+        else:
+            result = send_part(read_chunks, f'{filename}.{number:03d}', f'{caption}\n📦 Part {number}/{count}',
+                               token, chat_id, api_url)
+        state['sent'].append(result)
+        if state_path:
+            _save_upload_state(state_path, state)
+
+    if state_path and os.path.exists(state_path):
+        os.remove(state_path)
+    return state['sent']
+
+
+def _spooled_parts(chunks, path, part_size):
+    """
+    تکه‌ها را بخش‌به‌بخش در فایل ``path`` می‌نویسد (هر بخش فایل را از نو
+    می‌نویسد) و برای هر بخش (حجم، آخرین بخش است؟) را yield می‌کند. پس روی
+    دیسک هیچ‌وقت بیش از یک بخش نیست.
+    """
+    chunks = iter(chunks)
+    carry = b''
+    exhausted = False
+    while True:
+        size = 0
+        with open(path, 'wb') as spool:
+            while size < part_size:
+                if not carry:
+                    carry = next(chunks, None)
+                    if carry is None:
+                        carry, exhausted = b'', True
+                        break
+                    continue
+                piece, carry = carry[:part_size - size], carry[part_size - size:]
+                spool.write(piece)
+                size += len(piece)
+        # بخش پر شده؛ برای دانستن اینکه آخرین بخش است یا نه، تکه‌ی بعدی خوانده می‌شود
+        while not exhausted and not carry:
+            carry = next(chunks, None)
+            if carry is None:
+                carry, exhausted = b'', True
+        yield size, exhausted
+        if exhausted:
+            return
+
+
+def upload_stream_to_telegram(chunks, filename, caption, token=None, chat_id=None, api_url=None, part_size=None,
+                              on_progress=None, before_last_part=None):
+    """
+    یک فایل (iterable از تکه‌های بایت) را بدون نوشتن کل آن روی دیسک به تلگرام
+    می‌فرستد: هر بار فقط یک بخش (حداکثر TELEGRAM_PART_SIZE) در فایل موقت
+    نگه داشته و با تلاش مجدد ارسال می‌شود. اگر کل فایل در یک بخش جا شود با
+    همان نام اصلی می‌رود. ``before_last_part`` (اختیاری) قبل از ارسال بخش آخر
+    صدا زده می‌شود و با BackupError ارسال را متوقف می‌کند.
+    """
+    token, chat_id, api_url = _telegram_config(token, chat_id, api_url)
+    part_size = part_size or getattr(settings, 'TELEGRAM_PART_SIZE', 45 * 1024 * 1024)
+    fd, path = tempfile.mkstemp(prefix='backup_', suffix='.part')
+    os.close(fd)
+    results = []
+    sent = 0
+    try:
+        for number, (size, last) in enumerate(_spooled_parts(chunks, path, part_size), start=1):
+            if last and before_last_part:
+                before_last_part()
+
+            def read_chunks(offset=sent, size=size):
+                part = _file_range(path, 0, size)
+                return _counted(part, on_progress, offset) if on_progress else part
+
+            if number == 1 and last:
+                results.append(send_part(read_chunks, filename, caption, token, chat_id, api_url))
+            else:
+                # تعداد کل بخش‌ها فقط در بخش آخر معلوم است
+                total = f'/{number}' if last else ''
+                results.append(send_part(read_chunks, f'{filename}.{number:03d}',
+                                         f'{caption}\n📦 Part {number}{total}', token, chat_id, api_url))
+            sent += size
+    finally:
+        os.remove(path)
+    return results
+
+
+def send_document_to_telegram(chunks, filename, caption, token=None, chat_id=None, api_url=None):
+    """یک فایل (iterable از تکه‌های بایت) را بخش‌به‌بخش به تلگرام می‌فرستد."""
+    return upload_stream_to_telegram(chunks, filename, caption, token, chat_id, api_url)
+
+
+def send_backup_to_telegram(caption, token=None, chat_id=None, api_url=None, alias='default', command=None,
+                            on_progress=None):
+    """
+    دامپ ← فشرده‌سازی ← آپلود چندبخشی، با حداکثر یک بخش در فایل موقت.
+
+    تا آپلود هر بخش تمام نشود mysqldump منتظر می‌ماند (فشار معکوس از طریق
+    pipe)؛ بخش آخر فقط وقتی ارسال می‌شود که دامپ سالم تمام شده باشد. اگر
+    دامپ وسط کار خطا بدهد، بخش‌های ارسال‌شده ناقص‌اند (تریلر gzip ندارند و
+    join_backup_parts خطا می‌دهد). در صورت خطا BackupError می‌دهد و در صورت
+    موفقیت لیست پاسخ‌های تلگرام را برمی‌گرداند. ``on_progress`` (اختیاری) با
+    تعداد بایت‌های فشرده‌ی ارسال‌شده صدا زده می‌شود.
+    """
+    token, chat_id, api_url = _telegram_config(token, chat_id, api_url)
+    try:
+        dump = stream_gzip_dump(alias, command=command)
+    except BackupError as e:
+        raise BackupError(f'Dump Error: {e}') from e
+
+    def check_dump():
+        if not dump.completed:
+            raise BackupError(f'Dump Error: {dump.error or "dump was interrupted"}')
+
+    try:
+        return upload_stream_to_telegram(dump, backup_filename(), caption, token, chat_id, api_url,
+                                         on_progress=on_progress, before_last_part=check_dump)
+    finally:
+        dump.close()
+
+
+def join_parts(paths, output=None):
+    """
+    بخش‌های name.001, name.002, ... را به ترتیب پشت هم در ``output`` (پیش‌فرض
+    name کنار بخش‌ها) می‌نویسد؛ اگر خروجی gzip باشد سالم و کامل بودنش هم
+    بررسی می‌شود. مسیر و حجم فایل حاصل را برمی‌گرداند.
+    """
+    parts = []
+    for path in paths:
+        match = PART_NAME.match(os.path.basename(path))
+        if not match:
+            raise BackupError(f'{os.path.basename(path)} is not a backup part (name.001, name.002, ...).')
+        parts.append((int(match['number']), match['name'], path))
+    parts.sort()
+    names = sorted({name for _, name, _ in parts})
+    if len(names) != 1:
+        raise BackupError(f'The parts belong to different backups: {", ".join(names)}.')
+    numbers = [number for number, _, _ in parts]
+    if numbers != list(range(1, len(parts) + 1)):
+        missing = sorted(set(range(1, numbers[-1] + 1)) - set(numbers))
+        raise BackupError(f'Missing or duplicate parts (missing: {missing or "none"}).')
+
+    output = output or os.path.join(os.path.dirname(parts[0][2]), names[0])
+    decompressor = GzipStream() if output.endswith('.gz') else None
+    size = 0
+    try:
+        with open(output, 'wb') as joined:
+            for _, _, path in parts:
+                for chunk in _file_range(path, 0, os.path.getsize(path)):
+                    joined.write(chunk)
+                    size += len(chunk)
+                    if decompressor:
+                        for _ in decompressor.decompress(chunk, CHUNK_SIZE * 4):
+                            pass
+        if decompressor and not decompressor.eof:
+            raise BackupError('The joined file is incomplete: the gzip stream is truncated (last part missing?).')
+    except zlib.error as e:
+        os.remove(output)
+        raise BackupError(f'The joined file is not a valid gzip backup: {e}') from e
+    except BaseException:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+    return output, size
+
+
+# ===================================================================
+# ریستور
+# ===================================================================
+
+class GzipStream:
+    """
+    فایل gzip را تکه‌تکه باز می‌کند. یک فایل gzip می‌تواند چند عضو پشت سر هم
+    داشته باشد (مثلاً چند فایل فشرده که به هم چسبانده شده‌اند)؛ decompressobj
+    در پایان عضو اول می‌ایستد، پس برای باقی‌مانده (unused_data) یک
+    decompressobj تازه ساخته می‌شود. داده‌ی نامعتبر بعد از یک عضو هم
+    zlib.error می‌دهد و بی‌صدا دور ریخته نمی‌شود.
+    """
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(GZIP_WBITS)
+
+    @property
+    def eof(self):
+        return self.decompressor.eof
+
+    def decompress(self, chunk, limit):
+        while chunk:
+            if self.decompressor.eof:
+                # صفرهای انتهای فایل (padding) مثل ماژول gzip نادیده گرفته می‌شوند
+                chunk = chunk.lstrip(b'\x00')
+                if not chunk:
+                    return
+                self.decompressor = zlib.decompressobj(GZIP_WBITS)
+            # max_length حجم خروجی هر مرحله را محدود می‌کند (فایل gzip بمب حافظه را پر نکند)
+            yield self.decompressor.decompress(chunk, limit)
+            # بعد از پایان عضو، unconsumed_tail خالی نمی‌شود؛ باقی‌مانده در unused_data است
+            while self.decompressor.unconsumed_tail and not self.decompressor.eof:
+                yield self.decompressor.decompress(self.decompressor.unconsumed_tail, limit)
+            chunk = self.decompressor.unused_data
+
+    def flush(self):
+        return self.decompressor.flush()
+
+
+def _read_tail(stream, limit, out):
+    """stderr پروسه را تا انتها می‌خواند و فقط ``limit`` بایت آخر را نگه می‌دارد."""
+    tail = b''
+    for chunk in iter(lambda: stream.read(4096), b''):
+        tail = (tail + chunk)[-limit:]
+    out.append(tail)
+
+
+def _drain_stderr(process):
+    """
+    stderr پروسه را در یک thread جدا می‌خواند تا پر شدن بافر pipe (مثلاً با
+    هشدارهای زیاد) پروسه را قفل نکند. خروجی برای ``_stderr_text`` است.
+    """
+    tail = []
+    reader = threading.Thread(target=_read_tail, args=(process.stderr, STDERR_TAIL, tail), daemon=True)
+    reader.start()
+    return reader, tail
+
+
+def _stderr_text(process, stderr):
+    """بعد از خروج پروسه صدا زده می‌شود: متن (انتهای) stderr را برمی‌گرداند و pipe را می‌بندد."""
+    reader, tail = stderr
+    reader.join()
+    process.stderr.close()
+    return tail[0].decode('utf-8', 'replace').strip() if tail else ''
+
+
+class StatementCounter:
+    """
+    تعداد دستورهای SQL ارسال‌شده را تخمین می‌زند: mysqldump هر دستور را در
+    یک خط که با «;» تمام می‌شود می‌نویسد (مرز تکه‌ها هم در نظر گرفته می‌شود).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last = b''
+
+    def feed(self, data):
+        if not data:
+            return
+        self.count += data.count(b';\n') + (self.last == b';' and data[:1] == b'\n')
+        self.last = data[-1:]
+
+    def finish(self):
+        if self.last == b';':
+            self.count += 1
+        self.last = b''
+
+
+def restore_dump(fileobj, compressed=False, alias='default', chunk_size=CHUNK_SIZE, on_progress=None,
+                 max_size=None, command=None):
+    """
+    دامپ را تکه‌تکه (و در صورت gzip بودن، همان لحظه از حالت فشرده خارج
+    کرده) به stdin کلاینت mysql می‌دهد؛ کل فایل هیچ‌وقت در حافظه یا فایل
+    موقت نیست.
+
+    ``on_progress(bytes_read, statements)`` بعد از هر تکه صدا زده می‌شود.
+    اگر حجم SQL (بعد از باز شدن gzip) از ``max_size`` (پیش‌فرض
+    RESTORE_MAX_SIZE) بیشتر شود، mysql متوقف و BackupError داده می‌شود؛
+    دستورهایی که تا آن لحظه فرستاده شده‌اند اجرا شده و برنمی‌گردند.
+    خروجی: دیکشنری bytes (خوانده‌شده)، sql_bytes و statements.
+    """
+    if max_size is None:
+        max_size = getattr(settings, 'RESTORE_MAX_SIZE', None)
+    process = subprocess.Popen(
+        command or mysql_command(alias), stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, env=mysql_env(alias))
+    stderr = _drain_stderr(process)
+
+    decompressor = GzipStream() if compressed else None
+    statements = StatementCounter()
+    read = written = 0
+
+    def send(data):
+        nonlocal written
+        written += len(data)
+        if max_size and written > max_size:
+            raise BackupError(
+                f'Restore aborted: the SQL dump is larger than the {max_size // (1024 * 1024)} MB limit. '
+                f'The statements sent before the limit ({statements.count}) were already applied; '
+                f'restore a complete backup to get back to a consistent state.')
+        statements.feed(data)
+        process.stdin.write(data)
+
+    try:
+        while chunk := fileobj.read(chunk_size):
+            read += len(chunk)
+            for data in decompressor.decompress(chunk, chunk_size * 4) if decompressor else (chunk,):
+                send(data)
+            if on_progress:
+                on_progress(read, statements.count)
+        if decompressor:
+            send(decompressor.flush())
+            if not decompressor.eof:
+                raise BackupError('Invalid backup file: the gzip stream is truncated.')
+        statements.finish()
+        process.stdin.close()
+    except BrokenPipeError:
+        # mysql زودتر (با خطا) خارج شده؛ متن خطا از stderr خوانده می‌شود
+        pass
+    except zlib.error as e:
+        process.kill()
+        raise BackupError(f'Invalid backup file: {e}') from e
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        if not process.stdin.closed:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        process.wait()
+        error = _stderr_text(process, stderr)
+
+    if process.returncode != 0:
+        raise BackupError(error or f'exit code {process.returncode}')
+    return {'bytes': read, 'sql_bytes': written, 'statements': statements.count}
@@ -0,0 +1,188 @@
+# Accounting/dashboard/benchmark_data.py
+
+"""
+ساخت داده‌ی مصنوعی (کاربر، بانک، مشتری، اشتراک، هزینه و درآمد) برای تست بار و بنچمارک.
+
+همه‌ی ردیف‌ها با bulk_create و در دسته‌های ثابت درج می‌شوند و چون
+bulk_create سیگنال‌ها را صدا نمی‌زند، در پایان دفتر موجودی و خلاصه‌های ماهانه
+با dashboard/ledger.py بازسازی می‌شوند. با seed و ماه پایانی یکسان، خروجی
+دقیقاً یکسان است.
+"""
+
+import random
+from datetime import timedelta
+from itertools import islice
+
+import jdatetime
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from dashboard.incremental import reset_backup_chain
+from dashboard.ledger import rebuild_all_balances, rebuild_all_summaries
+from dashboard.search import rebuild_search_index, rebuild_search_keys
+from dashboard.models import BankAccount, CustomerProfile, Expense, OtherIncome, Profile, Subscription
+from dashboard.reports import jalali_month_range
+
+BANK_NAMES = ('Melli', 'Mellat', 'Saderat', 'Tejarat', 'Pasargad', 'Saman', 'Parsian', 'Sepah', 'Keshavarzi', 'Refah')
+FIRST_NAMES = ('علی', 'محمد', 'حسین', 'رضا', 'مهدی', 'زهرا', 'فاطمه', 'مریم', 'سارا', 'نرگس', 'امیر', 'نیلوفر')
+LAST_NAMES = ('احمدی', 'محمدی', 'حسینی', 'رضایی', 'کریمی', 'موسوی', 'جعفری', 'قاسمی', 'صادقی', 'کاظمی')
+EXPENSE_ISSUES = ('سرور', 'دامنه', 'پنل', 'تبلیغات', 'اینترنت', 'اجاره', 'تجهیزات', 'حقوق')
+INCOME_NAMES = ('فروش پنل', 'مشاوره', 'نصب', 'پشتیبانی', 'سایر')
+# حجم‌های رایج اشتراک و وزن هر کدام
+GIGA_CHOICES = (10, 20, 30, 50, 100)
+GIGA_WEIGHTS = (15, 30, 25, 20, 10)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _bulk_insert(model, objects, batch_size):
+    """اشیاء (حتی یک generator طولانی) را دسته‌دسته درج می‌کند تا حافظه ثابت بماند."""
+    count = 0
+    for batch in _batched(objects, batch_size):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        count += len(batch)
+    return count
+
+
+def _month_list(end_year, end_month, months):
+    """لیست (سال، ماه) شمسی ``months`` ماه منتهی به ماه پایانی، از قدیمی به جدید."""
+    result = []
+    year, month = end_year, end_month
+    for _ in range(months):
+        result.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return result[::-1]
+
+
+def _random_day(rng, month_ranges):
+    start, end = rng.choice(month_ranges)
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _amount(rng, median, low, high, step=1000):
+    """مبلغ با توزیع لگ‌نرمال (بیشتر مبالغ کوچک، تعداد کمی بزرگ) گرد‌شده به ``step``."""
+    value = rng.lognormvariate(0, 0.8) * median
+    return int(min(max(value, low), high)) // step * step
+
+
+class BenchmarkDataset:
+    """پارامترهای یک مجموعه‌داده؛ تعداد ردیف‌ها برای هر کاربر است."""
+
+    def __init__(self, users=10, banks=3, customers=200, subscriptions=2000, expenses=1000, incomes=300,
+                 months=24, end_year=None, end_month=None, seed=1, prefix='bench', batch_size=5000):
+        self.users = users
+        self.banks = banks
+        self.customers = customers
+        self.subscriptions = subscriptions
+        self.expenses = expenses
+        self.incomes = incomes
+        self.months = months
+        # برای تکرارپذیری کامل بین روزهای مختلف، ماه پایانی را صریحاً بدهید
+        today = jdatetime.date.today()
+        self.end_year = end_year or today.year
+        self.end_month = end_month or today.month
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+
+    def usernames(self):
+        return [f'{self.prefix}{index:04d}' for index in range(1, self.users + 1)]
+
+    def build(self, log=None):
+        """همه‌ی داده‌ها را می‌سازد و لیست کاربران ساخته‌شده را برمی‌گرداند."""
+        log = log or (lambda message: None)
+        rng = random.Random(self.seed)
+        periods = _month_list(self.end_year, self.end_month, self.months)
+        month_ranges = [jalali_month_range(year, month) for year, month in periods]
+
+        # هش رمز عبور کند است؛ برای همه‌ی کاربران یک بار ساخته می‌شود (رمز همه: benchmark)
+        password = make_password('benchmark')
+        User.objects.bulk_create([User(username=name, password=password) for name in self.usernames()])
+        users = list(User.objects.filter(username__in=self.usernames()).order_by('username'))
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+
+        for user in users:
+            with transaction.atomic():
+                self._build_user(rng, user, month_ranges, periods)
+            log(f"{user.username}: done")
+
+        # bulk_create سیگنال‌ها را صدا نمی‌زند؛ جداول مشتق‌شده از نو ساخته می‌شوند
+        rebuild_all_balances(users)
+        rebuild_all_summaries(users)
+        rebuild_search_keys(users)
+        rebuild_search_index(users)
+        # ردیف‌های bulk_create در ChangeLog نیستند
+        reset_backup_chain()
+        return users
+
+    def _build_user(self, rng, user, month_ranges, periods):
+        BankAccount.objects.bulk_create([
+            BankAccount(creator=user, bank_name=f'{BANK_NAMES[i % len(BANK_NAMES)]} {i // len(BANK_NAMES) + 1}',
+                        account_number=str(rng.randrange(10 ** 15, 10 ** 16)))
+            for i in range(self.banks)
+        ])
+        bank_ids = list(BankAccount.objects.filter(creator=user).order_by('id').values_list('id', flat=True))
+
+        def random_bank():
+            # حدود ۱۰٪ تراکنش‌ها بدون بانک ثبت می‌شوند
+            return rng.choice(bank_ids) if bank_ids and rng.random() > 0.1 else None
+
+        _bulk_insert(CustomerProfile, (
+            CustomerProfile(
+                creator=user,
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i + 1}',
+                phone_number=f'09{rng.randrange(10 ** 8, 10 ** 9)}',
+            )
+            for i in range(self.customers)
+        ), self.batch_size)
+        customer_ids = list(CustomerProfile.objects.filter(creator=user).order_by('id').values_list('id', flat=True))
+
+        # زنجیره‌ی معرف‌ها: حدود ۴۰٪ مشتری‌ها را یکی از مشتری‌های قبلی (بیشتر تازه‌ها) معرفی کرده است
+        referrers = {}
+        for index, customer_id in enumerate(customer_ids[1:], start=1):
+            if rng.random() < 0.4:
+                referrers[customer_id] = customer_ids[max(0, index - 1 - int(rng.expovariate(0.1)))]
+        for batch in _batched(referrers.items(), self.batch_size):
+            CustomerProfile.objects.bulk_update(
+                [CustomerProfile(id=pk, referred_by_id=referrer) for pk, referrer in batch], ['referred_by'])
+
+        def subscriptions():
+            for _ in range(self.subscriptions):
+                index = rng.randrange(len(periods))
+                year, month = periods[index]
+                giga = rng.choices(GIGA_CHOICES, GIGA_WEIGHTS)[0]
+                paid = rng.random() < 0.85
+                payment_date = _random_day(rng, month_ranges[index:index + 1]) if paid else None
+                customer_id = rng.choice(customer_ids)
+                yield Subscription(
+                    creator=user, customer_id=customer_id, year=year, month=month, giga=giga,
+                    price=giga * rng.choice((3000, 3500, 4000, 5000)),
+                    status='success' if paid else 'pending', payment_date=payment_date,
+                    expire_date=payment_date + timedelta(days=30) if payment_date else None,
+                    referrer_id=referrers.get(customer_id), destination_bank_id=random_bank() if paid else None,
+                )
+
+        if customer_ids:
+            _bulk_insert(Subscription, subscriptions(), self.batch_size)
+
+        _bulk_insert(Expense, (
+            Expense(
+                creator=user, spending_date=_random_day(rng, month_ranges), issue=rng.choice(EXPENSE_ISSUES),
+                price=_amount(rng, 200_000, 10_000, 200_000_000), is_server_cost=rng.random() < 0.3,
+                source_bank_id=random_bank(),
+            )
+            for _ in range(self.expenses)
+        ), self.batch_size)
+
+        _bulk_insert(OtherIncome, (
+            OtherIncome(
+                creator=user, deposit_date=_random_day(rng, month_ranges), name=rng.choice(INCOME_NAMES),
+                price=_amount(rng, 1_000_000, 10_000, 500_000_000), destination_bank_id=random_bank(),
+            )
+            for _ in range(self.incomes)
+        ), self.batch_size)
@@ -0,0 +1,178 @@
+# Accounting/dashboard/benchmarking.py
+
+"""
+اندازه‌گیری ویوها برای مجموعه‌ی بنچمارک (dashboard/tests.py).
+
+برای هر ویو تعداد کوئری، میانه و صدک ۹۵ زمان پاسخ و اوج حافظه‌ی پایتون
+(tracemalloc) اندازه گرفته و با خط پایه‌ی ذخیره‌شده در
+dashboard/benchmark_baselines.json مقایسه می‌شود.
+
+اجرا:
+    DASHBOARD_BENCHMARKS=1 python manage.py test dashboard --tag benchmark
+به‌روزرسانی خط پایه (بعد از یک تغییر عمدی):
+    DASHBOARD_BENCHMARKS=1 BENCHMARK_UPDATE=1 python manage.py test dashboard --tag benchmark
+"""
+
+import gc
+import json
+import math
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINES_PATH = Path(__file__).resolve().parent / 'benchmark_baselines.json'
+
+# تعداد ردیف‌ها برای هر کاربر (پارامترهای BenchmarkDataset)
+DATASETS = {
+    'small': {'banks': 2, 'customers': 20, 'subscriptions': 200, 'expenses': 100, 'incomes': 30},
+    'medium': {'banks': 4, 'customers': 200, 'subscriptions': 2000, 'expenses': 1000, 'incomes': 300},
+    'large': {'banks': 6, 'customers': 1000, 'subscriptions': 20000, 'expenses': 10000, 'incomes': 3000},
+}
+
+DESKTOP_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36'
+MOBILE_AGENT = 'Mozilla/5.0 (Linux; Android 14) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36'
+
+# (نام URL، مدلی که pk آن در URL می‌آید، پارامترهای GET، موبایل)
+# ویوهای با اثر جانبی (حذف، دانلود/ارسال/بازیابی بک‌آپ) اینجا نیستند.
+VIEWS = (
+    ('main_dashboard', None, {}, False),
+    ('add_transaction', None, {}, False),
+    ('subscription_dashboard', None, {}, False),
+    ('customer_profile_list', None, {}, False),
+    ('bank_account_list', None, {}, False),
+    ('financial_report', None, {}, False),
+    ('financial_report', None, {'month': 1, 'timeframe': 'daily'}, False),
+    ('bank_report', None, {}, False),
+    ('profile', None, {}, False),
+    ('backup_panel', None, {}, False),
+    ('customer_referrers', None, {}, False),
+    ('subscription_edit', 'subscription', {}, False),
+    ('edit_customer_profile', 'customer', {}, False),
+    ('bank_account_edit', 'bank', {}, False),
+    ('expense_edit', 'expense', {}, False),
+    ('other_income_edit', 'income', {}, False),
+    ('mobile_home', None, {}, True),
+    ('mobile_transaction_list', None, {}, True),
+    ('mobile_add_transaction', None, {}, True),
+    ('mobile_menu', None, {}, True),
+    ('mobile_profile', None, {}, True),
+    ('mobile_bank_list', None, {}, True),
+    ('mobile_backup', None, {}, True),
+    ('mobile_financial_report', None, {}, True),
+    ('mobile_change_password', None, {}, True),
+    ('mobile_customer_list', None, {}, True),
+    ('mobile_customer_add', None, {}, True),
+    ('mobile_customer_edit', 'customer', {}, True),
+    ('mobile_bank_add', None, {}, True),
+    ('mobile_bank_edit', 'bank', {}, True),
+    ('mobile_edit_expense', 'expense', {}, True),
+    ('mobile_edit_income', 'income', {}, True),
+    ('mobile_edit_subscription', 'subscription', {}, True),
+)
+
+
+def view_key(name, params):
+    """کلید ویو در فایل خط پایه، مثلاً ``financial_report?month=1&timeframe=daily``."""
+    if not params:
+        return name
+    return name + '?' + '&'.join(f'{key}={value}' for key, value in sorted(params.items()))
+
+
+def percentile(values, pct):
+    """صدک ``pct`` با روش nearest-rank."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(client, url, mobile=False, repeat=20):
+    """
+    یک ویو را ``repeat`` بار اجرا و شاخص‌هایش را برمی‌گرداند.
+
+    قبل از هر اجرا کش خالی می‌شود تا هزینه‌ی واقعی محاسبه (نه خواندن از کش
+    گزارش‌ها) اندازه گرفته شود.
+    """
+    agent = MOBILE_AGENT if mobile else DESKTOP_AGENT
+
+    def get():
+        cache.clear()
+        response = client.get(url, HTTP_USER_AGENT=agent)
+        if response.status_code != 200:
+            raise AssertionError(f'{url} returned {response.status_code}')
+        return response
+
+    # اجرای اول (گرم کردن) برای شمارش کوئری‌ها
+    with CaptureQueriesContext(connection) as queries:
+        get()
+    # شروع هر درخواست لاگ کوئری‌ها را پاک می‌کند؛ تعداد همین حالا خوانده می‌شود
+    query_count = len(queries)
+
+    # مثل timeit، جمع‌آوری زباله در حین زمان‌سنجی خاموش است تا نویز p95 کم شود
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            get()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        get()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'queries': query_count,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def load_baselines():
+    if not BASELINES_PATH.exists():
+        return {}
+    return json.loads(BASELINES_PATH.read_text(encoding='utf-8'))
+
+
+def save_baselines(vendor, dataset, results):
+    """نتایج یک مجموعه‌داده را در فایل خط پایه (به تفکیک نوع دیتابیس) ادغام می‌کند."""
+    baselines = load_baselines()
+    baselines.setdefault(vendor, {})[dataset] = results
+    BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def regressions(measured, baseline, tolerance=None, slack_ms=None):
+    """
+    لیست پیام‌های پسرفت نسبت به خط پایه.
+
+    تعداد کوئری‌ها دقیق مقایسه می‌شود (به سخت‌افزار وابسته نیست). زمان و
+    حافظه با ضریب تحمل (BENCHMARK_TOLERANCE، پیش‌فرض ۱۰۰٪؛ برای p95 دو برابر
+    چون به نویز ماشین حساس‌تر است) و برای زمان با یک حاشیه‌ی مطلق
+    (BENCHMARK_SLACK_MS) مقایسه می‌شوند تا نویز اجراهای کوتاه باعث شکست نشود.
+    """
+    if tolerance is None:
+        tolerance = float(os.environ.get('BENCHMARK_TOLERANCE', 1.0))
+    if slack_ms is None:
+        slack_ms = float(os.environ.get('BENCHMARK_SLACK_MS', 5))
+
+    problems = []
+    if measured['queries'] > baseline['queries']:
+        problems.append(f"queries {measured['queries']} > {baseline['queries']}")
+    for metric, factor in (('p50_ms', 1), ('p95_ms', 2)):
+        limit = baseline[metric] * (1 + factor * tolerance) + slack_ms
+        if measured[metric] > limit:
+            problems.append(f"{metric} {measured[metric]} > {limit:.2f}")
+    limit = baseline['peak_kb'] * (1 + tolerance)
+    if measured['peak_kb'] > limit:
+        problems.append(f"peak_kb {measured['peak_kb']} > {limit:.1f}")
+    return problems
@@ -0,0 +1,90 @@
+# Accounting/dashboard/customers.py
+
+"""
+جستجو و صفحه‌بندی لیست مشتریان در خود دیتابیس.
+
+لیست به ترتیب نام است و صفحه‌بندی keyset روی نام انجام می‌شود (نام برای هر
+کاربر یکتاست: unique_together (creator, name))؛ پس هر صفحه فقط page_size
+ردیف از همان ایندکس یکتا می‌خواند، مستقل از تعداد کل مشتریان. جستجو
+پیشوندی روی کلید یکسان‌شده‌ی search_key (ایندکس (creator, search_key)) یا
+پیشوندی روی تک‌تک کلمه‌های نام و شماره (ایندکس SearchToken) است؛ پس «رضا»
+هم «علی رضایی» را پیدا می‌کند.
+"""
+
+from functools import reduce
+from operator import and_
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from dashboard.models import CustomerProfile, SearchToken, Subscription
+from dashboard.persian import normalize_search_key
+from dashboard.search import MAX_QUERY_TERMS, tokenize
+
+CUSTOMER_PAGE_SIZE = 50
+
+
+def search_customers(user, query=''):
+    """مشتریانی که کل نامشان با ``query`` شروع می‌شود یا هر کلمه‌ی ``query`` پیشوند یکی از کلمه‌هایشان است."""
+    customers = CustomerProfile.objects.filter(creator=user)
+    key = normalize_search_key(query)
+    if not key:
+        return customers
+    condition = Q(search_key__startswith=key)
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if terms:
+        tokens = SearchToken.objects.filter(creator=user, model='customer')
+        condition |= reduce(and_, (
+            Q(pk__in=tokens.filter(token__startswith=term).values('object_id')) for term in terms))
+    return customers.filter(condition)
+
+
+def _subscription_count():
+    # زیرکوئری وابسته فقط برای ردیف‌های همین صفحه اجرا می‌شود (برخلاف GROUP BY روی کل جدول)
+    counts = (Subscription.objects.filter(customer=OuterRef('pk')).order_by()
+              .values('customer').annotate(count=Count('pk')).values('count'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def get_customer_page(user, query='', after=None, before=None, page_size=CUSTOMER_PAGE_SIZE):
+    """
+    یک صفحه از مشتریان (با معرف و تعداد اشتراک‌ها).
+
+    ``after`` نام آخرین مشتری صفحه‌ی قبل (صفحه‌ی بعد) و ``before`` نام اولین
+    مشتری صفحه‌ی فعلی (صفحه‌ی قبل) است. خروجی دیکشنری شامل ``customers`` و
+    نشانگرهای صفحه‌ی بعد/قبل است.
+    """
+    customers = search_customers(user, query)
+    if before:
+        customers = customers.filter(name__lt=before).order_by('-name')
+    else:
+        if after:
+            customers = customers.filter(name__gt=after)
+        customers = customers.order_by('name')
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه‌ی بعد
+    rows = list(customers.select_related('referred_by')
+                .annotate(subscription_count=_subscription_count())[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if before:
+        rows.reverse()
+        has_previous, has_next = has_more, True
+    else:
+        has_previous, has_next = bool(after), has_more
+
+    return {
+        'customers': rows,
+        'next_cursor': rows[-1].name if rows and has_next else None,
+        'previous_cursor': rows[0].name if rows and has_previous else None,
+    }
+
+
+def get_customer_referrers(user):
+    """
+    نقشه‌ی کامل مشتری ← معرف پیش‌فرض کاربر (``{pk: {'id', 'text'}}``) با یک
+    کوئری؛ فرم اشتراک با آن معرف را بدون درخواست جدا برای هر انتخاب پر می‌کند.
+    """
+    rows = (CustomerProfile.objects.filter(creator=user, referred_by__isnull=False)
+            .values_list('pk', 'referred_by_id', 'referred_by__name'))
+    return {pk: {'id': referrer_id, 'text': name} for pk, referrer_id, name in rows}
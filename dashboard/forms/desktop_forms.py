@@ -8,6 +8,9 @@ from django.contrib.auth.forms import UserChangeForm, PasswordChangeForm
 from dashboard.models import Expense, OtherIncome, Profile, Subscription, CustomerProfile, BankAccount, User
 import jdatetime
 from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from dashboard.persian import convert_persian_to_english_numbers
 
 
 class CustomAuthenticationForm(AuthenticationForm):
@@ -31,6 +34,37 @@ class CustomAuthenticationForm(AuthenticationForm):
     )
 
 
+class RemoteSelect(forms.Select):
+    """
+    لیست کشویی select2 با داده‌ی راه دور (dashboard/autocomplete.py).
+
+    فقط گزینه‌ی خالی و مقدار انتخاب‌شده رندر می‌شوند، پس حجم صفحه و زمان
+    ساخت فرم به تعداد مشتری‌ها بستگی ندارد؛ اعتبارسنجی همچنان با queryset
+    فیلد (محدود به کاربر) انجام می‌شود.
+    """
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('dashboard:autocomplete', args=[self.source])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        selected = [v for v in value if str(v).isdigit()]
+        options = [('', choices.field.empty_label)] if choices.field.empty_label is not None else []
+        if selected:
+            options += [(obj.pk, str(obj)) for obj in choices.queryset.filter(pk__in=selected)]
+        self.choices = options
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
 # هلپرهای شما (بدون تغییر)
 def add_jalali_date_picker_class(field):
     if field:
@@ -40,13 +74,6 @@ def add_jalali_date_picker_class(field):
     return field
 
 
-def convert_persian_to_english_numbers(text):
-    if not isinstance(text, str):
-        return text
-    persian_to_english = str.maketrans('۰۱۲۳۴۵۶۷۸۹', '0123456789')
-    return text.translate(persian_to_english)
-
-
 def to_gregorian_date(jalali_date_str):
     if not jalali_date_str:
         return None
@@ -191,9 +218,9 @@ class SubscriptionForm(forms.ModelForm):
             'giga': forms.TextInput(attrs={'class': 'form-input'}),
             #'payment_date': forms.TextInput(attrs={'class': 'form-input jalali-datepicker', 'autocomplete': 'off'}),
             'expire_date': forms.DateInput(attrs={'class': 'form-input', 'type': 'date'}),
-            'customer': forms.Select(attrs={'class': 'form-select select2-enable'}),
-            'referrer': forms.Select(attrs={'class': 'form-select select2-enable'}),
-            'destination_bank': forms.Select(attrs={'class': 'form-select select2-enable'}),
+            'customer': RemoteSelect('customers', attrs={'class': 'form-select select2-enable'}),
+            'referrer': RemoteSelect('customers', attrs={'class': 'form-select select2-enable'}),
+            'destination_bank': RemoteSelect('banks', attrs={'class': 'form-select select2-enable'}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -242,6 +269,7 @@ class CustomerProfileForm(forms.ModelForm):
         widgets = {
             'name': forms.TextInput(attrs={'placeholder': _('e.g., John Doe')}),
             'phone_number': forms.TextInput(attrs={'placeholder': _('e.g., 09123456789')}),
+            'referred_by': RemoteSelect('customers'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -251,7 +279,8 @@ class CustomerProfileForm(forms.ModelForm):
         # **تغییر اصلی**: اضافه کردن کلاس‌های CSS مدرن به هر فیلد
         self.fields['name'].widget.attrs.update({'class': 'form-input'})
         self.fields['phone_number'].widget.attrs.update({'class': 'form-input'})
-        self.fields['referred_by'].widget.attrs.update({'class': 'form-select'})
+        # select2-enable: لیست معرف داده‌ی راه دور دارد و بدون select2 قابل جستجو نیست
+        self.fields['referred_by'].widget.attrs.update({'class': 'form-select select2-enable'})
 
         if user:
             queryset = CustomerProfile.objects.filter(creator=user)
@@ -0,0 +1,304 @@
+# Accounting/dashboard/incremental.py
+
+"""
+بک‌آپ افزایشی بر اساس جدول ChangeLog.
+
+هر ذخیره/حذف روی مدل‌های TRACKED_MODELS یک ردیف ChangeLog می‌سازد
+(dashboard/signals.py). بک‌آپ‌ها زنجیره‌ای از یک پایه‌ی کامل و چند فایل
+افزایشی هستند:
+
+* پایه: خروجی mysqldump (gzip) که سطر اولش یک توضیح SQL با شناسه‌ی آخرین
+  تغییر پوشش‌داده‌شده است: ``-- accounting-base: {"change_id": ...}``
+* افزایشی: JSON Lines فشرده؛ سطر اول سرآیند (پایه، from_change، to_change)
+  و بعد برای هر ردیف تغییرکرده آخرین وضعیتش (``fields``) یا ``deleted``.
+
+بازیابی (``python manage.py replay_backups``) پایه را با mysql برمی‌گرداند و
+فایل‌های افزایشی را به ترتیب روی آن اعمال می‌کند.
+"""
+
+import contextvars
+import gzip
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from dashboard.backup import (
+    GZIP_WBITS, BackupError, backup_filename, restore_dump, send_document_to_telegram, stream_gzip_dump,
+    upload_file_to_telegram,
+)
+from dashboard.ledger import rebuild_all_balances, rebuild_all_summaries
+from dashboard.report_cache import get_version_floor, raise_all_versions
+from dashboard.search import rebuild_search_index
+from dashboard.models import (
+    BackupCheckpoint, BankAccount, ChangeLog, CustomerProfile, Expense, OtherIncome, Profile, Subscription,
+)
+
+FORMAT = 'accounting-incremental'
+BASE_MARKER = b'-- accounting-base: '
+# به ترتیب وابستگی (والدها اول)؛ ردیف‌های حذف‌شده به ترتیب عکس اعمال می‌شوند.
+# کاربر و پروفایل هم ثبت می‌شوند تا کاربر جدید (و ردیف‌هایش) در زنجیره جا نماند
+TRACKED_MODELS = (User, Profile, BankAccount, CustomerProfile, Subscription, Expense, OtherIncome)
+MODELS_BY_LABEL = {model._meta.label_lower: model for model in TRACKED_MODELS}
+BATCH_SIZE = 500
+
+_tracking_suspended = contextvars.ContextVar('change_tracking_suspended', default=False)
+
+
+@contextmanager
+def tracking_suspended():
+    """در حین replay تغییرات دوباره در ChangeLog ثبت نمی‌شوند."""
+    token = _tracking_suspended.set(True)
+    try:
+        yield
+    finally:
+        _tracking_suspended.reset(token)
+
+
+def record_change(instance, deleted=False):
+    if not _tracking_suspended.get():
+        ChangeLog.objects.create(model=instance._meta.label_lower, object_id=instance.pk, deleted=deleted)
+
+
+def reset_backup_chain():
+    """
+    بعد از تغییری که از ChangeLog رد نشده (ریستور، import_tables، داده‌ی بنچمارک)
+    هیچ checkpoint قبلی با دیتابیس یکی نیست؛ بک‌آپ بعدی باید کامل باشد.
+    """
+    BackupCheckpoint.objects.all().delete()
+    ChangeLog.objects.all().delete()
+
+
+def last_change_id():
+    return ChangeLog.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def needs_full_backup(now=None):
+    """پایه‌ای وجود ندارد یا از INCREMENTAL_FULL_EVERY_DAYS روز قدیمی‌تر است."""
+    base = BackupCheckpoint.objects.filter(kind='full').last()
+    days = getattr(settings, 'INCREMENTAL_FULL_EVERY_DAYS', 7)
+    return base is None or base.created_at < (now or timezone.now()) - timedelta(days=days)
+
+
+def _gzip(lines):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+    for line in lines:
+        data = compressor.compress(line)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _json_line(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def incremental_lines(base, from_change, to_change):
+    """سطرهای فایل افزایشی: آخرین وضعیت هر ردیفی که بین دو checkpoint تغییر کرده."""
+    yield _json_line({
+        'format': FORMAT, 'version': 1, 'base': base.filename,
+        'from_change': from_change, 'to_change': to_change, 'created_at': timezone.now(),
+    })
+
+    # فقط آخرین تغییر هر ردیف مهم است
+    latest = {}
+    entries = ChangeLog.objects.filter(id__gt=from_change, id__lte=to_change).order_by('id')
+    for label, object_id, deleted in entries.values_list('model', 'object_id', 'deleted').iterator():
+        latest[label, object_id] = deleted
+
+    for model in TRACKED_MODELS:
+        label = model._meta.label_lower
+        saved = sorted(pk for (name, pk), deleted in latest.items() if name == label and not deleted)
+        for batch in _batched(saved, BATCH_SIZE):
+            # ردیفی که بعد از to_change حذف شده پیدا نمی‌شود؛ حذفش در فایل بعدی می‌آید
+            for record in serializers.serialize('python', model.objects.filter(pk__in=batch).order_by('pk')):
+                yield _json_line(record)
+
+    for model in reversed(TRACKED_MODELS):
+        label = model._meta.label_lower
+        for pk in sorted(pk for (name, pk), deleted in latest.items() if name == label and deleted):
+            yield _json_line({'model': label, 'pk': pk, 'deleted': True})
+
+
+def _store(chunks, filename, output_dir, telegram, caption):
+    """فایل را در output_dir می‌نویسد و/یا به تلگرام می‌فرستد؛ حجم فایل را برمی‌گرداند."""
+    if not output_dir:
+        size = 0
+
+        def counted():
+            nonlocal size
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+
+        send_document_to_telegram(counted(), filename, caption)
+        return size
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, filename)
+    try:
+        with open(path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        if telegram:
+            upload_file_to_telegram(path, caption)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return os.path.getsize(path)
+
+
+def create_full_backup(output_dir=None, telegram=False, alias='default', command=None):
+    """
+    پایه‌ی جدید: mysqldump کامل. شناسه‌ی آخرین تغییر قبل از شروع دامپ خوانده
+    می‌شود؛ تغییرات هم‌زمان با دامپ در بک‌آپ افزایشی بعدی تکرار می‌شوند (اعمال دوباره‌ی آن‌ها بی‌ضرر است).
+    """
+    change_id = last_change_id()
+    header = BASE_MARKER + _json_line({'change_id': change_id, 'created_at': timezone.now()})
+    filename = backup_filename()
+    dump = stream_gzip_dump(alias, command=command, header=header)
+    try:
+        size = _store(dump, filename, output_dir, telegram, f"🗄 Full backup\n📅 {datetime.now():%Y-%m-%d %H:%M}")
+    finally:
+        dump.close()
+    if not dump.completed:
+        if output_dir and os.path.exists(os.path.join(output_dir, filename)):
+            os.remove(os.path.join(output_dir, filename))
+        raise BackupError(f'Dump Error: {dump.error or "dump was interrupted"}')
+
+    checkpoint = BackupCheckpoint.objects.create(kind='full', change_id=change_id, filename=filename, size=size)
+    # تغییرات قبل از این پایه دیگر لازم نیستند؛ آخرین ردیف می‌ماند تا Max(id) عقب نرود
+    ChangeLog.objects.filter(id__lt=change_id).delete()
+    return checkpoint
+
+
+def create_incremental_backup(output_dir=None, telegram=False):
+    """فایل افزایشی از آخرین checkpoint تا حالا؛ اگر تغییری نبوده None برمی‌گرداند."""
+    previous = BackupCheckpoint.objects.last()
+    if previous is None:
+        raise BackupError('No full backup yet; create one with --full first.')
+    base = previous.base or previous
+    to_change = last_change_id()
+    if to_change <= previous.change_id:
+        return None
+
+    # بازه‌ی تغییرات در نام فایل است تا ترتیب زنجیره از روی نام هم معلوم باشد
+    filename = (f"incremental_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+                f"_{previous.change_id}-{to_change}.jsonl.gz")
+    size = _store(_gzip(incremental_lines(base, previous.change_id, to_change)), filename, output_dir, telegram,
+                  f"➕ Incremental backup (base: {base.filename})\n📅 {datetime.now():%Y-%m-%d %H:%M}")
+    return BackupCheckpoint.objects.create(
+        kind='incremental', base=base, change_id=to_change, filename=filename, size=size)
+
+
+# ===================================================================
+# بازیابی: پایه + فایل‌های افزایشی
+# ===================================================================
+
+def read_base_header(path):
+    with gzip.open(path, 'rb') as base:
+        line = base.readline()
+    if not line.startswith(BASE_MARKER):
+        raise BackupError(f'{os.path.basename(path)} is not a full backup created by incremental_backup.')
+    return json.loads(line[len(BASE_MARKER):])
+
+
+def read_incremental_header(path):
+    with gzip.open(path, 'rb') as incremental:
+        try:
+            header = json.loads(incremental.readline())
+        except ValueError:
+            header = None
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise BackupError(f'{os.path.basename(path)} is not an incremental backup.')
+    return header
+
+
+def check_chain(base_path, incremental_paths):
+    """بررسی می‌کند که فایل‌های افزایشی متعلق به همین پایه و پشت سر هم (بدون فاصله) باشند."""
+    change_id = read_base_header(base_path)['change_id']
+    base_name = os.path.basename(base_path)
+    headers = []
+    for path in incremental_paths:
+        header = read_incremental_header(path)
+        if header['base'] != base_name:
+            raise BackupError(f"{os.path.basename(path)} belongs to base {header['base']}, not {base_name}.")
+        if header['from_change'] != change_id:
+            raise BackupError(
+                f"{os.path.basename(path)} starts at change {header['from_change']}, expected {change_id} "
+                f"(missing or out-of-order incremental file).")
+        change_id = header['to_change']
+        headers.append(header)
+    return headers
+
+
+def _records(path):
+    with gzip.open(path, 'rb') as incremental:
+        incremental.readline()
+        for line in incremental:
+            yield json.loads(line)
+
+
+def apply_incremental(path):
+    """
+    یک فایل افزایشی را اعمال می‌کند؛ تعداد ردیف‌های ذخیره‌شده و حذف‌شده را برمی‌گرداند.
+
+    اول همه‌ی حذف‌ها و بعد ذخیره‌ها اعمال می‌شوند (فایل دو بار خوانده می‌شود):
+    اگر ردیفی حذف و ردیف دیگری با همان مقدار یکتا (مثلاً نام مشتری) ساخته شده
+    باشد، ذخیره‌ی ردیف جدید قبل از حذف قدیمی با قید unique خطا می‌داد.
+    """
+    saved = deleted = 0
+    for record in _records(path):
+        if record.get('deleted'):
+            MODELS_BY_LABEL[record['model']].objects.filter(pk=record['pk']).delete()
+            deleted += 1
+    for record in _records(path):
+        if not record.get('deleted'):
+            for obj in serializers.deserialize('python', [record]):
+                obj.save()
+            saved += 1
+    return saved, deleted
+
+
+def replay_backups(base_path, incremental_paths, log=None, command=None):
+    """
+    پایه را ریستور و فایل‌های افزایشی را به ترتیب روی آن اعمال می‌کند؛ بعد
+    جداول مشتق‌شده از نو ساخته می‌شوند. چون وضعیت دیتابیس دیگر با هیچ
+    checkpoint قبلی یکی نیست، checkpointها پاک می‌شوند تا بک‌آپ بعدی کامل باشد.
+    """
+    log = log or (lambda message: None)
+    check_chain(base_path, incremental_paths)
+    floor = get_version_floor()
+
+    with open(base_path, 'rb') as base:
+        result = restore_dump(base, compressed=True, command=command)
+    log(f"{os.path.basename(base_path)}: {result['statements']} statements restored")
+
+    with tracking_suspended(), transaction.atomic(), connection.constraint_checks_disabled():
+        for path in incremental_paths:
+            saved, deleted = apply_incremental(path)
+            log(f"{os.path.basename(path)}: {saved} saved, {deleted} deleted")
+
+    users = User.objects.all()
+    rebuild_all_balances(users)
+    rebuild_all_summaries(users)
+    rebuild_search_index(users)
+    raise_all_versions(floor)
+    reset_backup_chain()
@@ -0,0 +1,52 @@
+# Accounting/dashboard/jalali.py
+
+"""
+پر کردن جدول تقویم شمسی (JalaliCalendarDay).
+
+این توابع مدل را به صورت پارامتر می‌گیرند تا هم در مایگریشن (مدل تاریخی)
+و هم در دستور مدیریتی ``fill_jalali_calendar`` قابل استفاده باشند.
+"""
+
+from datetime import timedelta
+
+import jdatetime
+from django.conf import settings
+
+DEFAULT_CALENDAR_YEARS = (1390, 1430)
+
+
+def calendar_years():
+    """بازه‌ی سال‌های شمسی که جدول تقویم باید پوشش دهد (شامل هر دو سر)."""
+    return getattr(settings, 'JALALI_CALENDAR_YEARS', DEFAULT_CALENDAR_YEARS)
+
+
+def iter_calendar_days(start_year, end_year):
+    """به ازای هر روز از ابتدای start_year تا انتهای end_year یک دیکشنری برمی‌گرداند."""
+    day = jdatetime.date(start_year, 1, 1)
+    last = jdatetime.date(end_year + 1, 1, 1)
+    while day < last:
+        yield {
+            'date': day.togregorian(),
+            'year': day.year,
+            'month': day.month,
+            'day': day.day,
+            'weekday': day.weekday(),
+            'season': (day.month - 1) // 3 + 1,
+        }
+        day += timedelta(days=1)
+
+
+def fill_calendar(model, start_year, end_year, batch_size=1000):
+    """روزهای بازه را (بدون تکرار روزهای موجود) در جدول تقویم درج می‌کند."""
+    rows = [model(**values) for values in iter_calendar_days(start_year, end_year)]
+    model.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
+
+
+def ensure_calendar(model, start, end):
+    """مطمئن می‌شود سال‌های شمسی شامل تاریخ‌های میلادی start تا end در جدول تقویم هستند."""
+    start_year = jdatetime.date.fromgregorian(date=start).year
+    end_year = jdatetime.date.fromgregorian(date=end).year
+    expected = (jdatetime.date(end_year + 1, 1, 1) - jdatetime.date(start_year, 1, 1)).days
+    if model.objects.filter(year__range=(start_year, end_year)).count() != expected:
+        fill_calendar(model, start_year, end_year)
@@ -0,0 +1,181 @@
+# Accounting/dashboard/jobs.py
+
+"""
+صف کارهای پس‌زمینه روی دیتابیس (مدل BackgroundJob).
+
+ویوها فقط کار را ثبت می‌کنند (enqueue) و فوراً پاسخ می‌دهند؛ دستور
+``python manage.py run_jobs`` کارها را به ترتیب برمی‌دارد و اجرا می‌کند و
+صفحه‌ها وضعیت را از ``backup/jobs/<id>/`` می‌خوانند. در هر لحظه فقط یک کار
+در حال اجراست (حتی با چند worker): برداشتن کار با قفل ردیف‌های فعال صف
+انجام می‌شود.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.backup import BackupError, restore_dump, send_backup_to_telegram
+from dashboard.incremental import reset_backup_chain
+from dashboard.models import BackgroundJob
+from dashboard.report_cache import get_version_floor, raise_all_versions
+
+logger = logging.getLogger('dashboard.jobs')
+
+# ثبت پیشرفت در دیتابیس حداکثر هر چند ثانیه یک بار
+PROGRESS_INTERVAL = 1.0
+
+
+def enqueue(kind, user, payload=None, upload=None):
+    """
+    یک کار در صف ثبت می‌کند؛ ``upload`` (اختیاری) فایل آپلودشده‌ی همراه کار است.
+    آپلودهای بزرگ (که جانگو روی دیسک نگه داشته) جابه‌جا می‌شوند، نه کپی.
+    """
+    job = BackgroundJob(creator=user, kind=kind, payload=payload or {})
+    if upload is not None:
+        job.file.save(upload.name, upload, save=False)
+        job.total = upload.size
+    job.save()
+    return job
+
+
+def find_user_job(user, job_id):
+    """کار با شناسه‌ی ``job_id`` (مثلاً از ?job=) اگر متعلق به کاربر باشد، وگرنه None."""
+    if not str(job_id or '').isdigit():
+        return None
+    return BackgroundJob.objects.filter(pk=job_id, creator=user).first()
+
+
+def validate_restore_upload(upload):
+    """پیام خطا برای فایل ریستور نامعتبر (پسوند یا حجم)، یا None."""
+    if not upload.name.endswith(('.sql', '.gz')):
+        return 'Invalid file: upload a .sql or .sql.gz backup.'
+    limit = getattr(settings, 'RESTORE_MAX_SIZE', None)
+    if limit and upload.size > limit:
+        return f'File is too large: the limit is {limit // (1024 * 1024)} MB.'
+    return None
+
+
+def fail_stale_jobs():
+    """کارهای «در حال اجرا» که worker آن‌ها مدتی خبری نداده (مثلاً ری‌استارت شده) شکست‌خورده علامت می‌خورند."""
+    limit = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_STALE_SECONDS', 15 * 60))
+    return BackgroundJob.objects.filter(status='running', heartbeat__lt=limit).update(
+        status='failed', finished_at=timezone.now(), message='The worker stopped while running this job.')
+
+
+def claim_next_job():
+    """
+    قدیمی‌ترین کار در صف را برمی‌دارد، یا None اگر صف خالی است یا کاری در حال اجراست.
+
+    همه‌ی ردیف‌های فعال (queued/running) با select_for_update قفل می‌شوند؛
+    worker دوم تا پایان تراکنش اولی منتظر می‌ماند و بعد کار running را می‌بیند.
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        active = list(BackgroundJob.objects.select_for_update().filter(status__in=('queued', 'running')))
+        if not active or any(job.status == 'running' for job in active):
+            return None
+        job = active[0]
+        job.status = 'running'
+        job.started_at = job.heartbeat = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'heartbeat'])
+    return job
+
+
+class ProgressReporter:
+    """پیشرفت کار را (با فاصله‌ی حداقل PROGRESS_INTERVAL) در دیتابیس ثبت می‌کند."""
+
+    def __init__(self, job, interval=PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.last = 0.0
+        self.done = 0
+        self.statements = 0
+
+    def __call__(self, done, statements=0):
+        self.done, self.statements = done, statements
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return
+        self.last = now
+        BackgroundJob.objects.filter(pk=self.job.pk).update(
+            progress=done, statements=statements, heartbeat=timezone.now())
+
+
+def run_telegram_backup(job, progress):
+    caption = job.payload.get('caption') or (
+        f"✅ Backup Successful\n📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+        f"🗄 DB: {settings.DATABASES['default']['NAME']}"
+    )
+    parts = send_backup_to_telegram(caption, on_progress=progress)
+    if len(parts) > 1:
+        return f'Backup sent successfully in {len(parts)} parts!'
+    return 'Backup sent successfully!'
+
+
+def run_restore(job, progress):
+    floor = get_version_floor()
+    with job.file.open('rb') as fileobj:
+        result = restore_dump(fileobj, compressed=job.file.name.endswith('.gz'), on_progress=progress)
+    # نسخه‌های داده‌ی دامپ ممکن است قبلاً استفاده شده باشند (کش گزارش‌ها و ETag)
+    raise_all_versions(floor)
+    reset_backup_chain()
+    return f"Database restored successfully! ({result['statements']} statements)"
+
+
+HANDLERS = {
+    'telegram_backup': run_telegram_backup,
+    'restore': run_restore,
+}
+
+
+def run_job(job):
+    """یک کار برداشته‌شده را اجرا و نتیجه (success/failed و پیام) را ثبت می‌کند."""
+    logger.info('job %s (%s) started', job.pk, job.kind)
+    progress = ProgressReporter(job)
+    try:
+        message = HANDLERS[job.kind](job, progress)
+        status = 'success'
+    except BackupError as e:
+        message, status = str(e), 'failed'
+    except Exception as e:
+        logger.exception('job %s (%s) crashed', job.pk, job.kind)
+        message, status = f'System Error: {e}', 'failed'
+    finally:
+        if job.file:
+            # دامپ آپلودشده بعد از اجرا لازم نیست (و ممکن است حجیم باشد)
+            job.file.delete(save=False)
+
+    # بعد از ریستور ممکن است ردیف این کار در دامپ نبوده باشد؛ update روی ردیف ناموجود بی‌اثر است
+    job.status, job.message, job.finished_at = status, message, timezone.now()
+    job.progress, job.statements = progress.done, progress.statements
+    if status == 'success' and job.total is None:
+        job.total = progress.done
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=status, message=message, finished_at=job.finished_at, progress=job.progress,
+        statements=job.statements, total=job.total, file='')
+    logger.log(logging.INFO if status == 'success' else logging.ERROR,
+               'job %s (%s) %s: %s', job.pk, job.kind, status, message)
+    return job
+
+
+def job_status(job):
+    """نمایش JSON وضعیت کار برای صفحه‌هایی که آن را poll می‌کنند."""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_display': str(job.get_status_display()),
+        'finished': job.is_finished,
+        'progress': job.progress,
+        'total': job.total,
+        'percent': min(100, round(job.progress * 100 / job.total)) if job.total else None,
+        'statements': job.statements,
+        'message': job.message,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,98 @@
+# Accounting/dashboard/ledger.py
+
+"""
+بازسازی کامل جداول مشتق‌شده (دفتر موجودی بانک‌ها و خلاصه‌ی ماهانه) از روی
+تاریخچه‌ی تراکنش‌ها.
+
+به‌روزرسانی افزایشی در dashboard/signals.py انجام می‌شود؛ این ماژول برای
+همسان‌سازی (مثلاً بعد از bulk_create یا ریستور دیتابیس) استفاده می‌شود.
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+
+from dashboard.jalali import ensure_calendar
+from dashboard.models import (
+    BankAccount, Expense, JalaliCalendarDay, MonthlySummary, OtherIncome, Profile, Subscription
+)
+from dashboard.reports import get_bank_flows, jalali_date_part
+
+
+def rebuild_user_balances(user):
+    """موجودی همه‌ی بانک‌ها و موجودی بدون بانک یک کاربر را از نو محاسبه می‌کند."""
+    flows = get_bank_flows(user, include_unassigned=True)
+    with transaction.atomic():
+        banks = list(BankAccount.objects.select_for_update().filter(creator=user))
+        for bank in banks:
+            bank.balance = flows.get(bank.id, {}).get('net_flow', 0)
+        BankAccount.objects.bulk_update(banks, ['balance'])
+
+        profile, _ = Profile.objects.get_or_create(user=user)
+        profile.unassigned_balance = flows.get(None, {}).get('net_flow', 0)
+        profile.save(update_fields=['unassigned_balance'])
+    return len(banks)
+
+
+def rebuild_all_balances(users=None):
+    users = users if users is not None else User.objects.all()
+    return sum(rebuild_user_balances(user) for user in users)
+
+
+def _by_jalali_month(queryset, date_field, **aggregates):
+    """مجموع‌ها را بر اساس ماه شمسی ستون تاریخ (از روی جدول تقویم) گروه‌بندی می‌کند."""
+    queryset = queryset.filter(**{f'{date_field}__isnull': False})
+    bounds = queryset.aggregate(first=Min(date_field), last=Max(date_field))
+    if bounds['first'] is None:
+        return []
+    ensure_calendar(JalaliCalendarDay, bounds['first'], bounds['last'])
+    return queryset.annotate(
+        jalali_year=jalali_date_part(date_field, 'year'),
+        jalali_month=jalali_date_part(date_field, 'month'),
+    ).order_by().values('jalali_year', 'jalali_month').annotate(**aggregates)
+
+
+def rebuild_user_summaries(user):
+    """خلاصه‌های ماهانه‌ی یک کاربر را با چند کوئری گروه‌بندی‌شده از نو می‌سازد."""
+    months = defaultdict(lambda: dict.fromkeys(MonthlySummary.AMOUNT_FIELDS, 0))
+
+    for row in _by_jalali_month(Subscription.objects.filter(creator=user, status='success'), 'payment_date',
+                                subscription_income=Sum('price')):
+        months[row['jalali_year'], row['jalali_month']]['subscription_income'] += row['subscription_income']
+
+    for row in _by_jalali_month(OtherIncome.objects.filter(creator=user), 'deposit_date',
+                                other_income=Sum('price')):
+        months[row['jalali_year'], row['jalali_month']]['other_income'] += row['other_income']
+
+    for row in _by_jalali_month(Expense.objects.filter(creator=user), 'spending_date',
+                                expenses=Sum('price'),
+                                server_costs=Sum('price', filter=Q(is_server_cost=True), default=0)):
+        summary = months[row['jalali_year'], row['jalali_month']]
+        summary['expenses'] += row['expenses']
+        summary['server_costs'] += row['server_costs']
+
+    # آمار فروش بر اساس سال و ماه خود اشتراک
+    subscription_months = Subscription.objects.filter(creator=user).order_by().values('year', 'month').annotate(
+        giga_sold=Sum('giga'),
+        paid_subscriptions=Sum('price', filter=Q(status='success'), default=0),
+        unpaid_subscriptions=Sum('price', filter=Q(status='pending'), default=0),
+    )
+    for row in subscription_months:
+        summary = months[row['year'], row['month']]
+        for field in ('giga_sold', 'paid_subscriptions', 'unpaid_subscriptions'):
+            summary[field] += row[field]
+
+    with transaction.atomic():
+        MonthlySummary.objects.filter(creator=user).delete()
+        MonthlySummary.objects.bulk_create([
+            MonthlySummary(creator=user, year=year, month=month, **amounts)
+            for (year, month), amounts in months.items()
+        ])
+    return len(months)
+
+
+def rebuild_all_summaries(users=None):
+    users = users if users is not None else User.objects.all()
+    return sum(rebuild_user_summaries(user) for user in users)
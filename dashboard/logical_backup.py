@@ -0,0 +1,224 @@
+# Accounting/dashboard/logical_backup.py
+
+"""
+بک‌آپ منطقی (بدون mysqldump) با ORM؛ روی MySQL و SQLite یکسان کار می‌کند.
+
+هر جدول در یک فایل ``<app>.<model>.jsonl.gz`` جدا نوشته می‌شود (هر سطر
+یک آرایه‌ی JSON از مقادیر ستون‌ها) و خروجی جدول‌ها به صورت موازی (یک thread
+برای هر جدول) با ``iterator(chunk_size=...)`` خوانده می‌شود تا حافظه ثابت
+بماند. ``manifest.json`` ستون‌ها، تعداد ردیف‌ها و ترتیب وابستگی جدول‌ها را
+نگه می‌دارد و import_tables با همان ترتیب و با bulk_create برمی‌گرداند.
+
+نکته: هر جدول در تراکنش خودش خوانده می‌شود، پس خروجی یک snapshot واحد از
+کل دیتابیس نیست؛ برای بک‌آپ سازگار در حین کار سیستم از mysqldump
+(--single-transaction) استفاده کنید.
+"""
+
+import datetime
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from dashboard.backup import BackupError
+from dashboard.incremental import reset_backup_chain
+from dashboard.report_cache import get_version_floor, raise_all_versions
+
+FORMAT = 'accounting-logical'
+MANIFEST = 'manifest.json'
+
+
+class LosslessJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder میکروثانیه‌ها را تا میلی‌ثانیه کوتاه می‌کند؛ اینجا کامل نگه داشته می‌شوند."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def user_dependent_models():
+    """
+    جدول‌های بیرون از dashboard که به auth_user وابسته‌اند (عضویت در گروه‌ها،
+    مجوزها و لاگ ادمین). با جایگزینی کاربران این‌ها هم باید جایگزین شوند.
+    """
+    models = [User.groups.through, User.user_permissions.through]
+    if apps.is_installed('django.contrib.admin'):
+        models.append(apps.get_model('admin', 'LogEntry'))
+    return models
+
+
+def exported_models():
+    """
+    همه‌ی مدل‌های dashboard به علاوه‌ی User (که همه به آن FK دارند) و
+    جدول‌های وابسته به آن، به ترتیبی که هر مدل بعد از مدل‌هایی که به آن‌ها
+    FK دارد بیاید. گروه‌ها، مجوزها و content typeها خروجی گرفته نمی‌شوند؛
+    شناسه‌هایشان باید در دیتابیس مقصد (که با همان migrationها ساخته شده) یکی باشد.
+    """
+    models = [User, *user_dependent_models(), *apps.get_app_config('dashboard').get_models()]
+    ordered, done = [], set()
+
+    def visit(model):
+        if model in done:
+            return
+        done.add(model)
+        for field in model._meta.concrete_fields:
+            target = field.related_model if field.many_to_one or field.one_to_one else None
+            if target in models and target is not model:
+                visit(target)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _filename(model):
+    return f'{model._meta.label_lower}.jsonl.gz'
+
+
+def export_table(model, directory, chunk_size=2000, close_connection=False):
+    """یک جدول را در فایل gzip خودش می‌نویسد و اطلاعات آن برای manifest را برمی‌گرداند."""
+    columns = [field.attname for field in model._meta.concrete_fields]
+    rows = model._base_manager.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+    count = 0
+    try:
+        with gzip.open(os.path.join(directory, _filename(model)), 'wb', compresslevel=6) as output:
+            for batch in _batched(rows, chunk_size):
+                output.write(b''.join(
+                    json.dumps(row, cls=LosslessJSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n'
+                    for row in batch
+                ))
+                count += len(batch)
+    finally:
+        if close_connection:
+            # هر thread اتصال دیتابیس خودش را دارد؛ بعد از کار بسته می‌شود
+            connections.close_all()
+    return {'model': model._meta.label_lower, 'file': _filename(model), 'columns': columns, 'rows': count}
+
+
+def export_tables(directory, threads=4, chunk_size=2000):
+    """همه‌ی جدول‌ها را (موازی، یک thread برای هر جدول) خروجی می‌گیرد و manifest را می‌نویسد."""
+    os.makedirs(directory, exist_ok=True)
+    models = exported_models()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='export') as pool:
+            tables = list(pool.map(lambda model: export_table(model, directory, chunk_size, True), models))
+    else:
+        tables = [export_table(model, directory, chunk_size) for model in models]
+
+    manifest = {
+        'format': FORMAT, 'version': 1, 'created_at': timezone.now().isoformat(),
+        'vendor': connection.vendor, 'tables': tables,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2)
+    return manifest
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError) as e:
+        raise BackupError(f'Cannot read {MANIFEST} in {directory}: {e}') from e
+    if manifest.get('format') != FORMAT:
+        raise BackupError(f'{directory} is not a logical backup.')
+    return manifest
+
+
+@contextmanager
+def _raw_timestamps(models):
+    # bulk_create مقدار auto_now/auto_now_add را با زمان فعلی عوض می‌کند؛ موقتاً خاموش می‌شوند
+    changed = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _import_table(directory, table, model, batch_size):
+    """ردیف‌های یک جدول را درج می‌کند و تعدادشان را برمی‌گرداند."""
+    fields = [next(f for f in model._meta.concrete_fields if f.attname == name) for name in table['columns']]
+    # FKهای به خود جدول اول خالی درج و بعد با bulk_update پر می‌شوند (معرف ممکن است شناسه‌ی بزرگ‌تری داشته باشد)
+    self_refs = [field for field in fields if field.is_relation and field.related_model is model and field.null]
+    deferred = []
+    count = 0
+    with gzip.open(os.path.join(directory, table['file']), 'rb') as rows:
+        for batch in _batched(rows, batch_size):
+            objects = []
+            for line in batch:
+                obj = model(**{
+                    field.attname: None if value is None else field.to_python(value)
+                    for field, value in zip(fields, json.loads(line))
+                })
+                references = {field.attname: getattr(obj, field.attname) for field in self_refs}
+                if any(value is not None for value in references.values()):
+                    deferred.append(model(pk=obj.pk, **references))
+                    for attname in references:
+                        setattr(obj, attname, None)
+                objects.append(obj)
+            model._base_manager.bulk_create(objects, batch_size=batch_size)
+            count += len(batch)
+    if deferred:
+        model._base_manager.bulk_update(deferred, [field.name for field in self_refs], batch_size=batch_size)
+    return count
+
+
+def import_tables(directory, batch_size=1000, log=None):
+    """
+    جدول‌های خروجی export_tables را جایگزین جدول‌های فعلی می‌کند (همه در یک
+    تراکنش). ردیف‌ها دسته‌دسته با bulk_create و با همان کلیدهای اصلی درج می‌شوند.
+    ارجاع یک جدول به خودش (مثل معرف مشتری) بعد از درج همه‌ی ردیف‌ها پر می‌شود.
+    """
+    log = log or (lambda message: None)
+    manifest = read_manifest(directory)
+    models = [apps.get_model(table['model']) for table in manifest['tables']]
+    floor = get_version_floor()
+    # جدول‌های وابسته به کاربر حتی اگر در خروجی نباشند خالی می‌شوند تا ردیف یتیم نماند
+    flushed = list(dict.fromkeys([*models, *user_dependent_models()]))
+
+    with transaction.atomic():
+        # sql_flush روی MySQL در پایان FOREIGN_KEY_CHECKS را دوباره روشن می‌کند؛
+        # پس قبل از constraint_checks_disabled اجرا می‌شود
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), [model._meta.db_table for model in flushed]))
+
+        with connection.constraint_checks_disabled(), _raw_timestamps(models):
+            for table, model in zip(manifest['tables'], models):
+                count = _import_table(directory, table, model, batch_size)
+                if count != table['rows']:
+                    raise BackupError(f"{table['file']}: expected {table['rows']} rows, found {count}.")
+                log(f"{table['model']}: {count} rows")
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    # گزارش‌های کش‌شده و ETagهای مرورگر ممکن است با نسخه‌ی داده‌ی وارد‌شده هم‌نام باشند
+    cache.clear()
+    raise_all_versions(floor)
+    reset_backup_chain()
+    return manifest
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.jalali import calendar_years, fill_calendar
+from dashboard.models import JalaliCalendarDay
+
+
+class Command(BaseCommand):
+    help = "Fill (or extend) the Jalali calendar dimension table for a span of Shamsi years."
+
+    def add_arguments(self, parser):
+        start_year, end_year = calendar_years()
+        parser.add_argument('--start-year', type=int, default=start_year)
+        parser.add_argument('--end-year', type=int, default=end_year)
+
+    def handle(self, *args, **options):
+        start_year, end_year = options['start_year'], options['end_year']
+        if start_year > end_year:
+            raise CommandError("--start-year must not be after --end-year.")
+
+        count = fill_calendar(JalaliCalendarDay, start_year, end_year)
+        self.stdout.write(self.style.SUCCESS(
+            f"Calendar covers {start_year}-{end_year} ({count} days checked)."
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backup import BackupError
+from dashboard.logical_backup import import_tables, read_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a directory written by export_data with batched bulk inserts. "
+        "This REPLACES the exported tables in the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help="Directory containing manifest.json.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Do not ask for confirmation.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        try:
+            manifest = read_manifest(options['directory'])
+        except BackupError as e:
+            raise CommandError(str(e))
+
+        if options['interactive']:
+            answer = input(f"This will replace {len(manifest['tables'])} tables with the export from "
+                           f"{manifest['created_at']}.\nType 'yes' to continue: ")
+            if answer != 'yes':
+                raise CommandError("Import cancelled.")
+
+        try:
+            import_tables(options['directory'], batch_size=options['batch_size'], log=self.stdout.write)
+        except (BackupError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(manifest['tables'])} tables."))
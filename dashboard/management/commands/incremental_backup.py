@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backup import BackupError
+from dashboard.incremental import create_full_backup, create_incremental_backup, needs_full_backup
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the next backup of the chain: a full mysqldump base when none exists or the last one is older "
+        "than INCREMENTAL_FULL_EVERY_DAYS, otherwise a small file with only the rows changed or deleted since "
+        "the last checkpoint. Meant to be run daily (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help="Directory to write the backup file to.")
+        parser.add_argument('--telegram', action='store_true', help="Send the backup file to the Telegram chat.")
+        parser.add_argument('--full', action='store_true', help="Force a new full base backup.")
+
+    def handle(self, *args, **options):
+        if not options['output_dir'] and not options['telegram']:
+            raise CommandError("Give --output-dir and/or --telegram.")
+
+        try:
+            if options['full'] or needs_full_backup():
+                checkpoint = create_full_backup(options['output_dir'], options['telegram'])
+            else:
+                checkpoint = create_incremental_backup(options['output_dir'], options['telegram'])
+        except BackupError as e:
+            raise CommandError(str(e))
+
+        if checkpoint is None:
+            self.stdout.write("No changes since the last checkpoint; nothing to back up.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {checkpoint.get_kind_display().lower()} backup {checkpoint.filename} "
+            f"({checkpoint.size} bytes, up to change {checkpoint.change_id})."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backup import BackupError, join_parts
+
+
+class Command(BaseCommand):
+    help = (
+        "Join a backup that was sent to Telegram in parts (name.001, name.002, ...) back into one file "
+        "and check that the gzip stream is complete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('parts', nargs='+', help="All part files, in any order.")
+        parser.add_argument('-o', '--output', help="Output file (default: the name without the part number).")
+
+    def handle(self, *args, **options):
+        try:
+            output, size = join_parts(options['parts'], options['output'])
+        except (BackupError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Joined {len(options['parts'])} part(s) into {output} ({size} bytes)."))
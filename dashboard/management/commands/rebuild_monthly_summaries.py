@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.ledger import rebuild_all_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user monthly summary rollup table from the raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', metavar='USERNAME',
+                            help="Only rebuild summaries of this user (can be repeated).")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        count = rebuild_all_summaries(users)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} monthly summary row(s)."))
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search token index from customers, expenses and incomes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', metavar='USERNAME',
+                            help="Only rebuild the index of this user (can be repeated).")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        count = rebuild_search_index(users)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} search token(s)."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backup import BackupError
+from dashboard.incremental import check_chain, replay_backups
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore a full base backup and replay its incremental backups on top of it, in order. "
+        "This REPLACES the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help="Full base backup (.sql.gz) created by incremental_backup.")
+        parser.add_argument('incrementals', nargs='*', help="Incremental backups (.jsonl.gz), oldest first.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Do not ask for confirmation.")
+
+    def handle(self, *args, **options):
+        try:
+            headers = check_chain(options['base'], options['incrementals'])
+        except (BackupError, OSError) as e:
+            raise CommandError(str(e))
+
+        if options['interactive']:
+            last = headers[-1]['to_change'] if headers else 'base'
+            answer = input(f"This will replace the current database with the backup chain (up to change {last}).\n"
+                           "Type 'yes' to continue: ")
+            if answer != 'yes':
+                raise CommandError("Replay cancelled.")
+
+        try:
+            replay_backups(options['base'], options['incrementals'], log=self.stdout.write)
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored the base and {len(options['incrementals'])} incremental backup(s). "
+            f"Run incremental_backup --full to start a new chain."
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from dashboard.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (Telegram backups, restores) one at a time. "
+        "Keeps polling the queue unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Run the jobs that are currently queued, then exit.")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+
+    def handle(self, *args, **options):
+        if options['sleep'] <= 0:
+            raise CommandError("--sleep must be positive.")
+
+        processed = 0
+        try:
+            while True:
+                # worker طولانی‌مدت است؛ اتصال‌های قطع‌شده/قدیمی دیتابیس بین کارها بسته می‌شوند
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                run_job(job)
+                processed += 1
+                style = self.style.SUCCESS if job.status == 'success' else self.style.ERROR
+                self.stdout.write(style(f"Job #{job.pk} ({job.kind}) {job.status}: {job.message}"))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"Processed {processed} job(s).")
@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.benchmark_data import BenchmarkDataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Create deterministic synthetic users with banks, customers (with referral chains), subscriptions, "
+        "expenses and incomes for load testing and benchmarks. Counts are per user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--banks', type=int, default=3)
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--subscriptions', type=int, default=2000)
+        parser.add_argument('--expenses', type=int, default=1000)
+        parser.add_argument('--incomes', type=int, default=300)
+        parser.add_argument('--months', type=int, default=24,
+                            help="Number of Shamsi months (ending at --end-year/--end-month) the data is spread over.")
+        parser.add_argument('--end-year', type=int, help="Last Shamsi year of the data (default: current year).")
+        parser.add_argument('--end-month', type=int, help="Last Shamsi month of the data (default: current month).")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='bench', help="Username prefix of the generated users.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['months'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--users, --months and --batch-size must be positive.")
+        if options['end_month'] is not None and not 1 <= options['end_month'] <= 12:
+            raise CommandError("--end-month must be between 1 and 12.")
+
+        dataset = BenchmarkDataset(
+            users=options['users'], banks=options['banks'], customers=options['customers'],
+            subscriptions=options['subscriptions'], expenses=options['expenses'], incomes=options['incomes'],
+            months=options['months'], end_year=options['end_year'], end_month=options['end_month'],
+            seed=options['seed'], prefix=options['prefix'], batch_size=options['batch_size'],
+        )
+        existing = User.objects.filter(username__in=dataset.usernames())
+        if existing.exists():
+            raise CommandError(
+                f"{existing.count()} user(s) with prefix '{dataset.prefix}' already exist; use another --prefix."
+            )
+
+        started = time.monotonic()
+        verbose = options['verbosity'] > 1
+        users = dataset.build(log=self.stdout.write if verbose else None)
+
+        rows = len(users) * (dataset.banks + dataset.customers + dataset.subscriptions
+                             + dataset.expenses + dataset.incomes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} user(s) and about {rows} row(s) in {time.monotonic() - started:.1f}s "
+            f"(password: benchmark)."
+        ))
@@ -0,0 +1,31 @@
+import os
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.backup import BackupError, upload_file_to_telegram
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload a backup file to Telegram in numbered parts (name.001, name.002, ...) when it is larger "
+        "than TELEGRAM_PART_SIZE. Progress is kept in <file>.telegram.json, so running the command again "
+        "after a failure resumes from the first part that was not sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Backup file to upload.")
+        parser.add_argument('--caption', help="Message caption (default: file name and date).")
+        parser.add_argument('--part-size-mb', type=int, help="Override TELEGRAM_PART_SIZE.")
+
+    def handle(self, *args, **options):
+        if options['part_size_mb'] is not None and options['part_size_mb'] < 1:
+            raise CommandError("--part-size-mb must be positive.")
+        path = options['path']
+        caption = options['caption'] or f"🗄 {os.path.basename(path)}\n📅 {datetime.now():%Y-%m-%d %H:%M}"
+        part_size = options['part_size_mb'] and options['part_size_mb'] * 1024 * 1024
+        try:
+            results = upload_file_to_telegram(path, caption, part_size=part_size, state_path=f'{path}.telegram.json')
+        except (BackupError, OSError) as e:
+            raise CommandError(f"{e}\nRun the command again to resume.")
+        self.stdout.write(self.style.SUCCESS(f"Uploaded {path} in {len(results)} part(s)."))
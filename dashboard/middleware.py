@@ -1,4 +1,15 @@
+import json
+import logging
 import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('dashboard.performance')
 
 class MobileRedirectMiddleware:
     def __init__(self, get_response):
@@ -29,4 +40,132 @@ class MobileDetectionMiddleware:
         # ست کردن متغیر is_mobile روی آبجکت request
         request.is_mobile = any(agent in user_agent for agent in mobile_agents)
 
-        return self.get_response(request)
\ No newline at end of file
+        return self.get_response(request)
+
+
+# ===================================================================
+# زمان‌سنجی درخواست‌ها و بودجه‌ی هر ویو
+# ===================================================================
+
+# آمار درخواست جاری (برای زمان‌سنجی تمپلیت‌ها از داخل Template.render)
+_current_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """آمار یک درخواست: تعداد و زمان کوئری‌ها، زمان تمپلیت، ویو و کل (میلی‌ثانیه)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: همه‌ی کوئری‌ها (حتی با DEBUG=False) از اینجا رد می‌شوند
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _timed_template_render(render):
+    def wrapper(self, context):
+        timing = _current_timing.get()
+        if timing is None:
+            return render(self, context)
+        # include و extends هم Template.render را صدا می‌زنند؛ فقط بیرونی‌ترین حساب می‌شود
+        timing.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_ms += (time.perf_counter() - started) * 1000
+
+    wrapper.timed = True
+    return wrapper
+
+
+def _install_template_timing():
+    """Template.render را (فقط یک بار) برای زمان‌سنجی می‌پیچد؛ بیرون از درخواست‌ها اثری ندارد."""
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_template_render(Template.render)
+
+
+class RequestBudgetMiddleware:
+    """
+    تعداد کوئری‌ها، زمان دیتابیس، زمان رندر تمپلیت و زمان ویو هر درخواست را
+    اندازه می‌گیرد، در هدر Server-Timing و لاگ ساخت‌یافته (logger
+    ``dashboard.performance``، سطح DEBUG) می‌نویسد و اگر از بودجه‌ی ویو
+    (REQUEST_BUDGETS) بیشتر شود هشدار (WARNING) می‌دهد.
+
+    بهتر است اولین middleware باشد تا هزینه‌ی سشن و احراز هویت هم حساب شود.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header_enabled = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+        self.default_budget = budgets.get('default', {})
+        self.budgets = budgets
+        # فقط وقتی این middleware نصب شده باشد
+        _install_template_timing()
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+
+        total_ms = (time.perf_counter() - timing.started) * 1000
+        view_ms = (time.perf_counter() - timing.view_started) * 1000 if timing.view_started else 0.0
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+
+        metrics = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': timing.queries,
+            'db_ms': round(timing.db_ms, 2),
+            'template_ms': round(timing.template_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+
+        if self.header_enabled:
+            response['Server-Timing'] = ', '.join((
+                f'db;desc="SQL ({timing.queries} queries)";dur={metrics["db_ms"]}',
+                f'tpl;desc="Templates";dur={metrics["template_ms"]}',
+                f'view;desc="View";dur={metrics["view_ms"]}',
+                f'total;desc="Total";dur={metrics["total_ms"]}',
+            ))
+
+        exceeded = self.exceeded_limits(view_name, metrics)
+        if exceeded:
+            metrics['over_budget'] = exceeded
+            logger.warning('request over budget %s', json.dumps(metrics), extra={'timing': metrics})
+        else:
+            logger.debug('request timing %s', json.dumps(metrics), extra={'timing': metrics})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = _current_timing.get()
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    def exceeded_limits(self, view_name, metrics):
+        """نام شاخص‌هایی که از بودجه‌ی ویو (یا بودجه‌ی پیش‌فرض) بیشتر شده‌اند."""
+        budget = {**self.default_budget, **self.budgets.get(view_name, {})}
+        return sorted(key for key, limit in budget.items() if key in metrics and metrics[key] > limit)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+from dashboard.jalali import calendar_years, fill_calendar
+
+
+# پر کردن اولیه‌ی جدول تقویم برای بازه‌ی JALALI_CALENDAR_YEARS
+def fill_jalali_calendar(apps, schema_editor):
+    JalaliCalendarDay = apps.get_model('dashboard', 'JalaliCalendarDay')
+    start_year, end_year = calendar_years()
+    fill_calendar(JalaliCalendarDay, start_year, end_year)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_expense_source_bank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JalaliCalendarDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False, verbose_name='Date (Gregorian)')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year (Shamsi)')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month (Shamsi)')),
+                ('day', models.PositiveSmallIntegerField(verbose_name='Day (Shamsi)')),
+                ('weekday', models.PositiveSmallIntegerField(verbose_name='Weekday')),
+                ('season', models.PositiveSmallIntegerField(choices=[(1, 'Spring'), (2, 'Summer'), (3, 'Autumn'), (4, 'Winter')], verbose_name='Season')),
+            ],
+            options={
+                'verbose_name': 'Calendar Day',
+                'verbose_name_plural': 'Calendar Days',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['year', 'month'], name='jcal_year_month_idx')],
+            },
+        ),
+        migrations.RunPython(fill_jalali_calendar, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:11
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+# محاسبه‌ی اولیه‌ی موجودی‌ها از روی کل تاریخچه‌ی تراکنش‌ها
+def fill_balances(apps, schema_editor):
+    BankAccount = apps.get_model('dashboard', 'BankAccount')
+    Profile = apps.get_model('dashboard', 'Profile')
+    Expense = apps.get_model('dashboard', 'Expense')
+    OtherIncome = apps.get_model('dashboard', 'OtherIncome')
+    Subscription = apps.get_model('dashboard', 'Subscription')
+
+    balances = {}  # (creator_id, bank_id) -> balance
+    sources = (
+        (Subscription.objects.filter(status='success'), 'destination_bank', 1),
+        (OtherIncome.objects.all(), 'destination_bank', 1),
+        (Expense.objects.all(), 'source_bank', -1),
+    )
+    for queryset, bank_field, sign in sources:
+        for row in queryset.order_by().values('creator', bank_field).annotate(total=Sum('price')):
+            key = (row['creator'], row[bank_field])
+            balances[key] = balances.get(key, 0) + sign * (row['total'] or 0)
+
+    for (creator_id, bank_id), balance in balances.items():
+        if bank_id:
+            BankAccount.objects.filter(pk=bank_id).update(balance=balance)
+        elif not Profile.objects.filter(user_id=creator_id).update(unassigned_balance=balance):
+            Profile.objects.create(user_id=creator_id, unassigned_balance=balance)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_jalalicalendarday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='balance',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Balance'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='unassigned_balance',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_balances, reverse_code=migrations.RunPython.noop),
+    ]
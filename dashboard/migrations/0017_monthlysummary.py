@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+import jdatetime
+
+
+# ساخت اولیه‌ی خلاصه‌های ماهانه از روی تراکنش‌های موجود
+def fill_monthly_summaries(apps, schema_editor):
+    MonthlySummary = apps.get_model('dashboard', 'MonthlySummary')
+    Expense = apps.get_model('dashboard', 'Expense')
+    OtherIncome = apps.get_model('dashboard', 'OtherIncome')
+    Subscription = apps.get_model('dashboard', 'Subscription')
+
+    summaries = defaultdict(lambda: defaultdict(int))  # (creator_id, year, month) -> {field: amount}
+
+    def add_by_date(queryset, date_field, **aggregates):
+        rows = queryset.filter(**{f'{date_field}__isnull': False}).order_by().values(
+            'creator', date_field).annotate(**aggregates)
+        for row in rows:
+            jalali = jdatetime.date.fromgregorian(date=row[date_field])
+            for field in aggregates:
+                summaries[row['creator'], jalali.year, jalali.month][field] += row[field] or 0
+
+    add_by_date(Subscription.objects.filter(status='success'), 'payment_date', subscription_income=Sum('price'))
+    add_by_date(OtherIncome.objects.all(), 'deposit_date', other_income=Sum('price'))
+    add_by_date(Expense.objects.all(), 'spending_date', expenses=Sum('price'),
+                server_costs=Sum('price', filter=Q(is_server_cost=True)))
+
+    rows = Subscription.objects.order_by().values('creator', 'year', 'month').annotate(
+        giga_sold=Sum('giga'),
+        paid_subscriptions=Sum('price', filter=Q(status='success')),
+        unpaid_subscriptions=Sum('price', filter=Q(status='pending')),
+    )
+    for row in rows:
+        for field in ('giga_sold', 'paid_subscriptions', 'unpaid_subscriptions'):
+            summaries[row['creator'], row['year'], row['month']][field] += row[field] or 0
+
+    MonthlySummary.objects.bulk_create([
+        MonthlySummary(creator_id=creator_id, year=year, month=month, **amounts)
+        for (creator_id, year, month), amounts in summaries.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_bank_balance_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year (Shamsi)')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month (Shamsi)')),
+                ('subscription_income', models.BigIntegerField(default=0, verbose_name='Subscription Income')),
+                ('other_income', models.BigIntegerField(default=0, verbose_name='Other Income')),
+                ('expenses', models.BigIntegerField(default=0, verbose_name='Expenses')),
+                ('server_costs', models.BigIntegerField(default=0, verbose_name='Server Costs')),
+                ('giga_sold', models.BigIntegerField(default=0, verbose_name='Giga Sold')),
+                ('paid_subscriptions', models.BigIntegerField(default=0, verbose_name='Paid Subscriptions')),
+                ('unpaid_subscriptions', models.BigIntegerField(default=0, verbose_name='Unpaid Subscriptions')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Creator Admin')),
+            ],
+            options={
+                'verbose_name': 'Monthly Summary',
+                'verbose_name_plural': 'Monthly Summaries',
+                'ordering': ['year', 'month'],
+                'unique_together': {('creator', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_monthly_summaries, reverse_code=migrations.RunPython.noop),
+    ]
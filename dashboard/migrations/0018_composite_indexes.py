@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_monthlysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customerprofile',
+            index=models.Index(fields=['creator', 'created_at'], name='customer_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['creator', 'spending_date'], name='expense_creator_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['creator', 'created_at'], name='expense_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherincome',
+            index=models.Index(fields=['creator', 'deposit_date'], name='income_creator_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherincome',
+            index=models.Index(fields=['creator', 'created_at'], name='income_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['creator', 'year', 'month', 'status'], name='sub_creator_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['creator', 'status', 'payment_date'], name='sub_creator_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['creator', 'status', 'created_at'], name='sub_creator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0021_backgroundjob_statements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, verbose_name='Model')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Object ID')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Deleted')),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Change Log Entry',
+                'verbose_name_plural': 'Change Log',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BackupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=15, verbose_name='Kind')),
+                ('change_id', models.PositiveBigIntegerField(default=0, verbose_name='Last Change')),
+                ('filename', models.CharField(max_length=100, verbose_name='File Name')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Size')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('base', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='incrementals', to='dashboard.backupcheckpoint', verbose_name='Full Backup')),
+            ],
+            options={
+                'verbose_name': 'Backup Checkpoint',
+                'verbose_name_plural': 'Backup Checkpoints',
+                'ordering': ['id'],
+            },
+        ),
+    ]
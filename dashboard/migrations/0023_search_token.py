@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:09
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# ساخت اولیه‌ی ایندکس جستجو از روی داده‌های موجود (همان قواعد dashboard/search.py در این نسخه)
+def fill_search_index(apps, schema_editor):
+    SearchToken = apps.get_model('dashboard', 'SearchToken')
+    sources = (
+        ('customer', apps.get_model('dashboard', 'CustomerProfile'), (('name', 3), ('phone_number', 2))),
+        ('expense', apps.get_model('dashboard', 'Expense'), (('issue', 3), ('description', 1))),
+        ('income', apps.get_model('dashboard', 'OtherIncome'), (('name', 3), ('description', 1))),
+    )
+    rows = []
+    for kind, model, fields in sources:
+        for instance in model.objects.order_by().iterator(chunk_size=2000):
+            weights = {}
+            for field, weight in fields:
+                for token in re.findall(r'\w+', (getattr(instance, field) or '').lower()):
+                    weights[token[:40]] = max(weights.get(token[:40], 0), weight)
+            rows += [SearchToken(creator_id=instance.creator_id, token=token, model=kind, object_id=instance.pk,
+                                 weight=weight) for token, weight in weights.items()]
+            if len(rows) >= 2000:
+                SearchToken.objects.bulk_create(rows)
+                rows = []
+    SearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0022_change_log_backup_checkpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=40, verbose_name='Token')),
+                ('model', models.CharField(max_length=20, verbose_name='Model')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Object ID')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Weight')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Creator Admin')),
+            ],
+            options={
+                'verbose_name': 'Search Token',
+                'verbose_name_plural': 'Search Tokens',
+                'indexes': [models.Index(fields=['creator', 'token'], name='search_creator_token_idx'), models.Index(fields=['model', 'object_id'], name='search_object_idx')],
+            },
+        ),
+        migrations.RunPython(fill_search_index, reverse_code=migrations.RunPython.noop),
+    ]
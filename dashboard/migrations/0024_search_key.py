@@ -0,0 +1,102 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:13
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# همان قواعد dashboard/persian.py در این نسخه
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+CHARACTERS = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', '\u200c': None, '\u200d': None, 'ـ': None,
+    **{chr(code): None for code in range(0x064B, 0x0653)},
+})
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', (text or '').translate(DIGITS).translate(CHARACTERS)).strip().lower()
+
+
+# پر کردن search_key ردیف‌های موجود و ساخت دوباره‌ی ایندکس جستجو با متن یکسان‌شده
+def fill_search_keys(apps, schema_editor):
+    for model_name, source in (('CustomerProfile', 'name'), ('Expense', 'issue'), ('OtherIncome', 'name'),
+                               ('BankAccount', 'bank_name')):
+        model = apps.get_model('dashboard', model_name)
+        max_length = model._meta.get_field('search_key').max_length
+        rows = []
+        for instance in model.objects.only(source).order_by().iterator(chunk_size=2000):
+            instance.search_key = normalize(getattr(instance, source))[:max_length]
+            rows.append(instance)
+            if len(rows) >= 2000:
+                model.objects.bulk_update(rows, ['search_key'])
+                rows = []
+        model.objects.bulk_update(rows, ['search_key'])
+
+    SearchToken = apps.get_model('dashboard', 'SearchToken')
+    SearchToken.objects.all().delete()
+    sources = (
+        ('customer', apps.get_model('dashboard', 'CustomerProfile'), (('name', 3), ('phone_number', 2))),
+        ('expense', apps.get_model('dashboard', 'Expense'), (('issue', 3), ('description', 1))),
+        ('income', apps.get_model('dashboard', 'OtherIncome'), (('name', 3), ('description', 1))),
+    )
+    rows = []
+    for kind, model, fields in sources:
+        for instance in model.objects.order_by().iterator(chunk_size=2000):
+            weights = {}
+            for field, weight in fields:
+                for token in re.findall(r'\w+', normalize(getattr(instance, field))):
+                    weights[token[:40]] = max(weights.get(token[:40], 0), weight)
+            rows += [SearchToken(creator_id=instance.creator_id, token=token, model=kind, object_id=instance.pk,
+                                 weight=weight) for token, weight in weights.items()]
+            if len(rows) >= 2000:
+                SearchToken.objects.bulk_create(rows)
+                rows = []
+    SearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0023_search_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='search_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='customerprofile',
+            name='search_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='search_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='otherincome',
+            name='search_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='bankaccount',
+            index=models.Index(fields=['creator', 'search_key'], name='bank_creator_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerprofile',
+            index=models.Index(fields=['creator', 'search_key'], name='customer_creator_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['creator', 'search_key'], name='expense_creator_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherincome',
+            index=models.Index(fields=['creator', 'search_key'], name='income_creator_key_idx'),
+        ),
+        migrations.RunPython(fill_search_keys, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,38 +1,108 @@
 # Accounting/dashboard/models.py
 
-from django.db import models
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import jdatetime
 
+from dashboard.persian import normalize_search_key
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(default='avatars/default.svg', upload_to='avatars/')
     theme = models.CharField(max_length=10, default='dark')
+    # موجودی پول‌هایی که به هیچ حساب بانکی نسبت داده نشده‌اند (دفتر موجودی)
+    unassigned_balance = models.BigIntegerField(default=0, editable=False)
+    # با هر تغییر داده‌های مالی کاربر بالا می‌رود (کلید کش گزارش‌ها؛ dashboard/report_cache.py)؛
+    # مثل unassigned_balance فقط با update و F() نوشته می‌شود، نه با ذخیره‌ی کامل پروفایل
+    data_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'{self.user.username} Profile'
 
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # در replay بک‌آپ افزایشی و loaddata، پروفایل خودش از فایل می‌آید
+    if created and not raw:
         Profile.objects.create(user=instance)
 
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
+    # شمارنده‌های پروفایل (موجودی و نسخه) فقط با F() تغییر می‌کنند؛ ذخیره‌ی کامل
+    # نمونه‌ی قدیمی (مثلاً با هر لاگین) تغییرات هم‌زمان را از بین می‌برد
     if hasattr(instance, 'profile'):
-        instance.profile.save()
+        instance.profile.save(update_fields=['avatar', 'theme'])
+
+
+def jalali_year_month(gregorian_date):
+    """(سال، ماه) شمسی یک تاریخ میلادی."""
+    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
+    return jalali.year, jalali.month
+
+
+class FinancialRecordMixin:
+    """
+    مدل‌هایی که روی جداول مشتق‌شده (موجودی بانک‌ها و خلاصه‌ی ماهانه) اثر دارند.
+
+    مقادیر ``tracked_fields`` هنگام بارگذاری ردیف نگه داشته می‌شوند تا
+    سیگنال‌های dashboard/signals.py اثر قبلی و جدید ردیف را مقایسه کنند.
+    ذخیره‌ی ردیف و به‌روزرسانی جداول مشتق‌شده در یک تراکنش انجام می‌شود.
+    """
+    tracked_fields = ()
+
+    def tracked_values(self):
+        return {field: getattr(self, field) for field in self.tracked_fields}
+
+    @classmethod
+    def ledger_entry(cls, values):
+        """(شناسه بانک، مبلغ علامت‌دار) اثر ردیف روی موجودی."""
+        raise NotImplementedError
+
+    @classmethod
+    def summary_entries(cls, values):
+        """لیست ((سال، ماه)، {فیلد خلاصه: مبلغ}) اثر ردیف روی خلاصه‌ی ماهانه."""
+        raise NotImplementedError
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
-class Expense(models.Model):
+class SearchKeyMixin:
+    """
+    مدل‌هایی که شکل یکسان‌شده‌ی یک فیلد متنی را در ``search_key`` نگه می‌دارند
+    (dashboard/persian.py) تا جستجوی پیشوندی از ایندکس (creator, search_key)
+    استفاده کند. مسیرهای bulk که save را صدا نمی‌زنند باید
+    dashboard.search.rebuild_search_keys را اجرا کنند.
+    """
+    search_key_source = None
+
+    def fill_search_key(self):
+        max_length = self._meta.get_field('search_key').max_length
+        self.search_key = normalize_search_key(getattr(self, self.search_key_source))[:max_length]
+
+    def save(self, *args, **kwargs):
+        self.fill_search_key()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.search_key_source in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+
+
+class Expense(SearchKeyMixin, FinancialRecordMixin, models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
     spending_date = models.DateField(verbose_name=_("Spending Date (Shamsi)"), null=True, blank=True)
     issue = models.CharField(max_length=200, verbose_name=_("Issue"), blank=True)
+    search_key = models.CharField(max_length=200, blank=True, default='', editable=False)
     description = models.TextField(verbose_name=_("Description"), blank=True)
     price = models.PositiveIntegerField(default=0, verbose_name=_("Price"))
     is_server_cost = models.BooleanField(default=False, verbose_name=_("Is it a server cost?"))
@@ -47,9 +117,25 @@ class Expense(models.Model):
         related_name='expenses'
     )
 
+    tracked_fields = ('source_bank_id', 'price', 'spending_date', 'is_server_cost')
+    search_key_source = 'issue'
+
     def __str__(self):
         return self.issue or _("Expense without issue")
 
+    @classmethod
+    def ledger_entry(cls, values):
+        return values['source_bank_id'], -values['price']
+
+    @classmethod
+    def summary_entries(cls, values):
+        if not values['spending_date']:
+            return []
+        amounts = {'expenses': values['price']}
+        if values['is_server_cost']:
+            amounts['server_costs'] = values['price']
+        return [(jalali_year_month(values['spending_date']), amounts)]
+
     @property
     def jalali_spending_date(self):
         if self.spending_date:
@@ -60,12 +146,19 @@ class Expense(models.Model):
         verbose_name = _("Expense")
         verbose_name_plural = _("Expenses")
         ordering = ['-spending_date']
+        # ایندکس‌ها بر اساس الگوی فیلتر ویوها: کاربر + بازه‌ی تاریخ و فید فعالیت‌ها
+        indexes = [
+            models.Index(fields=['creator', 'spending_date'], name='expense_creator_date_idx'),
+            models.Index(fields=['creator', 'created_at'], name='expense_creator_created_idx'),
+            models.Index(fields=['creator', 'search_key'], name='expense_creator_key_idx'),
+        ]
 
 
-class OtherIncome(models.Model):
+class OtherIncome(SearchKeyMixin, FinancialRecordMixin, models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
     deposit_date = models.DateField(verbose_name=_("Deposit Date (Shamsi)"), null=True, blank=True)
     name = models.CharField(max_length=100, verbose_name=_("Depositor Name"), blank=True)
+    search_key = models.CharField(max_length=100, blank=True, default='', editable=False)
     description = models.TextField(verbose_name=_("Description"), blank=True)
     price = models.PositiveIntegerField(default=0, verbose_name=_("Price"))
     created_at = models.DateTimeField(auto_now_add=True)
@@ -78,9 +171,22 @@ class OtherIncome(models.Model):
         related_name='other_incomes'
     )
 
+    tracked_fields = ('destination_bank_id', 'price', 'deposit_date')
+    search_key_source = 'name'
+
     def __str__(self):
         return self.name or _("Income without name")
 
+    @classmethod
+    def ledger_entry(cls, values):
+        return values['destination_bank_id'], values['price']
+
+    @classmethod
+    def summary_entries(cls, values):
+        if not values['deposit_date']:
+            return []
+        return [(jalali_year_month(values['deposit_date']), {'other_income': values['price']})]
+
     @property
     def jalali_deposit_date(self):
         if self.deposit_date:
@@ -91,11 +197,17 @@ class OtherIncome(models.Model):
         verbose_name = _("Other Income")
         verbose_name_plural = _("Other Incomes")
         ordering = ['-deposit_date']
+        indexes = [
+            models.Index(fields=['creator', 'deposit_date'], name='income_creator_date_idx'),
+            models.Index(fields=['creator', 'created_at'], name='income_creator_created_idx'),
+            models.Index(fields=['creator', 'search_key'], name='income_creator_key_idx'),
+        ]
 
 
-class CustomerProfile(models.Model):
+class CustomerProfile(SearchKeyMixin, models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
     name = models.CharField(max_length=100, verbose_name=_("Full Name"))
+    search_key = models.CharField(max_length=100, blank=True, default='', editable=False)
     phone_number = models.CharField(max_length=20, blank=True, null=True, verbose_name=_("Phone Number"))
 
     referred_by = models.ForeignKey(
@@ -108,30 +220,42 @@ class CustomerProfile(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    search_key_source = 'name'
+
     class Meta:
         verbose_name = _("Customer Profile")
         verbose_name_plural = _("Customer Profiles")
         unique_together = ('creator', 'name')
+        indexes = [
+            models.Index(fields=['creator', 'created_at'], name='customer_creator_created_idx'),
+            models.Index(fields=['creator', 'search_key'], name='customer_creator_key_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class BankAccount(models.Model):
+class BankAccount(SearchKeyMixin, models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
     bank_name = models.CharField(max_length=50, verbose_name=_("Bank Name"))
+    search_key = models.CharField(max_length=50, blank=True, default='', editable=False)
     account_number = models.CharField(max_length=50, blank=True, null=True, verbose_name=_("Account Number"))
+    # موجودی کل دوران که هنگام ثبت/ویرایش/حذف تراکنش‌ها به‌روز می‌شود
+    balance = models.BigIntegerField(default=0, editable=False, verbose_name=_("Balance"))
+
+    search_key_source = 'bank_name'
 
     class Meta:
         verbose_name = _("Bank Account")
         verbose_name_plural = _("Bank Accounts")
         unique_together = ('creator', 'bank_name')
+        indexes = [models.Index(fields=['creator', 'search_key'], name='bank_creator_key_idx')]
 
     def __str__(self):
         return self.bank_name
 
 
-class Subscription(models.Model):
+class Subscription(FinancialRecordMixin, models.Model):
     STATUS_CHOICES = [('success', _('Paid')), ('pending', _('Unpaid'))]
 
     customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='subscriptions',
@@ -162,12 +286,235 @@ class Subscription(models.Model):
         verbose_name_plural = _("Subscriptions")
         # unique_together = ('customer', 'year', 'month') # This line is removed to allow multiple subscriptions
         ordering = ['-year', '-month']
+        indexes = [
+            # داشبورد اشتراک‌ها و آمار ماهانه: کاربر + سال/ماه (+ وضعیت)
+            models.Index(fields=['creator', 'year', 'month', 'status'], name='sub_creator_period_idx'),
+            # درآمد اشتراک‌ها: کاربر + پرداخت‌شده + بازه‌ی تاریخ پرداخت
+            models.Index(fields=['creator', 'status', 'payment_date'], name='sub_creator_paid_idx'),
+            models.Index(fields=['creator', 'status', 'created_at'], name='sub_creator_created_idx'),
+        ]
+
+    tracked_fields = ('destination_bank_id', 'price', 'status', 'giga', 'year', 'month', 'payment_date')
 
     def __str__(self):
         return f"{self.customer.name} - {self.year}/{self.month}"
 
+    @classmethod
+    def ledger_entry(cls, values):
+        # فقط اشتراک‌های پرداخت‌شده وارد حساب می‌شوند
+        return values['destination_bank_id'], values['price'] if values['status'] == 'success' else 0
+
+    @classmethod
+    def summary_entries(cls, values):
+        # آمار فروش بر اساس ماه اشتراک و درآمد نقدی بر اساس تاریخ پرداخت
+        paid = values['status'] == 'success'
+        entries = [((values['year'], values['month']), {
+            'giga_sold': values['giga'],
+            'paid_subscriptions' if paid else 'unpaid_subscriptions': values['price'],
+        })]
+        if paid and values['payment_date']:
+            entries.append((jalali_year_month(values['payment_date']), {'subscription_income': values['price']}))
+        return entries
+
     @property
     def jalali_payment_date(self):
         if self.payment_date:
             return jdatetime.date.fromgregorian(date=self.payment_date).strftime('%Y/%m/%d')
-        return _("Not Set")
\ No newline at end of file
+        return _("Not Set")
+
+class JalaliCalendarDay(models.Model):
+    """
+    جدول بُعد تقویم: نگاشت هر تاریخ میلادی به سال/ماه/روز شمسی.
+    گزارش‌ها به کمک این جدول داده‌ها را در خود دیتابیس بر اساس ماه شمسی گروه‌بندی می‌کنند.
+    """
+    SEASON_CHOICES = [(1, _('Spring')), (2, _('Summer')), (3, _('Autumn')), (4, _('Winter'))]
+
+    date = models.DateField(primary_key=True, verbose_name=_("Date (Gregorian)"))
+    year = models.PositiveSmallIntegerField(verbose_name=_("Year (Shamsi)"))
+    month = models.PositiveSmallIntegerField(verbose_name=_("Month (Shamsi)"))
+    day = models.PositiveSmallIntegerField(verbose_name=_("Day (Shamsi)"))
+    weekday = models.PositiveSmallIntegerField(verbose_name=_("Weekday"))  # 0 = شنبه
+    season = models.PositiveSmallIntegerField(choices=SEASON_CHOICES, verbose_name=_("Season"))
+
+    class Meta:
+        verbose_name = _("Calendar Day")
+        verbose_name_plural = _("Calendar Days")
+        ordering = ['date']
+        indexes = [models.Index(fields=['year', 'month'], name='jcal_year_month_idx')]
+
+    def __str__(self):
+        return f"{self.year}/{self.month:02d}/{self.day:02d}"
+
+
+
+class MonthlySummary(models.Model):
+    """
+    خلاصه‌ی مالی هر کاربر در هر ماه شمسی که هنگام ثبت/ویرایش/حذف تراکنش‌ها
+    به‌روز می‌شود. درآمد و هزینه بر اساس ماه تاریخ پرداخت/خرج و آمار
+    اشتراک‌ها (حجم، پرداخت‌شده/نشده) بر اساس سال و ماه خود اشتراک است.
+    """
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
+    year = models.PositiveSmallIntegerField(verbose_name=_("Year (Shamsi)"))
+    month = models.PositiveSmallIntegerField(verbose_name=_("Month (Shamsi)"))
+    subscription_income = models.BigIntegerField(default=0, verbose_name=_("Subscription Income"))
+    other_income = models.BigIntegerField(default=0, verbose_name=_("Other Income"))
+    expenses = models.BigIntegerField(default=0, verbose_name=_("Expenses"))
+    server_costs = models.BigIntegerField(default=0, verbose_name=_("Server Costs"))
+    giga_sold = models.BigIntegerField(default=0, verbose_name=_("Giga Sold"))
+    paid_subscriptions = models.BigIntegerField(default=0, verbose_name=_("Paid Subscriptions"))
+    unpaid_subscriptions = models.BigIntegerField(default=0, verbose_name=_("Unpaid Subscriptions"))
+
+    AMOUNT_FIELDS = (
+        'subscription_income', 'other_income', 'expenses', 'server_costs',
+        'giga_sold', 'paid_subscriptions', 'unpaid_subscriptions',
+    )
+
+    class Meta:
+        verbose_name = _("Monthly Summary")
+        verbose_name_plural = _("Monthly Summaries")
+        unique_together = ('creator', 'year', 'month')
+        ordering = ['year', 'month']
+
+    def __str__(self):
+        return f"{self.creator} - {self.year}/{self.month}"
+
+    @property
+    def total_income(self):
+        return self.subscription_income + self.other_income
+
+    @property
+    def net_profit(self):
+        return self.total_income - self.expenses
+
+
+
+class JobFileStorage(FileSystemStorage):
+    """
+    فایل‌های کارها (مثلاً دامپ آپلودشده برای ریستور) خارج از MEDIA نگهداری
+    می‌شوند تا nginx آن‌ها را سرو نکند. محل ذخیره هر بار از JOB_FILES_ROOT
+    خوانده می‌شود (override_settings در تست‌ها هم اثر دارد).
+    """
+
+    @property
+    def base_location(self):
+        return settings.JOB_FILES_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def job_file_storage():
+    return JobFileStorage()
+
+
+class BackgroundJob(models.Model):
+    """
+    صف کارهای طولانی (ارسال بک‌آپ به تلگرام، ریستور) که به جای پروسه‌ی وب
+    توسط ``python manage.py run_jobs`` اجرا می‌شوند (dashboard/jobs.py).
+    """
+    KIND_CHOICES = [('telegram_backup', _('Telegram Backup')), ('restore', _('Restore Database'))]
+    STATUS_CHOICES = [
+        ('queued', _('Queued')), ('running', _('Running')), ('success', _('Done')), ('failed', _('Failed')),
+    ]
+
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name=_("Kind"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name=_("Status"))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_("Payload"))
+    file = models.FileField(upload_to='jobs/', storage=job_file_storage, blank=True, verbose_name=_("File"))
+    # پیشرفت به بایت؛ total اگر از قبل معلوم نباشد خالی است
+    progress = models.PositiveBigIntegerField(default=0, verbose_name=_("Progress"))
+    total = models.PositiveBigIntegerField(null=True, blank=True, verbose_name=_("Total"))
+    # تعداد دستورهای SQL اجراشده (ریستور)
+    statements = models.PositiveBigIntegerField(default=0, verbose_name=_("Statements"))
+    message = models.TextField(blank=True, verbose_name=_("Message"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # هر بار که worker پیشرفت را ثبت می‌کند به‌روز می‌شود (تشخیص worker متوقف‌شده)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Background Job")
+        verbose_name_plural = _("Background Jobs")
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'id'], name='job_status_idx')]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('success', 'failed')
+
+
+
+class ChangeLog(models.Model):
+    """
+    هر ذخیره/حذف روی مدل‌های اصلی (بانک، مشتری، اشتراک، هزینه، درآمد) یک
+    ردیف اینجا می‌گذارد؛ بک‌آپ افزایشی ردیف‌های بعد از آخرین checkpoint را
+    می‌خواند (dashboard/incremental.py). شناسه‌ی افزایشی خودش نقش ساعت را دارد.
+    """
+    model = models.CharField(max_length=50, verbose_name=_("Model"))
+    object_id = models.PositiveBigIntegerField(verbose_name=_("Object ID"))
+    deleted = models.BooleanField(default=False, verbose_name=_("Deleted"))
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Change Log Entry")
+        verbose_name_plural = _("Change Log")
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} ({'deleted' if self.deleted else 'saved'})"
+
+
+class BackupCheckpoint(models.Model):
+    """
+    یک بک‌آپ کامل (پایه) یا افزایشی موفق؛ ``change_id`` آخرین ردیف ChangeLog
+    است که این بک‌آپ پوشش می‌دهد و بک‌آپ افزایشی بعدی از همان‌جا ادامه می‌دهد.
+    """
+    KIND_CHOICES = [('full', _('Full')), ('incremental', _('Incremental'))]
+
+    kind = models.CharField(max_length=15, choices=KIND_CHOICES, verbose_name=_("Kind"))
+    base = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='incrementals',
+                             verbose_name=_("Full Backup"))
+    change_id = models.PositiveBigIntegerField(default=0, verbose_name=_("Last Change"))
+    filename = models.CharField(max_length=100, verbose_name=_("File Name"))
+    size = models.PositiveBigIntegerField(default=0, verbose_name=_("Size"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Backup Checkpoint")
+        verbose_name_plural = _("Backup Checkpoints")
+        ordering = ['id']
+
+    def __str__(self):
+        return self.filename
+
+
+class SearchToken(models.Model):
+    """
+    ایندکس معکوس جستجوی سراسری: برای هر کلمه‌ی متن‌های قابل جستجو (نام
+    مشتری، عنوان و توضیح هزینه/درآمد) یک ردیف (dashboard/search.py). جستجو با
+    ایندکس (creator, token) انجام می‌شود، نه با LIKE '%q%' روی کل جدول‌ها.
+    """
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("Creator Admin"))
+    token = models.CharField(max_length=40, verbose_name=_("Token"))
+    # نوع سند: customer / expense / income
+    model = models.CharField(max_length=20, verbose_name=_("Model"))
+    object_id = models.PositiveBigIntegerField(verbose_name=_("Object ID"))
+    # وزن فیلدی که کلمه در آن آمده (عنوان بیشتر از توضیح)
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name=_("Weight"))
+
+    class Meta:
+        verbose_name = _("Search Token")
+        verbose_name_plural = _("Search Tokens")
+        indexes = [
+            models.Index(fields=['creator', 'token'], name='search_creator_token_idx'),
+            models.Index(fields=['model', 'object_id'], name='search_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} → {self.model} #{self.object_id}"
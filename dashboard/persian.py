@@ -0,0 +1,37 @@
+# Accounting/dashboard/persian.py
+
+"""
+یکسان‌سازی متن فارسی برای ورودی فرم‌ها و کلیدهای جستجو.
+
+کاربران یک نام را گاهی با ی/ک عربی (ي/ك)، گاهی با یا بدون نیم‌فاصله و
+با اعداد فارسی یا لاتین می‌نویسند. کلید جستجو (search_key در مدل‌ها)
+شکل یکسان‌شده‌ی متن است تا جستجوی پیشوندی روی ایندکس B-tree همه‌ی
+این حالت‌ها را پیدا کند.
+"""
+
+import re
+
+# اعداد فارسی (۰-۹) و عربی (٠-٩) ← لاتین
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+CHARACTERS = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    '\u200c': None,  # نیم‌فاصله (ZWNJ)
+    '\u200d': None,  # ZWJ
+    'ـ': None,  # کشیده
+    **{chr(code): None for code in range(0x064B, 0x0653)},  # اعراب
+})
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def convert_persian_to_english_numbers(text):
+    if not isinstance(text, str):
+        return text
+    return text.translate(DIGITS)
+
+
+def normalize_search_key(text):
+    """شکل یکسان‌شده‌ی ``text`` برای ذخیره در search_key و جستجو روی آن."""
+    text = convert_persian_to_english_numbers(text or '').translate(CHARACTERS)
+    return WHITESPACE_RE.sub(' ', text).strip().lower()
@@ -0,0 +1,81 @@
+# Accounting/dashboard/report_cache.py
+
+"""
+کش نسخه‌دار گزارش‌ها برای هر کاربر.
+
+هر کاربر یک شماره‌ی نسخه‌ی داده (Profile.data_version) دارد که با هر ذخیره یا
+حذف هزینه، درآمد، اشتراک، مشتری و حساب بانکی او یک واحد بالا می‌رود
+(dashboard/signals.py). کلید کش از (کاربر، نام گزارش، پارامترها، نسخه) ساخته
+می‌شود؛ پس با هر تغییر داده کلیدهای قبلی دیگر خوانده نمی‌شوند و نیازی به حذف
+صریح آن‌ها نیست (خودشان با TIMEOUT منقضی می‌شوند).
+
+با هر بک‌اند کش جنگو (locmem، فایل، دیتابیس و ...) کار می‌کند.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.utils import translation
+
+from dashboard.models import Profile
+
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def get_data_version(user):
+    """نسخه‌ی فعلی داده‌های کاربر (برای کاربر بدون پروفایل صفر)."""
+    version = Profile.objects.filter(user=user).values_list('data_version', flat=True).first()
+    return version or 0
+
+
+def bump_data_version(user_id, create_missing=True):
+    """نسخه‌ی داده‌های کاربر را یک واحد بالا می‌برد تا کش‌های قبلی بی‌اعتبار شوند."""
+    if Profile.objects.filter(user_id=user_id).update(data_version=F('data_version') + 1):
+        return
+    # هنگام حذف کاربر، پروفایل هم حذف می‌شود؛ پس در مسیر حذف پروفایل جدید نمی‌سازیم
+    if create_missing:
+        Profile.objects.get_or_create(user_id=user_id, defaults={'data_version': 1})
+
+
+def get_version_floor():
+    """بزرگ‌ترین نسخه‌ی داده در میان همه‌ی کاربران (قبل از ریستور خوانده می‌شود)."""
+    return Profile.objects.aggregate(top=Max('data_version'))['top'] or 0
+
+
+def raise_all_versions(floor):
+    """
+    بعد از ریستور، نسخه‌ها به مقادیر داخل دامپ برمی‌گردند و کلیدهای کش و
+    ETagهای قدیمی دوباره معتبر می‌شوند. همه‌ی نسخه‌ها (و پروفایل‌های
+    ناموجود) روی ``floor + 1`` گذاشته می‌شوند که از هر نسخه‌ی قبلی بزرگ‌تر است.
+    """
+    version = floor + 1
+    Profile.objects.update(data_version=version)
+    missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+    Profile.objects.bulk_create([Profile(user_id=pk, data_version=version) for pk in missing])
+
+
+def report_cache_key(user, name, params, version):
+    # پارامترها ممکن است طولانی باشند یا کاراکترهای نامعتبر برای memcached داشته باشند
+    raw = repr((tuple(params), translation.get_language()))
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'dashboard:report:{user.pk}:{name}:{version}:{digest}'
+
+
+def cached_report(user, name, params, compute):
+    """
+    خروجی ``compute()`` را برای (کاربر، گزارش، پارامترها) کش می‌کند.
+
+    ``params`` یک دنباله از مقادیر ساده است که خروجی به آن‌ها وابسته است
+    (مثلاً سال و ماه انتخاب‌شده و تاریخ امروز). خروجی باید قابل pickle باشد.
+    """
+    # نسخه قبل از محاسبه خوانده می‌شود؛ اگر وسط محاسبه داده تغییر کند، نتیجه
+    # زیر کلید نسخه‌ی قدیمی ذخیره می‌شود و درخواست بعدی دوباره محاسبه می‌کند
+    key = report_cache_key(user, name, params, get_data_version(user))
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, getattr(settings, 'REPORT_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return value
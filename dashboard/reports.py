@@ -0,0 +1,251 @@
+# Accounting/dashboard/reports.py
+
+"""
+موتور مشترک گزارش‌گیری.
+
+به جای اجرای چندین ``aggregate(Sum('price'))`` جداگانه در هر ویو، همه‌ی
+شاخص‌های یک بازه‌ی زمانی با یک کوئری شرطی (``Sum(..., filter=Q(...))``)
+برای هر مدل محاسبه می‌شوند.
+"""
+
+from datetime import timedelta
+
+import jdatetime
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from dashboard.models import Expense, JalaliCalendarDay, MonthlySummary, OtherIncome, Subscription
+
+
+def jalali_month_range(year, month):
+    """تاریخ شروع و پایان (میلادی) یک ماه شمسی را برمی‌گرداند."""
+    start = jdatetime.date(year, month, 1)
+    if month < 12:
+        end = jdatetime.date(year, month + 1, 1) - timedelta(days=1)
+    else:
+        end = jdatetime.date(year + 1, 1, 1) - timedelta(days=1)
+    return start.togregorian(), end.togregorian()
+
+
+def jalali_year_range(year):
+    """تاریخ شروع و پایان (میلادی) یک سال شمسی را برمی‌گرداند."""
+    start = jdatetime.date(year, 1, 1)
+    end = jdatetime.date(year + 1, 1, 1) - timedelta(days=1)
+    return start.togregorian(), end.togregorian()
+
+
+def _sum(field, condition):
+    return Sum(field, filter=condition, default=0)
+
+
+def _period_q(date_field, start, end):
+    if start is None and end is None:
+        return Q()
+    return Q(**{f'{date_field}__range': (start, end)})
+
+
+def _scope(queryset, date_field, period_q, today):
+    """فقط ردیف‌های بازه‌ی گزارش و روز جاری را اسکن می‌کنیم."""
+    if not period_q:
+        return queryset
+    return queryset.filter(period_q | Q(**{date_field: today}))
+
+
+def get_report_totals(user, start=None, end=None, today=None):
+    """
+    همه‌ی شاخص‌های مالی یک کاربر در بازه‌ی [start, end] و روز جاری.
+
+    اگر start و end داده نشوند، بازه کل دوران در نظر گرفته می‌شود.
+    خروجی یک دیکشنری ساده است و برای هر مدل دقیقاً یک کوئری اجرا می‌شود.
+    """
+    today = today or timezone.now().date()
+
+    sub_period = _period_q('payment_date', start, end)
+    subs = _scope(
+        Subscription.objects.filter(creator=user, status='success'), 'payment_date', sub_period, today
+    ).aggregate(
+        income=_sum('price', sub_period),
+        income_today=_sum('price', Q(payment_date=today)),
+        count_today=Count('id', filter=Q(payment_date=today)),
+    )
+
+    inc_period = _period_q('deposit_date', start, end)
+    incomes = _scope(
+        OtherIncome.objects.filter(creator=user), 'deposit_date', inc_period, today
+    ).aggregate(
+        income=_sum('price', inc_period),
+        income_today=_sum('price', Q(deposit_date=today)),
+    )
+
+    exp_period = _period_q('spending_date', start, end)
+    expenses = _scope(
+        Expense.objects.filter(creator=user), 'spending_date', exp_period, today
+    ).aggregate(
+        total=_sum('price', exp_period),
+        server=_sum('price', exp_period & Q(is_server_cost=True)),
+        total_today=_sum('price', Q(spending_date=today)),
+    )
+
+    total_income = subs['income'] + incomes['income']
+    total_income_today = subs['income_today'] + incomes['income_today']
+
+    return {
+        'subscription_income': subs['income'],
+        'other_income': incomes['income'],
+        'total_income': total_income,
+        'total_expenses': expenses['total'],
+        'server_costs': expenses['server'],
+        'net_profit': total_income - expenses['total'],
+        'subscription_income_today': subs['income_today'],
+        'subscription_count_today': subs['count_today'],
+        'other_income_today': incomes['income_today'],
+        'total_income_today': total_income_today,
+        'total_expenses_today': expenses['total_today'],
+        'net_profit_today': total_income_today - expenses['total_today'],
+    }
+
+
+def get_subscription_month_totals(user, year, month, giga_filter=None):
+    """
+    آمار اشتراک‌های یک ماه شمسی (پرداخت‌شده، پرداخت‌نشده و حجم فروخته‌شده).
+
+    ``giga_filter`` یک Q اختیاری است تا مجموع حجم فقط روی ردیف‌های
+    فیلترشده‌ی صفحه (وضعیت/جستجو) حساب شود.
+    """
+    totals = Subscription.objects.filter(creator=user, year=year, month=month).aggregate(
+        paid=_sum('price', Q(status='success')),
+        unpaid=_sum('price', Q(status='pending')),
+        giga=_sum('giga', giga_filter or Q()),
+    )
+    totals['total'] = totals['paid'] + totals['unpaid']
+    return totals
+
+
+def _flow_sources(user, income, expense):
+    """(کوئری، ستون تاریخ، سری مقصد) برای جریان‌های ورودی و خروجی پول."""
+    return (
+        (Subscription.objects.filter(creator=user, status='success'), 'payment_date', income),
+        (OtherIncome.objects.filter(creator=user), 'deposit_date', income),
+        (Expense.objects.filter(creator=user), 'spending_date', expense),
+    )
+
+
+def get_daily_series(user, start, end):
+    """
+    سری روزانه‌ی درآمد و هزینه در بازه‌ی [start, end].
+
+    برای هر مدل یک کوئری GROUP BY روی ستون تاریخ اجرا می‌شود، پس هزینه‌ی
+    آن به تعداد روزهای بازه بستگی ندارد. خروجی دو لیست هم‌طول با تعداد
+    روزهای بازه است.
+    """
+    days = (end - start).days + 1
+    income, expense = [0] * days, [0] * days
+
+    sources = _flow_sources(user, income, expense)
+    for queryset, date_field, series in sources:
+        rows = queryset.filter(**{f'{date_field}__range': (start, end)}).order_by().values(
+            date_field).annotate(total=Sum('price'))
+        for row in rows:
+            series[(row[date_field] - start).days] += row['total'] or 0
+
+    return income, expense
+
+
+def jalali_date_part(date_field, part):
+    """بخش شمسی (year/month/...) یک ستون تاریخ از روی جدول تقویم."""
+    return Subquery(JalaliCalendarDay.objects.filter(date=OuterRef(date_field)).values(part)[:1])
+
+
+def _summaries(user, months=None):
+    queryset = MonthlySummary.objects.filter(creator=user)
+    if months:
+        first, last = min(months), max(months)
+        queryset = queryset.filter(
+            Q(year__gt=first[0]) | Q(year=first[0], month__gte=first[1]),
+            Q(year__lt=last[0]) | Q(year=last[0], month__lte=last[1]),
+        )
+    return queryset
+
+
+def get_monthly_series(user, months):
+    """
+    سری ماهانه‌ی درآمد و هزینه برای لیست ``months`` از جفت‌های (سال، ماه) شمسی.
+
+    داده‌ها از جدول خلاصه‌ی ماهانه (MonthlySummary) خوانده می‌شوند؛ یعنی فقط
+    یک کوئری روی چند ردیف کوچک. خروجی دو لیست هم‌ترتیب با ``months`` است.
+    """
+    months = list(months)
+    position = {key: i for i, key in enumerate(months)}
+    income, expense = [0] * len(months), [0] * len(months)
+
+    for summary in _summaries(user, months):
+        index = position.get((summary.year, summary.month))
+        if index is not None:
+            income[index] += summary.total_income
+            expense[index] += summary.expenses
+
+    return income, expense
+
+
+def get_summary_totals(user, year=None, month=None):
+    """
+    شاخص‌های اصلی یک سال/ماه شمسی (یا کل دوران) از روی خلاصه‌های ماهانه.
+    کلیدهای خروجی همان کلیدهای بازه‌ای ``get_report_totals`` هستند.
+    """
+    queryset = MonthlySummary.objects.filter(creator=user)
+    if year is not None:
+        queryset = queryset.filter(year=year)
+        if month is not None:
+            queryset = queryset.filter(month=month)
+
+    totals = queryset.aggregate(**{field: Sum(field, default=0) for field in MonthlySummary.AMOUNT_FIELDS})
+    total_income = totals['subscription_income'] + totals['other_income']
+    return {
+        'subscription_income': totals['subscription_income'],
+        'other_income': totals['other_income'],
+        'total_income': total_income,
+        'total_expenses': totals['expenses'],
+        'server_costs': totals['server_costs'],
+        'net_profit': total_income - totals['expenses'],
+        'giga_sold': totals['giga_sold'],
+        'paid_subscriptions': totals['paid_subscriptions'],
+        'unpaid_subscriptions': totals['unpaid_subscriptions'],
+    }
+
+
+def get_bank_flows(user, start=None, end=None, subscription_filter=None, include_unassigned=False):
+    """
+    جریان پول هر حساب بانکی کاربر در بازه‌ی [start, end] (یا کل دوران).
+
+    به جای سه کوئری برای هر بانک، برای هر مدل یک کوئری GROUP BY روی بانک
+    اجرا می‌شود. خروجی دیکشنری ``{bank_id: {...}}`` است؛ بانک‌هایی که در
+    بازه گردشی ندارند در خروجی نیستند. با ``include_unassigned`` تراکنش‌های
+    بدون بانک زیر کلید ``None`` جمع می‌شوند.
+
+    اشتراک‌ها به طور پیش‌فرض بر اساس تاریخ پرداخت فیلتر می‌شوند؛ با
+    ``subscription_filter`` می‌توان شرط دیگری (مثلاً سال/ماه اشتراک) داد.
+    """
+    if subscription_filter is None:
+        subscription_filter = _period_q('payment_date', start, end)
+
+    sources = (
+        ('subs_income', 'destination_bank',
+         Subscription.objects.filter(subscription_filter, creator=user, status='success')),
+        ('other_income', 'destination_bank',
+         OtherIncome.objects.filter(_period_q('deposit_date', start, end), creator=user)),
+        ('total_expense', 'source_bank',
+         Expense.objects.filter(_period_q('spending_date', start, end), creator=user)),
+    )
+
+    flows = {}
+    for key, bank_field, queryset in sources:
+        if not include_unassigned:
+            queryset = queryset.filter(**{f'{bank_field}__isnull': False})
+        rows = queryset.order_by().values(bank_field).annotate(total=Sum('price'))
+        for row in rows:
+            bank_flow = flows.setdefault(row[bank_field], {'subs_income': 0, 'other_income': 0, 'total_expense': 0})
+            bank_flow[key] += row['total'] or 0
+
+    for bank_flow in flows.values():
+        bank_flow['net_flow'] = bank_flow['subs_income'] + bank_flow['other_income'] - bank_flow['total_expense']
+    return flows
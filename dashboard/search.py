@@ -0,0 +1,161 @@
+# Accounting/dashboard/search.py
+
+"""
+جستجوی سراسری (مشتری‌ها، هزینه‌ها و درآمدها) با ایندکس معکوس SearchToken.
+
+هر ذخیره/حذف سند، کلمه‌های آن را در SearchToken به‌روز می‌کند
+(dashboard/signals.py). جستجو هر کلمه‌ی عبارت را به صورت پیشوندی روی
+ایندکس (creator, token) پیدا می‌کند، فقط سندهایی که همه‌ی کلمه‌ها را دارند
+نگه می‌دارد و آن‌ها را بر اساس مجموع وزن فیلدها رتبه‌بندی می‌کند. این روش
+روی MySQL و SQLite یکسان است (برخلاف FULLTEXT که مخصوص MySQL است).
+
+متن سندها و عبارت جستجو با همان قواعد کلید جستجوی مدل‌ها
+(dashboard/persian.py) یکسان‌سازی می‌شوند؛ ستون search_key همان مدل‌ها هم
+با rebuild_search_keys از نو ساخته می‌شود.
+"""
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from django.urls import reverse
+
+from dashboard.models import BankAccount, CustomerProfile, Expense, OtherIncome, SearchToken
+from dashboard.persian import normalize_search_key
+
+SEARCH_PAGE_SIZE = 20
+MAX_QUERY_TERMS = 5
+MAX_TOKEN_LENGTH = SearchToken._meta.get_field('token').max_length
+TOKEN_RE = re.compile(r'\w+')
+BATCH_SIZE = 2000
+
+# نوع سند ← (نام مدل، فیلدهای قابل جستجو با وزنشان)
+SEARCH_FIELDS = {
+    'customer': ('CustomerProfile', (('name', 3), ('phone_number', 2))),
+    'expense': ('Expense', (('issue', 3), ('description', 1))),
+    'income': ('OtherIncome', (('name', 3), ('description', 1))),
+}
+SEARCH_MODELS = {'customer': CustomerProfile, 'expense': Expense, 'income': OtherIncome}
+KIND_BY_MODEL = {model: kind for kind, model in SEARCH_MODELS.items()}
+# مدل‌هایی که ستون search_key دارند (SearchKeyMixin)
+SEARCH_KEY_MODELS = (CustomerProfile, Expense, OtherIncome, BankAccount)
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall(normalize_search_key(text))]
+
+
+def document_tokens(kind, instance):
+    """کلمه‌های یک سند ← بیشترین وزن فیلدهایی که کلمه در آن‌ها آمده."""
+    weights = {}
+    for field, weight in SEARCH_FIELDS[kind][1]:
+        for token in tokenize(getattr(instance, field)):
+            weights[token] = max(weights.get(token, 0), weight)
+    return weights
+
+
+def _token_rows(kind, instance):
+    return [
+        SearchToken(creator_id=instance.creator_id, token=token, model=kind, object_id=instance.pk, weight=weight)
+        for token, weight in document_tokens(kind, instance).items()
+    ]
+
+
+def index_document(instance):
+    kind = KIND_BY_MODEL[type(instance)]
+    with transaction.atomic():
+        SearchToken.objects.filter(model=kind, object_id=instance.pk).delete()
+        SearchToken.objects.bulk_create(_token_rows(kind, instance))
+
+
+def remove_document(instance):
+    SearchToken.objects.filter(model=KIND_BY_MODEL[type(instance)], object_id=instance.pk).delete()
+
+
+def rebuild_search_index(users=None):
+    """ایندکس را برای کاربران داده‌شده (پیش‌فرض همه) از نو می‌سازد؛ تعداد ردیف‌ها را برمی‌گرداند."""
+    users = users if users is not None else User.objects.all()
+    count = 0
+    for user in users:
+        with transaction.atomic():
+            SearchToken.objects.filter(creator=user).delete()
+            for kind, model in SEARCH_MODELS.items():
+                fields = [field for field, _ in SEARCH_FIELDS[kind][1]]
+                rows = []
+                for instance in model.objects.filter(creator=user).only('creator', *fields).iterator(BATCH_SIZE):
+                    rows += _token_rows(kind, instance)
+                    if len(rows) >= BATCH_SIZE:
+                        count += len(SearchToken.objects.bulk_create(rows))
+                        rows = []
+                count += len(SearchToken.objects.bulk_create(rows))
+    return count
+
+
+def rebuild_search_keys(users=None):
+    """search_key ردیف‌های کاربران داده‌شده (پیش‌فرض همه) را از نو پر می‌کند؛ تعداد ردیف‌های تغییرکرده."""
+    users = users if users is not None else User.objects.all()
+    count = 0
+    for model in SEARCH_KEY_MODELS:
+        source = model.search_key_source
+        changed = []
+        for instance in model.objects.filter(creator__in=users).only('search_key', source).iterator(BATCH_SIZE):
+            key = instance.search_key
+            instance.fill_search_key()
+            if instance.search_key != key:
+                changed.append(instance)
+            if len(changed) >= BATCH_SIZE:
+                count += model.objects.bulk_update(changed, ['search_key'])
+                changed = []
+        count += model.objects.bulk_update(changed, ['search_key'])
+    return count
+
+
+def _describe(kind, obj):
+    """عنوان، توضیح کوتاه و آدرس ویرایش هر نتیجه."""
+    if kind == 'customer':
+        return obj.name, obj.phone_number or '', reverse('dashboard:edit_customer_profile', args=[obj.pk])
+    if kind == 'expense':
+        return str(obj), obj.description, reverse('dashboard:expense_edit', args=[obj.pk])
+    return obj.name or obj.description, obj.description, reverse('dashboard:other_income_edit', args=[obj.pk])
+
+
+def search(user, query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    یک صفحه (Page جانگو) از نتایج رتبه‌بندی‌شده‌ی ``query`` برای ``user``. هر
+    نتیجه دیکشنری kind, object, score, title, detail و url است.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return Paginator([], page_size).get_page(1)
+
+    tokens = SearchToken.objects.filter(creator=user).filter(reduce(or_, (Q(token__startswith=t) for t in terms)))
+    # برای هر کلمه‌ی عبارت: آیا سند کلمه‌ای با این پیشوند دارد؟
+    matched = {
+        f'term_{index}': Max(Case(When(token__startswith=term, then=Value(1)), default=Value(0),
+                                  output_field=IntegerField()))
+        for index, term in enumerate(terms)
+    }
+    ranked = (tokens.values('model', 'object_id').annotate(score=Sum('weight'), **matched)
+              .filter(**{name: 1 for name in matched}).order_by('-score', 'model', '-object_id'))
+    page = Paginator(ranked, page_size).get_page(page)
+
+    rows = list(page.object_list)
+    objects = {
+        kind: SEARCH_MODELS[kind].objects.filter(creator=user).in_bulk(
+            [row['object_id'] for row in rows if row['model'] == kind])
+        for kind in {row['model'] for row in rows}
+    }
+    results = []
+    for row in rows:
+        obj = objects[row['model']].get(row['object_id'])
+        if obj is None:
+            continue
+        title, detail, url = _describe(row['model'], obj)
+        results.append({'kind': row['model'], 'object': obj, 'score': row['score'],
+                        'title': title, 'detail': detail, 'url': url})
+    page.object_list = results
+    return page
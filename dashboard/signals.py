@@ -0,0 +1,192 @@
+# Accounting/dashboard/signals.py
+
+"""
+سیگنال‌هایی که جداول مشتق‌شده (دفتر موجودی بانک‌ها و خلاصه‌ی ماهانه)، نسخه‌ی کش گزارش‌ها،
+جدول تغییرات بک‌آپ افزایشی و ایندکس جستجو را همگام نگه می‌دارند.
+در DashboardConfig.ready() بارگذاری می‌شوند.
+"""
+
+from collections import defaultdict
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from dashboard.models import BankAccount, CustomerProfile, Expense, MonthlySummary, OtherIncome, Profile, Subscription
+from dashboard.incremental import TRACKED_MODELS, record_change
+from dashboard.report_cache import bump_data_version
+from dashboard.search import SEARCH_MODELS, index_document, remove_document
+
+FINANCIAL_MODELS = (Expense, OtherIncome, Subscription)
+# مدل‌هایی که تغییرشان کش گزارش‌های کاربر را بی‌اعتبار می‌کند
+VERSIONED_MODELS = FINANCIAL_MODELS + (CustomerProfile, BankAccount)
+
+
+# ===================================================================
+# دفتر موجودی بانک‌ها (BankAccount.balance و Profile.unassigned_balance)
+# ===================================================================
+
+def apply_balance_delta(creator_id, bank_id, amount, create_missing=True):
+    """مبلغ را به موجودی بانک (یا موجودی بدون بانک کاربر) اضافه می‌کند."""
+    if not amount:
+        return
+    if bank_id:
+        BankAccount.objects.filter(pk=bank_id).update(balance=F('balance') + amount)
+    elif not Profile.objects.filter(user_id=creator_id).update(unassigned_balance=F('unassigned_balance') + amount):
+        # هنگام حذف کاربر، پروفایل هم حذف می‌شود؛ پس در مسیر حذف پروفایل جدید نمی‌سازیم
+        if create_missing:
+            Profile.objects.create(user_id=creator_id, unassigned_balance=amount)
+
+
+def update_balances(model, creator_id, old, new):
+    """اختلاف اثر قبلی و جدید یک ردیف را روی موجودی‌ها اعمال می‌کند."""
+    old_bank, old_amount = model.ledger_entry(old) if old else (None, 0)
+    new_bank, new_amount = model.ledger_entry(new) if new else (None, 0)
+    if old_bank == new_bank:
+        apply_balance_delta(creator_id, new_bank, new_amount - old_amount, create_missing=bool(new))
+    else:
+        apply_balance_delta(creator_id, old_bank, -old_amount, create_missing=bool(new))
+        apply_balance_delta(creator_id, new_bank, new_amount, create_missing=bool(new))
+
+
+# ===================================================================
+# خلاصه‌ی ماهانه (MonthlySummary)
+# ===================================================================
+
+def update_monthly_summaries(model, creator_id, old, new):
+    """اختلاف اثر قبلی و جدید یک ردیف را روی خلاصه‌های ماهانه اعمال می‌کند."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for values, sign in ((old, -1), (new, 1)):
+        if values:
+            for key, amounts in model.summary_entries(values):
+                for field, amount in amounts.items():
+                    deltas[key][field] += sign * amount
+
+    for (year, month), amounts in deltas.items():
+        amounts = {field: amount for field, amount in amounts.items() if amount}
+        if not amounts:
+            continue
+        rows = MonthlySummary.objects.filter(creator_id=creator_id, year=year, month=month)
+        if rows.update(**{field: F(field) + amount for field, amount in amounts.items()}):
+            continue
+        if not new:
+            # حذف ردیف (مثلاً همراه با حذف کاربر)؛ خلاصه‌ای برای ساختن نیست
+            continue
+        summary, created = MonthlySummary.objects.get_or_create(
+            creator_id=creator_id, year=year, month=month, defaults=amounts)
+        if not created:
+            rows.update(**{field: F(field) + amount for field, amount in amounts.items()})
+
+
+# ===================================================================
+# سیگنال‌های مدل‌های مالی
+# ===================================================================
+
+def _stored_values(instance):
+    """مقادیر فعلی ردیف همان‌طور که در دیتابیس ذخیره شده است."""
+    stored = type(instance)._base_manager.filter(pk=instance.pk).first()
+    return stored.tracked_values() if stored else None
+
+
+def remember_tracked_values(sender, instance, **kwargs):
+    # اگر فیلدهای لازم deferred باشند، مقدار قبلی هنگام ذخیره از دیتابیس خوانده می‌شود
+    if instance.get_deferred_fields().intersection(instance.tracked_fields):
+        instance._tracked_values = None
+    else:
+        instance._tracked_values = instance.tracked_values()
+
+
+def load_previous_values(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if instance._state.adding or instance._tracked_values is None:
+        instance._tracked_values = _stored_values(instance)
+
+
+def sync_derived_tables_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._tracked_values
+    new = instance.tracked_values()
+    if old != new:
+        update_balances(sender, instance.creator_id, old, new)
+        update_monthly_summaries(sender, instance.creator_id, old, new)
+    instance._tracked_values = new
+
+
+def sync_derived_tables_on_delete(sender, instance, **kwargs):
+    old = instance._tracked_values or instance.tracked_values()
+    update_balances(sender, instance.creator_id, old, None)
+    update_monthly_summaries(sender, instance.creator_id, old, None)
+
+
+for _model in FINANCIAL_MODELS:
+    post_init.connect(remember_tracked_values, sender=_model, dispatch_uid=f'tracked_init_{_model.__name__}')
+    pre_save.connect(load_previous_values, sender=_model, dispatch_uid=f'tracked_pre_{_model.__name__}')
+    post_save.connect(sync_derived_tables_on_save, sender=_model, dispatch_uid=f'tracked_save_{_model.__name__}')
+    post_delete.connect(sync_derived_tables_on_delete, sender=_model,
+                        dispatch_uid=f'tracked_delete_{_model.__name__}')
+
+
+@receiver(pre_delete, sender=BankAccount)
+def move_balance_to_unassigned(sender, instance, **kwargs):
+    """با حذف بانک، تراکنش‌هایش بدون بانک می‌شوند (SET_NULL) و موجودی هم منتقل می‌شود."""
+    # موجودی نمونه‌ی در حافظه ممکن است قدیمی باشد (به‌روزرسانی‌ها با F انجام می‌شوند)
+    balance = BankAccount.objects.filter(pk=instance.pk).values_list('balance', flat=True).first()
+    if balance:
+        Profile.objects.filter(user_id=instance.creator_id).update(
+            unassigned_balance=F('unassigned_balance') + balance)
+
+
+# ===================================================================
+# نسخه‌ی داده‌ی کاربر (کش گزارش‌ها)
+# ===================================================================
+
+def bump_version_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        bump_data_version(instance.creator_id)
+
+
+def bump_version_on_delete(sender, instance, **kwargs):
+    bump_data_version(instance.creator_id, create_missing=False)
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_save, sender=_model, dispatch_uid=f'version_save_{_model.__name__}')
+    post_delete.connect(bump_version_on_delete, sender=_model, dispatch_uid=f'version_delete_{_model.__name__}')
+
+
+# ===================================================================
+# ثبت تغییرات برای بک‌آپ افزایشی (ChangeLog)
+# ===================================================================
+
+def log_change_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        record_change(instance)
+
+
+def log_change_on_delete(sender, instance, **kwargs):
+    record_change(instance, deleted=True)
+
+
+for _model in TRACKED_MODELS:
+    post_save.connect(log_change_on_save, sender=_model, dispatch_uid=f'changelog_save_{_model.__name__}')
+    post_delete.connect(log_change_on_delete, sender=_model, dispatch_uid=f'changelog_delete_{_model.__name__}')
+
+
+# ===================================================================
+# ایندکس جستجوی سراسری (SearchToken)
+# ===================================================================
+
+def index_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        index_document(instance)
+
+
+def unindex_on_delete(sender, instance, **kwargs):
+    remove_document(instance)
+
+
+for _model in SEARCH_MODELS.values():
+    post_save.connect(index_on_save, sender=_model, dispatch_uid=f'search_save_{_model.__name__}')
+    post_delete.connect(unindex_on_delete, sender=_model, dispatch_uid=f'search_delete_{_model.__name__}')
@@ -1,3 +1,1574 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zlib
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import jdatetime
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from dashboard import backup, benchmarking, incremental, jobs, logical_backup
+from dashboard.backup import (
+    STDERR_TAIL, BackupError, StatementCounter, join_parts, restore_dump, send_backup_to_telegram,
+    stream_gzip_dump, upload_file_to_telegram,
+)
+from dashboard.activity import (
+    NO_DATE, decode_cursor, decode_date_cursor, get_activity_page, get_transaction_page, get_transaction_sources,
+)
+from dashboard.benchmark_data import BenchmarkDataset
+from dashboard.customers import get_customer_page, search_customers
+from dashboard.forms import SubscriptionForm
+from dashboard.models import (
+    BackgroundJob, BackupCheckpoint, BankAccount, ChangeLog, CustomerProfile, Expense, JalaliCalendarDay, MonthlySummary,
+    OtherIncome, Profile, SearchToken, Subscription,
+)
+from dashboard.report_cache import get_data_version
+from dashboard.jalali import ensure_calendar
+from dashboard.ledger import rebuild_user_balances, rebuild_user_summaries
+from dashboard.reports import (
+    get_bank_flows, get_daily_series, get_monthly_series, get_report_totals, jalali_date_part, jalali_month_range,
+)
+from dashboard.persian import normalize_search_key
+from dashboard.search import rebuild_search_index, rebuild_search_keys, search
+
+
+class CompositeIndexTests(TestCase):
+    """
+    بررسی می‌کند که کوئری‌های پرتکرار ویوها از ایندکس‌های ترکیبی استفاده کنند.
+    نام ایندکس باید در خروجی EXPLAIN دیتابیس دیده شود.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', password='x') for i in range(3)]
+        cls.user = cls.users[0]
+        start = date(2024, 3, 20)
+        for user in cls.users:
+            customer = CustomerProfile.objects.create(creator=user, name=f'customer-{user.pk}')
+            for i in range(30):
+                day = start + timedelta(days=i * 7)
+                Expense.objects.create(creator=user, issue=f'e{i}', price=1000 + i, spending_date=day)
+                OtherIncome.objects.create(creator=user, name=f'i{i}', price=2000 + i, deposit_date=day)
+                Subscription.objects.create(
+                    creator=user, customer=customer, giga=10, price=3000 + i,
+                    year=1403, month=i % 12 + 1, status='success' if i % 2 else 'pending',
+                    payment_date=day if i % 2 else None,
+                )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, msg=f'{index_name} not used:\n{plan}')
+
+    def test_expense_date_range(self):
+        queryset = Expense.objects.filter(
+            creator=self.user, spending_date__range=(date(2024, 4, 1), date(2024, 6, 30)))
+        self.assertUsesIndex(queryset, 'expense_creator_date_idx')
+
+    def test_income_date_range(self):
+        queryset = OtherIncome.objects.filter(
+            creator=self.user, deposit_date__range=(date(2024, 4, 1), date(2024, 6, 30)))
+        self.assertUsesIndex(queryset, 'income_creator_date_idx')
+
+    def test_subscription_month(self):
+        queryset = Subscription.objects.filter(creator=self.user, year=1403, month=5)
+        self.assertUsesIndex(queryset, 'sub_creator_period_idx')
+
+    def test_paid_subscriptions_by_payment_date(self):
+        queryset = Subscription.objects.filter(
+            creator=self.user, status='success', payment_date__range=(date(2024, 4, 1), date(2024, 6, 30)))
+        self.assertUsesIndex(queryset, 'sub_creator_paid_idx')
+
+    def test_activity_feed_order(self):
+        self.assertUsesIndex(
+            Expense.objects.filter(creator=self.user).order_by('-created_at')[:21], 'expense_creator_created_idx')
+        self.assertUsesIndex(
+            OtherIncome.objects.filter(creator=self.user).order_by('-created_at')[:21], 'income_creator_created_idx')
+        self.assertUsesIndex(
+            Subscription.objects.filter(creator=self.user, status='success').order_by('-created_at')[:21],
+            'sub_creator_created_idx')
+
+
+class ReportEngineTests(TestCase):
+    """
+    خروجی کوئری‌های گروه‌بندی‌شده‌ی گزارش‌ها باید با جمع ردیف‌به‌ردیف (روش
+    قبلی ویوها) یکی باشد؛ داده‌ها دور مرز اسفند ۱۴۰۳ (سال کبیسه) چیده شده‌اند.
+    """
+    # ۱۴۰۲/۱۲/۲۹، ۱۴۰۳/۰۱/۰۱، ۱۴۰۳/۱۲/۰۱، ۱۴۰۳/۱۲/۳۰ (روز کبیسه)، ۱۴۰۴/۰۱/۰۱
+    DAYS = (date(2024, 3, 19), date(2024, 3, 20), date(2025, 2, 19), date(2025, 3, 20), date(2025, 3, 21))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        other = User.objects.create_user('other', password='x')
+        cls.banks = [BankAccount.objects.create(creator=cls.user, bank_name=name) for name in ('Melli', 'Saman')]
+        customer = CustomerProfile.objects.create(creator=cls.user, name='ali')
+        for i, day in enumerate(cls.DAYS):
+            bank = (cls.banks + [None])[i % 3]
+            Expense.objects.create(creator=cls.user, issue='e', price=100 + i, spending_date=day,
+                                   is_server_cost=i % 2 == 0, source_bank=bank)
+            OtherIncome.objects.create(creator=cls.user, name='i', price=1000 + i, deposit_date=day,
+                                       destination_bank=bank)
+            for status in ('success', 'pending'):
+                Subscription.objects.create(creator=cls.user, customer=customer, giga=10, price=10000 + i,
+                                            year=1403, month=12, status=status, destination_bank=bank,
+                                            payment_date=day if status == 'success' else None)
+        Expense.objects.create(creator=cls.user, issue='no date', price=7)
+        Expense.objects.create(creator=other, issue='e', price=999, spending_date=cls.DAYS[3])
+
+    def rows(self, start=None, end=None):
+        """(تاریخ، مبلغ، نوع، بانک) همه‌ی تراکنش‌های کاربر؛ معادل حلقه‌های قبلی ویوها."""
+        rows = [(s.payment_date, s.price, 'subs', s.destination_bank_id)
+                for s in Subscription.objects.filter(creator=self.user, status='success')]
+        rows += [(i.deposit_date, i.price, 'income', i.destination_bank_id)
+                 for i in OtherIncome.objects.filter(creator=self.user)]
+        rows += [(e.spending_date, e.price, 'server' if e.is_server_cost else 'expense', e.source_bank_id)
+                 for e in Expense.objects.filter(creator=self.user)]
+        if start is None:
+            return rows
+        return [row for row in rows if row[0] and start <= row[0] <= end]
+
+    def test_report_totals_match_row_sums(self):
+        today = self.DAYS[3]
+        for start, end in (jalali_month_range(1403, 12), jalali_month_range(1404, 1), (None, None)):
+            with self.subTest(start=start):
+                rows = self.rows(start, end)
+                totals = get_report_totals(self.user, start, end, today=today)
+                subs = sum(price for _, price, kind, _ in rows if kind == 'subs')
+                income = sum(price for _, price, kind, _ in rows if kind == 'income')
+                expenses = sum(price for _, price, kind, _ in rows if kind in ('expense', 'server'))
+                self.assertEqual(totals['subscription_income'], subs)
+                self.assertEqual(totals['other_income'], income)
+                self.assertEqual(totals['total_expenses'], expenses)
+                self.assertEqual(totals['server_costs'], sum(p for _, p, kind, _ in rows if kind == 'server'))
+                self.assertEqual(totals['net_profit'], subs + income - expenses)
+
+                today_rows = [row for row in self.rows() if row[0] == today]
+                self.assertEqual(totals['subscription_count_today'],
+                                 sum(1 for row in today_rows if row[2] == 'subs'))
+                self.assertEqual(totals['total_income_today'],
+                                 sum(p for _, p, kind, _ in today_rows if kind in ('subs', 'income')))
+
+        self.assertEqual(jalali_month_range(1403, 12), (date(2025, 2, 19), date(2025, 3, 20)))
+
+    def test_daily_series_matches_per_day_sums(self):
+        start, end = jalali_month_range(1403, 12)
+        income, expense = get_daily_series(self.user, start, end)
+        self.assertEqual(len(income), 30)  # اسفند سال کبیسه
+        for offset in range(30):
+            day = start + timedelta(days=offset)
+            rows = [row for row in self.rows() if row[0] == day]
+            self.assertEqual(income[offset], sum(p for _, p, kind, _ in rows if kind in ('subs', 'income')), day)
+            self.assertEqual(expense[offset], sum(p for _, p, kind, _ in rows if kind in ('expense', 'server')), day)
+
+    def test_calendar_table_matches_jdatetime(self):
+        # جای خالی در جدول تقویم (مثلاً سالی خارج از بازه‌ی مایگریشن) با ensure_calendar پر می‌شود
+        JalaliCalendarDay.objects.filter(year=1403, month=12).delete()
+        ensure_calendar(JalaliCalendarDay, self.DAYS[0], self.DAYS[-1])
+        self.assertEqual(JalaliCalendarDay.objects.filter(year=1403).count(), 366)
+        self.assertEqual(JalaliCalendarDay.objects.filter(year=1402).count(), 365)
+
+        expenses = Expense.objects.filter(creator=self.user, spending_date__isnull=False).annotate(
+            jalali_year=jalali_date_part('spending_date', 'year'),
+            jalali_month=jalali_date_part('spending_date', 'month'))
+        for expense in expenses:
+            jalali = jdatetime.date.fromgregorian(date=expense.spending_date)
+            self.assertEqual((expense.jalali_year, expense.jalali_month), (jalali.year, jalali.month))
+
+    def test_bank_flows_match_per_bank_sums(self):
+        start, end = jalali_month_range(1403, 12)
+        for period in ((start, end), (None, None)):
+            rows = self.rows(*period)
+            with self.subTest(period=period):
+                for include_unassigned in (False, True):
+                    expected = {}
+                    for _, price, kind, bank in rows:
+                        if bank is None and not include_unassigned:
+                            continue
+                        flow = expected.setdefault(bank, {'subs_income': 0, 'other_income': 0, 'total_expense': 0})
+                        if kind in ('expense', 'server'):
+                            flow['total_expense'] += price
+                        else:
+                            flow['subs_income' if kind == 'subs' else 'other_income'] += price
+                    for flow in expected.values():
+                        flow['net_flow'] = flow['subs_income'] + flow['other_income'] - flow['total_expense']
+                    # بانک‌های بدون گردش در بازه در خروجی نیستند
+                    self.assertEqual(get_bank_flows(self.user, *period, include_unassigned=include_unassigned),
+                                     expected)
+
+
+class LedgerSignalTests(TestCase):
+    """موجودی‌هایی که سیگنال‌ها افزایشی نگه می‌دارند باید با بازسازی کامل یکی باشند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.melli = BankAccount.objects.create(creator=cls.user, bank_name='Melli')
+        cls.saman = BankAccount.objects.create(creator=cls.user, bank_name='Saman')
+        cls.customer = CustomerProfile.objects.create(creator=cls.user, name='ali')
+
+    def balances(self):
+        banks = dict(BankAccount.objects.filter(creator=self.user).values_list('pk', 'balance'))
+        return banks, Profile.objects.get(user=self.user).unassigned_balance
+
+    def assertLedgerConsistent(self):
+        incremental = self.balances()
+        rebuild_user_balances(self.user)
+        self.assertEqual(incremental, self.balances())
+
+    def test_balances_follow_edits_and_deletes(self):
+        day = date(2025, 1, 10)
+        expense = Expense.objects.create(creator=self.user, price=300, spending_date=day, source_bank=self.melli)
+        income = OtherIncome.objects.create(creator=self.user, price=1000, deposit_date=day)
+        subscription = Subscription.objects.create(creator=self.user, customer=self.customer, price=5000, year=1403,
+                                                   month=10, status='pending', destination_bank=self.saman)
+        self.assertLedgerConsistent()
+        self.assertEqual(self.balances(), ({self.melli.pk: -300, self.saman.pk: 0}, 1000))
+
+        subscription.status = 'success'
+        subscription.payment_date = day
+        subscription.save()
+        self.assertLedgerConsistent()
+
+        expense.source_bank = self.saman
+        expense.price = 450
+        expense.save()
+        income.destination_bank = self.melli
+        income.save()
+        subscription.price = 4000
+        subscription.destination_bank = None
+        subscription.save()
+        self.assertLedgerConsistent()
+        self.assertEqual(self.balances(), ({self.melli.pk: 1000, self.saman.pk: -450}, 4000))
+
+        subscription.status = 'pending'
+        subscription.save()
+        expense.delete()
+        self.assertLedgerConsistent()
+
+        # حذف بانک: تراکنش‌هایش بدون بانک می‌شوند و موجودی منتقل می‌شود
+        self.melli.delete()
+        self.assertLedgerConsistent()
+        self.assertEqual(self.balances(), ({self.saman.pk: 0}, 1000))
+
+
+class ProfileSaveTests(TestCase):
+    """ذخیره‌ی پروفایل (لاگین، تم، آواتار) نباید شمارنده‌هایی را که با F() تغییر می‌کنند بازنویسی کند."""
+
+    COUNTERS = ('unassigned_balance', 'data_version')
+    # یک GIF یک پیکسلی
+    AVATAR = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,'
+              b'\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+
+    def profile_updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "dashboard_profile"')]
+
+    def test_stale_user_save_keeps_concurrent_counter_changes(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        Profile.objects.filter(user=self.user).update(unassigned_balance=F('unassigned_balance') + 700)
+        user.save()
+        self.assertEqual(Profile.objects.get(user=self.user).unassigned_balance, 700)
+
+    def test_stale_user_save_does_not_roll_back_data_version(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        version = get_data_version(self.user)
+        Expense.objects.create(creator=self.user, issue='e', price=1)
+        user.save()
+        # نسخه‌ی قدیمی برنمی‌گردد تا کلیدهای کش و ETagهای قبلی دوباره معتبر نشوند
+        self.assertEqual(get_data_version(self.user), version + 1)
+
+    def test_profile_paths_do_not_write_counters(self):
+        requests = {
+            'login': lambda: self.client.login(username='owner', password='x'),
+            'theme': lambda: self.client.post(reverse('dashboard:set_theme'), {'theme': 'light'}),
+            'avatar': lambda: self.client.post(reverse('dashboard:profile'), {
+                'change_avatar': '1', 'avatar': SimpleUploadedFile('a.gif', self.AVATAR, 'image/gif')}),
+            'mobile profile': lambda: self.client.post(reverse('dashboard:mobile_profile'), {
+                'first_name': 'Ali', 'last_name': '', 'email': '',
+                'avatar': SimpleUploadedFile('b.gif', self.AVATAR, 'image/gif')}),
+        }
+        for name, request in requests.items():
+            with self.subTest(name), CaptureQueriesContext(connection) as queries:
+                request()
+            updates = self.profile_updates(queries.captured_queries)
+            self.assertTrue(updates, name)
+            for sql in updates:
+                for counter in self.COUNTERS:
+                    self.assertNotIn(counter, sql.split(' WHERE ')[0], name)
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(profile.theme, 'light')
+        self.assertTrue(profile.avatar.name.startswith('avatars/b'))
+
+
+class MonthlySummarySignalTests(TestCase):
+    """خلاصه‌های ماهانه‌ای که سیگنال‌ها نگه می‌دارند باید با بازسازی کامل یکی باشند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.customer = CustomerProfile.objects.create(creator=cls.user, name='ali')
+
+    def summaries(self):
+        rows = MonthlySummary.objects.filter(creator=self.user).values('year', 'month', *MonthlySummary.AMOUNT_FIELDS)
+        # ردیف‌هایی که همه‌ی مبالغشان صفر شده با نبودن ردیف یکی هستند
+        return {(row.pop('year'), row.pop('month')): row
+                for row in rows if any(row[field] for field in MonthlySummary.AMOUNT_FIELDS)}
+
+    def assertSummariesConsistent(self):
+        incremental = self.summaries()
+        rebuild_user_summaries(self.user)
+        self.assertEqual(incremental, self.summaries())
+
+    def test_summaries_follow_subscription_changes(self):
+        subscription = Subscription.objects.create(creator=self.user, customer=self.customer, price=5000, giga=20,
+                                                   year=1403, month=11, status='pending')
+        Expense.objects.create(creator=self.user, price=300, spending_date=date(2025, 3, 20), is_server_cost=True)
+        OtherIncome.objects.create(creator=self.user, price=700, deposit_date=date(2025, 3, 21))
+        self.assertSummariesConsistent()
+
+        # پرداخت در روز کبیسه‌ی ۱۴۰۳/۱۲/۳۰
+        subscription.status = 'success'
+        subscription.payment_date = date(2025, 3, 20)
+        subscription.save()
+        self.assertSummariesConsistent()
+        self.assertEqual(self.summaries()[1403, 12]['subscription_income'], 5000)
+
+        # جابه‌جایی تاریخ پرداخت به سال بعد و ماه اشتراک
+        subscription.payment_date = date(2025, 3, 21)
+        subscription.month = 12
+        subscription.giga = 30
+        subscription.save()
+        self.assertSummariesConsistent()
+        self.assertEqual(self.summaries()[1404, 1]['subscription_income'], 5000)
+
+        subscription.status = 'pending'
+        subscription.save()
+        self.assertSummariesConsistent()
+        self.assertEqual(self.summaries()[1403, 12]['unpaid_subscriptions'], 5000)
+
+        subscription.delete()
+        self.assertSummariesConsistent()
+        self.assertFalse(any(amounts['giga_sold'] for amounts in self.summaries().values()))
+
+    def test_monthly_series_matches_per_month_aggregation(self):
+        for i, day in enumerate((date(2024, 3, 19), date(2024, 3, 20), date(2025, 3, 20), date(2025, 3, 21))):
+            Expense.objects.create(creator=self.user, price=100 + i, spending_date=day)
+            OtherIncome.objects.create(creator=self.user, price=1000 + i, deposit_date=day)
+            Subscription.objects.create(creator=self.user, customer=self.customer, price=5000 + i, year=1403,
+                                        month=1, status='success', payment_date=day)
+
+        months = [(1402, 12), (1403, 1), (1403, 6), (1403, 12), (1404, 1)]
+        income, expense = get_monthly_series(self.user, months)
+        # روش قبلی: یک aggregate روی بازه‌ی هر ماه
+        for index, (year, month) in enumerate(months):
+            totals = get_report_totals(self.user, *jalali_month_range(year, month))
+            self.assertEqual((income[index], expense[index]), (totals['total_income'], totals['total_expenses']))
+
+
+class ActivityFeedTests(TestCase):
+    """صفحه‌بندی keyset فید فعالیت‌ها با تساوی created_at بین نوع‌های مختلف."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        customer = CustomerProfile.objects.create(creator=cls.user, name='ali')
+        for i in range(3):
+            Expense.objects.create(creator=cls.user, issue=f'e{i}', price=1)
+            OtherIncome.objects.create(creator=cls.user, name=f'i{i}', price=1)
+            Subscription.objects.create(creator=cls.user, customer=customer, price=1, year=1403, month=1,
+                                        status='success', payment_date=date(2024, 4, 1))
+        Subscription.objects.create(creator=cls.user, customer=customer, price=1, year=1403, month=1)
+        # همه‌ی ردیف‌ها به جز یکی از هر نوع در یک لحظه ثبت شده‌اند
+        tie = timezone.now().replace(microsecond=123456)
+        for model in (Expense, OtherIncome, Subscription):
+            model.objects.update(created_at=tie)
+            model.objects.filter(pk=model.objects.order_by('pk').values('pk')[:1]).update(
+                created_at=tie - timedelta(days=1))
+
+    def expected(self):
+        sources = ((1, Expense.objects.all()), (2, OtherIncome.objects.all()),
+                   (3, Subscription.objects.filter(status='success')))
+        return sorted(((row.created_at, kind, row.pk) for kind, queryset in sources for row in queryset), reverse=True)
+
+    def walk(self, page_size):
+        pages, cursor = [], None
+        while True:
+            page = get_activity_page(self.user, cursor, page_size=page_size)
+            pages.append(page)
+            if not page['next_cursor']:
+                return pages
+            cursor = decode_cursor(page['next_cursor'])
+
+    def keys(self, page):
+        return [(row['created_at'], row['kind'], row['id']) for row in page['activities']]
+
+    def test_older_pages_cover_feed_in_order(self):
+        for page_size in (1, 2, 4, 20):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(page_size)
+                self.assertEqual([key for page in pages for key in self.keys(page)], self.expected())
+                self.assertIsNone(pages[0]['previous_cursor'])
+                self.assertIsNone(pages[-1]['next_cursor'])
+                self.assertTrue(all(page['previous_cursor'] for page in pages[1:]))
+
+    def test_newer_pages_round_trip(self):
+        pages = self.walk(2)
+        # از صفحه‌ی آخر با before به عقب برمی‌گردیم
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = get_activity_page(self.user, decode_cursor(page['previous_cursor']), older=False, page_size=2)
+            self.assertEqual(self.keys(page), self.keys(expected))
+            self.assertTrue(page['next_cursor'])
+        self.assertIsNone(page['previous_cursor'])
+
+    def test_malformed_cursors(self):
+        for value in (None, '', 'abc', '1.2', '1.2.3.4', 'x.1.1', '9' * 30 + '.1.1'):
+            self.assertIsNone(decode_cursor(value), value)
+
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        for params in ({'after': 'abc'}, {'before': '9' * 30 + '.1.1'}):
+            response = self.client.get(reverse('dashboard:main_dashboard'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['activities']), 9)
+
+
+class TransactionPageTests(TestCase):
+    """صفحه‌بندی keyset لیست تراکنش‌های موبایل با تساوی sort_date و اشتراک‌های بدون تاریخ."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        customer = CustomerProfile.objects.create(creator=cls.user, name='ali')
+        # 1403/01 = 2024-03-20 .. 2024-04-19؛ هر روز یک هزینه، یک درآمد و یک اشتراک پرداخت‌شده
+        for day in (date(2024, 3, 20), date(2024, 4, 1), date(2024, 4, 1), date(2024, 4, 19)):
+            Expense.objects.create(creator=cls.user, issue='e', price=1, spending_date=day)
+            OtherIncome.objects.create(creator=cls.user, name='i', price=1, deposit_date=day)
+            Subscription.objects.create(creator=cls.user, customer=customer, price=1, year=1403, month=1,
+                                        status='success', payment_date=day)
+        for _ in range(3):
+            Subscription.objects.create(creator=cls.user, customer=customer, price=1, year=1403, month=1)
+        # خارج از ماه
+        Expense.objects.create(creator=cls.user, issue='e', price=1, spending_date=date(2024, 4, 20))
+
+    def expected(self):
+        rows = [(row.spending_date, 1, row.pk) for row in Expense.objects.filter(spending_date__lt=date(2024, 4, 20))]
+        rows += [(row.deposit_date, 2, row.pk) for row in OtherIncome.objects.all()]
+        rows += [(row.payment_date or NO_DATE, 3, row.pk) for row in Subscription.objects.all()]
+        return sorted(rows, reverse=True)
+
+    def walk(self, page_size):
+        sources = get_transaction_sources(self.user, 1403, 1)
+        pages, cursor = [], None
+        while True:
+            page = get_transaction_page(sources, cursor, page_size)
+            pages.append(page)
+            if not page['next_cursor']:
+                return pages
+            cursor = decode_date_cursor(page['next_cursor'])
+
+    def test_pages_cover_month_in_order(self):
+        for page_size in (1, 2, 5, 12, 15, 50):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(page_size)
+                rows = [row for page in pages for row in page['transactions']]
+                self.assertEqual([(row['sort_date'], row['kind'], row['id']) for row in rows], self.expected())
+                self.assertTrue(all(len(page['transactions']) == page_size for page in pages[:-1]))
+                self.assertTrue(pages[-1]['transactions'])
+                # اشتراک‌های پرداخت‌نشده بدون تاریخ در انتهای لیست
+                self.assertEqual([row['jalali_date'] for row in rows[-3:]], [''] * 3)
+                self.assertEqual(rows[0]['jalali_date'], '1403/01/31')
+
+    def test_malformed_cursors(self):
+        for value in (None, '', 'abc', '1.2', '1.2.3.4', 'x.1.1', '0.1.1', '9' * 30 + '.1.1'):
+            self.assertIsNone(decode_date_cursor(value), value)
+
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        url = reverse('dashboard:mobile_transaction_list')
+        for cursor in ('abc', '9' * 30 + '.1.1'):
+            response = self.client.get(url, {'year': 1403, 'month': 1, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['transactions']), 15)
+
+    def test_partial_page_lists_unpaid_as_not_set(self):
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        page = self.walk(12)[0]
+        response = self.client.get(reverse('dashboard:mobile_transaction_list'),
+                                   {'year': 1403, 'month': 1, 'cursor': page['next_cursor'], 'partial': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'dashboard/mobile/transaction_items.html')
+        self.assertEqual([item['date'] for item in response.context['transactions']], ['Not Set'] * 3)
+        self.assertIsNone(response.context['next_url'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReportCacheTests(TestCase):
+    """کش گزارش‌ها باید تا تغییر بعدی داده‌های کاربر معتبر بماند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.other = User.objects.create_user('other', password='x')
+        cls.bank = BankAccount.objects.create(creator=cls.user, bank_name='Melli')
+        Expense.objects.create(creator=cls.user, issue='server', price=500, spending_date=timezone.now().date(),
+                               source_bank=cls.bank)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        # آدرس‌های داشبورد پیشوند زبان (i18n_patterns) دارند
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+
+    def get(self, name, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'dashboard:{name}'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_second_request_is_cached(self):
+        for name in ('financial_report', 'bank_report', 'mobile_home', 'mobile_financial_report'):
+            with self.subTest(name):
+                _, first = self.get(name)
+                _, second = self.get(name)
+                self.assertLess(second, first)
+
+    def test_writes_bump_data_version(self):
+        version = get_data_version(self.user)
+        expense = Expense.objects.create(creator=self.user, issue='x', price=1, spending_date=timezone.now().date())
+        customer = CustomerProfile.objects.create(creator=self.user, name='ali')
+        expense.delete()
+        customer.delete()
+        self.bank.save()
+        self.assertEqual(get_data_version(self.user), version + 5)
+        self.assertEqual(get_data_version(self.other), 0)
+
+    def test_write_invalidates_cached_report(self):
+        response, _ = self.get('financial_report')
+        self.assertEqual(response.context['total_today_expenses'], 500)
+
+        Expense.objects.create(creator=self.user, issue='domain', price=250, spending_date=timezone.now().date())
+        response, _ = self.get('financial_report')
+        self.assertEqual(response.context['total_today_expenses'], 750)
+
+    def test_other_users_writes_keep_cache(self):
+        self.get('bank_report')
+        Expense.objects.create(creator=self.other, issue='x', price=1, spending_date=timezone.now().date())
+        _, queries = self.get('bank_report')
+        _, cached = self.get('bank_report')
+        self.assertEqual(queries, cached)
+
+
+class RequestBudgetMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+
+    def test_server_timing_header(self):
+        with self.assertLogs('dashboard.performance', 'DEBUG') as logs:
+            response = self.client.get(reverse('dashboard:financial_report'))
+        for metric in ('db;', 'tpl;', 'view;', 'total;'):
+            self.assertIn(metric, response['Server-Timing'])
+        self.assertIn('"view": "dashboard:financial_report"', logs.output[0])
+        self.assertTrue(logs.output[0].startswith('DEBUG:'))
+
+    @override_settings(REQUEST_BUDGETS={'default': {'queries': 1000}, 'dashboard:financial_report': {'queries': 1}})
+    def test_budget_warning(self):
+        with self.assertLogs('dashboard.performance', 'WARNING') as logs:
+            self.client.get(reverse('dashboard:financial_report'))
+        self.assertIn('"over_budget": ["queries"]', logs.output[0])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        response = self.client.get(reverse('dashboard:financial_report'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class ViewBenchmarkMixin:
+    """
+    اجرای همه‌ی ویوهای دسکتاپ و موبایل روی یک مجموعه‌داده و مقایسه با خط پایه
+    (dashboard/benchmarking.py). فقط با DASHBOARD_BENCHMARKS=1 اجرا می‌شود.
+    """
+    dataset = None
+
+    @classmethod
+    def setUpTestData(cls):
+        BenchmarkDataset(users=2, seed=12, **benchmarking.DATASETS[cls.dataset]).build()
+        cls.user = User.objects.get(username='bench0001')
+        cls.user.is_superuser = True
+        cls.user.save()
+        cls.objects = {
+            'expense': Expense.objects.filter(creator=cls.user).first(),
+            'income': OtherIncome.objects.filter(creator=cls.user).first(),
+            'subscription': Subscription.objects.filter(creator=cls.user).first(),
+            'customer': CustomerProfile.objects.filter(creator=cls.user).first(),
+            'bank': BankAccount.objects.filter(creator=cls.user).first(),
+        }
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        # لاگ هر درخواست (RequestBudgetMiddleware) خروجی بنچمارک را شلوغ می‌کند
+        performance_logger = logging.getLogger('dashboard.performance')
+        self.addCleanup(performance_logger.setLevel, performance_logger.level)
+        performance_logger.setLevel(logging.ERROR)
+
+    def url_for(self, name, pk_model, params):
+        kwargs = {'pk': self.objects[pk_model].pk} if pk_model else {}
+        query = {key: self.objects[value].pk if value in self.objects else value for key, value in params.items()}
+        url = reverse(f'dashboard:{name}', kwargs=kwargs)
+        return f"{url}?{'&'.join(f'{key}={value}' for key, value in query.items())}" if query else url
+
+    def test_views_against_baseline(self):
+        repeat = int(os.environ.get('BENCHMARK_REPEAT', 20))
+        baselines = benchmarking.load_baselines().get(connection.vendor, {}).get(self.dataset, {})
+        results, failures = {}, []
+
+        for name, pk_model, params, mobile in benchmarking.VIEWS:
+            key = benchmarking.view_key(name, params)
+            measured = benchmarking.measure(self.client, self.url_for(name, pk_model, params), mobile, repeat)
+            results[key] = measured
+            if key in baselines:
+                failures += [f'{key}: {problem}' for problem in benchmarking.regressions(measured, baselines[key])]
+
+        if os.environ.get('BENCHMARK_UPDATE'):
+            benchmarking.save_baselines(connection.vendor, self.dataset, results)
+        elif failures:
+            self.fail(f'{self.dataset} dataset regressions:\n' + '\n'.join(failures))
+
+
+def _benchmark_enabled(dataset):
+    datasets = os.environ.get('BENCHMARK_DATASETS', 'small,medium,large').split(',')
+    return bool(os.environ.get('DASHBOARD_BENCHMARKS')) and dataset in datasets
+
+
+@tag('benchmark')
+@unittest.skipUnless(_benchmark_enabled('small'), 'set DASHBOARD_BENCHMARKS=1 to run benchmarks')
+class SmallDatasetBenchmarkTests(ViewBenchmarkMixin, TestCase):
+    dataset = 'small'
+
+
+@tag('benchmark')
+@unittest.skipUnless(_benchmark_enabled('medium'), 'set DASHBOARD_BENCHMARKS=1 to run benchmarks')
+class MediumDatasetBenchmarkTests(ViewBenchmarkMixin, TestCase):
+    dataset = 'medium'
+
+
+@tag('benchmark')
+@unittest.skipUnless(_benchmark_enabled('large'), 'set DASHBOARD_BENCHMARKS=1 to run benchmarks')
+class LargeDatasetBenchmarkTests(ViewBenchmarkMixin, TestCase):
+    dataset = 'large'
+
+
+class StreamingBackupTests(TestCase):
+    """mysqldump با یک اسکریپت پایتون جایگزین می‌شود."""
+
+    def fake_dump(self, script):
+        return [sys.executable, '-c', script]
+
+    def test_output_is_gzipped_in_chunks(self):
+        script = "import sys\nfor i in range(20000): sys.stdout.write(f'INSERT INTO t VALUES ({i});\\n')"
+        chunks = list(stream_gzip_dump(chunk_size=4096, command=self.fake_dump(script)))
+        self.assertGreater(len(chunks), 1)
+        dump = gzip.decompress(b''.join(chunks)).decode()
+        self.assertEqual(dump.count('INSERT INTO'), 20000)
+
+    def test_immediate_failure_raises(self):
+        script = "import sys; sys.stderr.write('Access denied'); sys.exit(2)"
+        with self.assertRaisesMessage(BackupError, 'Access denied'):
+            stream_gzip_dump(command=self.fake_dump(script))
+
+    def test_failure_mid_stream_leaves_truncated_gzip(self):
+        script = "import sys; sys.stdout.write('-- dump\\n' * 1000); sys.stdout.flush(); sys.exit(3)"
+        with self.assertLogs('dashboard.backup', 'ERROR'):
+            data = b''.join(stream_gzip_dump(command=self.fake_dump(script)))
+        with self.assertRaises((EOFError, zlib.error)):
+            gzip.decompress(data)
+
+    def test_noisy_stderr_does_not_block_dump(self):
+        # مجموع هشدارها از بافر pipe (۶۴ کیلوبایت) بیشتر است
+        script = ("import sys\nfor i in range(20000):\n"
+                  "    sys.stderr.write(f'Warning: row {i} was truncated\\n')\n"
+                  "    sys.stdout.write(f'INSERT INTO t VALUES ({i});\\n')\n"
+                  "sys.stderr.write('mysqldump: Got error 2013'); sys.exit(2)")
+        stream = stream_gzip_dump(chunk_size=4096, command=self.fake_dump(script))
+        self.addCleanup(stream.close)
+        result = {}
+        with self.assertLogs('dashboard.backup', 'ERROR'):
+            worker = threading.Thread(target=lambda: result.update(data=b''.join(stream)))
+            worker.start()
+            worker.join(60)
+            self.assertFalse(worker.is_alive(), 'mysqldump blocked on a full stderr pipe')
+        # فقط انتهای stderr نگه داشته می‌شود
+        self.assertTrue(stream.error.endswith('Got error 2013'))
+        self.assertLessEqual(len(stream.error), STDERR_TAIL)
+
+    def test_closing_stream_kills_dump(self):
+        script = "import sys\nwhile True: sys.stdout.write('x' * 65536); sys.stdout.flush()"
+        stream = stream_gzip_dump(command=self.fake_dump(script))
+        chunks = iter(stream)
+        next(chunks)
+        with self.assertLogs('dashboard.backup', 'WARNING'):
+            stream.close()
+        self.assertIsNotNone(stream.process.poll())
+
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """
+    شبیه‌ساز sendDocument؛ بدنه‌ی chunked را می‌خواند و فرم multipart را ذخیره
+    می‌کند. پاسخ‌ها به ترتیب از ``server.replies`` و بعد ``server.reply`` می‌آیند.
+    """
+
+    # keep-alive، تا استفاده‌ی دوباره از اتصال Session قابل بررسی باشد
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        chunks = []
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            while size := int(self.rfile.readline().strip(), 16):
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            self.rfile.readline()
+        else:
+            chunks.append(self.rfile.read(int(self.headers['Content-Length'])))
+
+        message = BytesParser().parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + b''.join(chunks))
+        server.requests.append({
+            'path': self.path,
+            'chunks': len(chunks),
+            'fields': {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                       for part in message.get_payload()},
+            'filename': message.get_payload()[-1].get_filename(),
+            'port': self.client_address[1],
+        })
+        reply = server.replies.pop(0) if server.replies else server.reply
+        body = json.dumps(reply).encode()
+        self.send_response(reply.get('error_code', 200) if reply.get('ok') else reply.get('error_code', 400))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(TELEGRAM_RETRY_BACKOFF=0)
+class TelegramBackupTests(TestCase):
+    """آپلود بک‌آپ به یک سرور محلی که نقش Bot API را بازی می‌کند."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTelegramHandler)
+        self.server.requests = []
+        self.server.replies = []
+        self.server.reply = {'ok': True, 'result': {'message_id': 1}}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def send(self, script):
+        return send_backup_to_telegram('caption ✅', token='123:abc', chat_id='42', api_url=self.api_url,
+                                       command=[sys.executable, '-c', script])
+
+    def test_upload_is_streamed_as_multipart(self):
+        script = "import sys\nfor i in range(50000): sys.stdout.write(f'INSERT INTO t VALUES ({i});\\n')"
+        result, = self.send(script)
+        self.assertTrue(result['ok'])
+
+        request, = self.server.requests
+        self.assertEqual(request['path'], '/bot123:abc/sendDocument')
+        self.assertGreater(request['chunks'], 2)
+        self.assertEqual(request['fields']['chat_id'], b'42')
+        self.assertEqual(request['fields']['caption'].decode(), 'caption ✅')
+        self.assertTrue(request['filename'].endswith('.sql.gz'))
+        dump = gzip.decompress(request['fields']['document']).decode()
+        self.assertEqual(dump.count('INSERT INTO'), 50000)
+
+    @override_settings(TELEGRAM_PART_SIZE=20000)
+    def test_large_dump_is_spooled_one_part_at_a_time(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        sizes = []
+        original = backup._file_range
+
+        def file_range(path, offset, length, **kwargs):
+            self.assertEqual(os.path.dirname(path), spool_dir.name)
+            sizes.append(os.path.getsize(path))
+            return original(path, offset, length, **kwargs)
+
+        script = "import sys, random\nfor i in range(20000): sys.stdout.write(f'INSERT ({random.random()});\\n')"
+        with mock.patch('tempfile.tempdir', spool_dir.name), mock.patch.object(backup, '_file_range', file_range):
+            results = self.send(script)
+        self.assertGreater(len(results), 2)
+        self.assertLessEqual(max(sizes), 20000)
+        self.assertEqual(os.listdir(spool_dir.name), [])
+
+        names = [request['filename'] for request in self.server.requests]
+        self.assertEqual(names, [f'{names[0][:-4]}.{n:03d}' for n in range(1, len(results) + 1)])
+        self.assertEqual(self.server.requests[0]['fields']['caption'].decode(), 'caption ✅\n📦 Part 1')
+        self.assertEqual(self.server.requests[-1]['fields']['caption'].decode(),
+                         f'caption ✅\n📦 Part {len(results)}/{len(results)}')
+        dump = gzip.decompress(b''.join(request['fields']['document'] for request in self.server.requests))
+        self.assertEqual(dump.count(b'INSERT'), 20000)
+
+    @override_settings(TELEGRAM_PART_SIZE=20000)
+    def test_dump_failure_holds_back_last_part(self):
+        script = ("import sys, random\nfor i in range(20000): sys.stdout.write(f'INSERT ({random.random()});\\n')\n"
+                  "sys.stdout.flush(); sys.exit(3)")
+        with self.assertLogs('dashboard.backup', 'ERROR'), self.assertRaisesMessage(BackupError, 'exit code 3'):
+            self.send(script)
+        self.assertTrue(self.server.requests)
+        self.assertNotIn('/', self.server.requests[-1]['fields']['caption'].decode())
+
+    def test_telegram_error_raises(self):
+        self.server.reply = {'ok': False, 'description': 'Bad Request: chat not found'}
+        with self.assertRaisesMessage(BackupError, 'chat not found'):
+            self.send("print('-- dump')")
+
+    def test_dump_failure_mid_stream_raises(self):
+        script = "import sys; sys.stdout.write('-- dump\\n' * 1000); sys.stdout.flush(); sys.exit(3)"
+        with self.assertLogs('dashboard.backup', 'ERROR'):
+            with self.assertRaisesMessage(BackupError, 'exit code 3'):
+                self.send(script)
+
+    def test_immediate_dump_failure_skips_upload(self):
+        script = "import sys; sys.stderr.write('Access denied'); sys.exit(2)"
+        with self.assertRaisesMessage(BackupError, 'Dump Error: Access denied'):
+            self.send(script)
+        self.assertEqual(self.server.requests, [])
+
+    def write_backup(self, size):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'backup.sql.gz')
+        with open(path, 'wb') as output:
+            output.write(gzip.compress(os.urandom(size), compresslevel=0))
+        return path
+
+    def upload(self, path, **kwargs):
+        return upload_file_to_telegram(path, 'caption', token='123:abc', chat_id='42', api_url=self.api_url,
+                                       part_size=1000, **kwargs)
+
+    def test_large_file_is_sent_in_parts_over_one_connection(self):
+        path = self.write_backup(2500)
+        results = self.upload(path)
+        self.assertEqual(len(results), 3)
+        self.assertEqual([r['filename'] for r in self.server.requests],
+                         ['backup.sql.gz.001', 'backup.sql.gz.002', 'backup.sql.gz.003'])
+        self.assertEqual(self.server.requests[-1]['fields']['caption'].decode(), 'caption\n📦 Part 3/3')
+        self.assertEqual(len({r['port'] for r in self.server.requests}), 1)
+
+        # قطعه‌های دریافتی با join_parts دوباره همان فایل می‌شوند
+        for request in self.server.requests:
+            with open(os.path.join(os.path.dirname(path), 'received' + request['filename'][6:]), 'wb') as part:
+                part.write(request['fields']['document'])
+        parts = [os.path.join(os.path.dirname(path), f'received.sql.gz.{n:03d}') for n in (3, 1, 2)]
+        output, size = join_parts(parts)
+        with open(output, 'rb') as joined, open(path, 'rb') as original:
+            self.assertEqual(joined.read(), original.read())
+        with self.assertRaisesMessage(BackupError, 'missing: [2]'):
+            join_parts(parts[:2])
+        with self.assertRaisesMessage(BackupError, 'gzip stream is truncated'):
+            join_parts(parts[1:])
+        self.assertFalse(os.path.exists(output))
+
+    def test_transient_errors_are_retried(self):
+        self.server.replies = [
+            {'ok': False, 'error_code': 502, 'description': 'Bad Gateway'},
+            {'ok': False, 'error_code': 429, 'description': 'Too Many Requests', 'parameters': {'retry_after': 0}},
+        ]
+        with self.assertLogs('dashboard.backup', 'WARNING') as logs:
+            results = self.upload(self.write_backup(500))
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(logs.records), 2)
+
+    @override_settings(TELEGRAM_UPLOAD_RETRIES=1)
+    def test_failed_upload_resumes_from_last_sent_part(self):
+        path = self.write_backup(2500)
+        state = path + '.telegram.json'
+        error = {'ok': False, 'error_code': 500, 'description': 'Internal'}
+        self.server.replies = [{'ok': True, 'result': {'message_id': 1}}, error, error]
+        with self.assertLogs('dashboard.backup', 'WARNING'), self.assertRaisesMessage(BackupError, 'HTTP 500'):
+            self.upload(path, state_path=state)
+        with open(state) as state_file:
+            self.assertEqual(len(json.load(state_file)['sent']), 1)
+
+        self.server.requests.clear()
+        results = self.upload(path, state_path=state)
+        self.assertEqual(len(results), 3)
+        self.assertEqual([r['filename'] for r in self.server.requests], ['backup.sql.gz.002', 'backup.sql.gz.003'])
+        self.assertFalse(os.path.exists(state))
+
+
+class RestoreDumpTests(TestCase):
+    """کلاینت mysql با اسکریپتی جایگزین می‌شود که stdin را می‌خواند."""
+
+    COUNT_STDIN = "import sys; data = sys.stdin.buffer.read(); sys.exit(0 if data.count(b'INSERT') == 5000 else 4)"
+
+    def restore(self, data, script, **kwargs):
+        return restore_dump(BytesIO(data), command=[sys.executable, '-c', script], chunk_size=4096, **kwargs)
+
+    def test_plain_and_gzipped_dumps_are_streamed(self):
+        dump = b'INSERT INTO t VALUES (1);\n' * 5000
+        for data, compressed in ((dump, False), (gzip.compress(dump), True)):
+            reported = []
+            result = self.restore(data, self.COUNT_STDIN, compressed=compressed,
+                                  on_progress=lambda done, statements: reported.append((done, statements)))
+            self.assertEqual(result, {'bytes': len(data), 'sql_bytes': len(dump), 'statements': 5000})
+            self.assertEqual(reported[-1][0], len(data))
+
+    def test_every_gzip_member_is_restored(self):
+        dump = b'INSERT INTO t VALUES (1);\n' * 2500
+        data = gzip.compress(dump) + gzip.compress(dump) + b'\x00' * 16
+        result = self.restore(data, self.COUNT_STDIN, compressed=True)
+        self.assertEqual(result['statements'], 5000)
+        self.assertEqual(result['sql_bytes'], 2 * len(dump))
+
+    def test_garbage_after_gzip_member_raises(self):
+        data = gzip.compress(b'INSERT INTO t VALUES (1);\n' * 5000) + b'trailing junk'
+        with self.assertRaisesMessage(BackupError, 'Invalid backup file'):
+            self.restore(data, self.COUNT_STDIN, compressed=True)
+
+    def test_statements_are_counted_across_chunk_boundaries(self):
+        counter = StatementCounter()
+        for data in (b'SELECT 1;', b'\nSELECT 2', b';\nINSERT INTO t VALUES (";");\n', b'SELECT 3;'):
+            counter.feed(data)
+        counter.finish()
+        self.assertEqual(counter.count, 4)
+
+    def test_size_limit_stops_restore(self):
+        dump = gzip.compress(b'INSERT INTO t VALUES (1);\n' * 100000)
+        script = "import sys; sys.stdin.buffer.read()"
+        with self.assertRaisesMessage(BackupError, 'larger than the 1 MB limit') as caught:
+            self.restore(dump, script, compressed=True, max_size=1024 * 1024)
+        # ریستور تراکنشی نیست؛ پیام باید بگوید بخشی از دامپ اجرا شده است
+        self.assertIn('already applied', str(caught.exception))
+
+    def test_mysql_error_raises(self):
+        script = "import sys; sys.stdin.read(); sys.stderr.write('ERROR 1064 syntax'); sys.exit(1)"
+        with self.assertRaisesMessage(BackupError, 'ERROR 1064'):
+            self.restore(b'garbage', script)
+
+    def test_invalid_gzip_raises(self):
+        with self.assertRaisesMessage(BackupError, 'Invalid backup file'):
+            self.restore(b'not gzip at all', self.COUNT_STDIN, compressed=True)
+        with self.assertRaisesMessage(BackupError, 'truncated'):
+            self.restore(gzip.compress(b'INSERT' * 1000)[:-20], self.COUNT_STDIN, compressed=True)
+
+
+class BackgroundJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', password='x')
+        cls.other = User.objects.create_user('other', password='x')
+
+    def setUp(self):
+        translation.activate('en')
+        self.client.force_login(self.user)
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        self.enterContext(override_settings(JOB_FILES_ROOT=files.name))
+
+    def test_jobs_run_one_at_a_time_in_order(self):
+        first = jobs.enqueue('telegram_backup', self.user)
+        second = jobs.enqueue('telegram_backup', self.user)
+
+        self.assertEqual(jobs.claim_next_job().pk, first.pk)
+        # تا کار اول تمام نشده، کار دوم برداشته نمی‌شود
+        self.assertIsNone(jobs.claim_next_job())
+
+        BackgroundJob.objects.filter(pk=first.pk).update(status='success')
+        self.assertEqual(jobs.claim_next_job().pk, second.pk)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_stale_running_job_is_failed(self):
+        job = jobs.enqueue('telegram_backup', self.user)
+        jobs.claim_next_job()
+        BackgroundJob.objects.filter(pk=job.pk).update(heartbeat=timezone.now() - timedelta(hours=1))
+        waiting = jobs.enqueue('telegram_backup', self.user)
+
+        self.assertEqual(jobs.claim_next_job().pk, waiting.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_run_job_records_result_and_removes_upload(self):
+        def handler(job, progress):
+            progress(job.total)
+            return 'restored'
+
+        job = jobs.enqueue('restore', self.user, upload=SimpleUploadedFile('dump.sql', b'SELECT 1;'))
+        path = job.file.path
+        self.assertTrue(os.path.exists(path))
+
+        with mock.patch.dict(jobs.HANDLERS, {'restore': handler}):
+            jobs.run_job(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message, job.progress), ('success', 'restored', 9))
+        self.assertEqual(jobs.job_status(job)['percent'], 100)
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_job_keeps_error_message(self):
+        def handler(job, progress):
+            raise BackupError('Access denied')
+
+        jobs.enqueue('telegram_backup', self.user)
+        with mock.patch.dict(jobs.HANDLERS, {'telegram_backup': handler}), self.assertLogs('dashboard.jobs', 'ERROR'):
+            call_command('run_jobs', '--once', stdout=StringIO())
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.status, job.message), ('failed', 'Access denied'))
+
+    def test_restore_raises_every_data_version(self):
+        Profile.objects.filter(user=self.user).update(data_version=7)
+        Profile.objects.filter(user=self.other).delete()
+
+        def restore(fileobj, **kwargs):
+            # دامپ قدیمی نسخه‌های کوچک‌تری دارد
+            Profile.objects.filter(user=self.user).update(data_version=2)
+            return {'statements': 1}
+
+        job = jobs.enqueue('restore', self.user, upload=SimpleUploadedFile('dump.sql', b'SELECT 1;'))
+        with mock.patch('dashboard.jobs.restore_dump', restore):
+            jobs.run_job(jobs.claim_next_job())
+        self.assertEqual(BackgroundJob.objects.get(pk=job.pk).status, 'success')
+        self.assertEqual(get_data_version(self.user), 8)
+        self.assertEqual(get_data_version(self.other), 8)
+
+    @override_settings(RESTORE_MAX_SIZE=1024)
+    def test_restore_upload_is_validated(self):
+        for upload in (SimpleUploadedFile('dump.txt', b'SELECT 1;'), SimpleUploadedFile('dump.sql', b'x' * 2048)):
+            response = self.client.post(reverse('dashboard:backup_restore'), {'sql_file': upload})
+            self.assertRedirects(response, reverse('dashboard:backup_panel'))
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_backup_views_enqueue_and_report_status(self):
+        response = self.client.post(reverse('dashboard:backup_telegram'))
+        data = response.json()
+        self.assertEqual(data['status'], 'queued')
+        job = BackgroundJob.objects.get(pk=data['job_id'])
+        self.assertEqual(job.kind, 'telegram_backup')
+
+        response = self.client.post(reverse('dashboard:backup_restore'),
+                                    {'sql_file': SimpleUploadedFile('dump.sql.gz', gzip.compress(b'SELECT 1;'))})
+        restore = BackgroundJob.objects.get(kind='restore')
+        self.assertRedirects(response, f"{reverse('dashboard:backup_panel')}?job={restore.pk}")
+
+        status = self.client.get(data['status_url']).json()
+        self.assertEqual((status['id'], status['status'], status['finished']), (job.pk, 'queued', False))
+
+        # کار هر کاربر فقط برای خودش قابل مشاهده است
+        self.assertEqual(jobs.find_user_job(self.user, job.pk), job)
+        self.assertIsNone(jobs.find_user_job(self.other, job.pk))
+
+
+class IncrementalBackupTests(TestCase):
+    """پایه با یک mysqldump ساختگی ساخته و ریستورش با یک mysql ساختگی «اجرا» می‌شود."""
+
+    FAKE_DUMP = [sys.executable, '-c', "print('-- dump')"]
+    FAKE_MYSQL = [sys.executable, '-c', "import sys; sys.stdin.buffer.read()"]
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='x')
+        self.bank = BankAccount.objects.create(creator=self.user, bank_name='Melli')
+        self.customer = CustomerProfile.objects.create(creator=self.user, name='Ali')
+        self.income = OtherIncome.objects.create(creator=self.user, name='Sale', price=5000,
+                                                 deposit_date=date(2024, 4, 1), destination_bank=self.bank)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def read_lines(self, checkpoint):
+        with gzip.open(os.path.join(self.dir, checkpoint.filename), 'rb') as source:
+            return [json.loads(line) for line in source]
+
+    def test_changes_are_logged(self):
+        self.customer.name = 'Ali Rezaei'
+        self.customer.save()
+        income_pk = self.income.pk
+        self.income.delete()
+        logged = list(ChangeLog.objects.values_list('model', 'object_id', 'deleted'))
+        self.assertEqual(logged[-2:], [
+            ('dashboard.customerprofile', self.customer.pk, False), ('dashboard.otherincome', income_pk, True),
+        ])
+
+    def test_incremental_backup_holds_only_changed_rows(self):
+        base = incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+        self.assertEqual(incremental.read_base_header(os.path.join(self.dir, base.filename))['change_id'],
+                         base.change_id)
+        self.assertEqual(list(ChangeLog.objects.values_list('id', flat=True)), [base.change_id])
+        self.assertIsNone(incremental.create_incremental_backup(self.dir))
+
+        expense = Expense.objects.create(creator=self.user, issue='Server', price=700, spending_date=date(2024, 4, 2))
+        self.customer.name = 'Ali Rezaei'
+        self.customer.save()
+        self.customer.save()
+        income_pk = self.income.pk
+        self.income.delete()
+
+        checkpoint = incremental.create_incremental_backup(self.dir)
+        header, *records = self.read_lines(checkpoint)
+        self.assertEqual((header['base'], header['from_change']), (base.filename, base.change_id))
+        self.assertEqual(header['to_change'], checkpoint.change_id)
+        self.assertEqual([(r['model'], r['pk'], r.get('deleted', False)) for r in records], [
+            ('dashboard.customerprofile', self.customer.pk, False),
+            ('dashboard.expense', expense.pk, False),
+            ('dashboard.otherincome', income_pk, True),
+        ])
+        self.assertEqual(records[0]['fields']['name'], 'Ali Rezaei')
+
+    def test_replay_restores_base_and_incrementals(self):
+        base = incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+        expense = Expense.objects.create(creator=self.user, issue='Server', price=700, spending_date=date(2024, 4, 2),
+                                         source_bank=self.bank)
+        first = incremental.create_incremental_backup(self.dir)
+        self.customer.name = 'Ali Rezaei'
+        self.customer.save()
+        income_pk = self.income.pk
+        self.income.delete()
+        second = incremental.create_incremental_backup(self.dir)
+
+        # «ریستور پایه» ساختگی است؛ حالت پایه دستی برگردانده می‌شود
+        Expense.objects.all().delete()
+        CustomerProfile.objects.filter(pk=self.customer.pk).update(name='Ali')
+        OtherIncome.objects.create(pk=income_pk, creator=self.user, name='Sale', price=5000,
+                                   deposit_date=date(2024, 4, 1), destination_bank=self.bank)
+
+        paths = [os.path.join(self.dir, checkpoint.filename) for checkpoint in (base, first, second)]
+        incremental.replay_backups(paths[0], paths[1:], command=self.FAKE_MYSQL)
+
+        self.assertEqual(Expense.objects.get().pk, expense.pk)
+        self.assertEqual(CustomerProfile.objects.get(pk=self.customer.pk).name, 'Ali Rezaei')
+        self.assertFalse(OtherIncome.objects.exists())
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, -700)
+        # بعد از replay زنجیره‌ی جدیدی لازم است
+        self.assertFalse(BackupCheckpoint.objects.exists())
+        self.assertTrue(incremental.needs_full_backup())
+
+    def test_replay_deletes_before_recreating_unique_names(self):
+        base = incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+        old_customer, old_bank = self.customer.pk, self.bank.pk
+        self.customer.delete()
+        self.bank.delete()
+        customer = CustomerProfile.objects.create(creator=self.user, name='Ali')
+        bank = BankAccount.objects.create(creator=self.user, bank_name='Melli')
+        checkpoint = incremental.create_incremental_backup(self.dir)
+
+        # حالت پایه: ردیف‌های قدیمی با همان نام‌ها
+        CustomerProfile.objects.filter(pk=customer.pk).delete()
+        BankAccount.objects.filter(pk=bank.pk).delete()
+        CustomerProfile.objects.create(pk=old_customer, creator=self.user, name='Ali')
+        BankAccount.objects.create(pk=old_bank, creator=self.user, bank_name='Melli')
+
+        paths = [os.path.join(self.dir, c.filename) for c in (base, checkpoint)]
+        incremental.replay_backups(paths[0], paths[1:], command=self.FAKE_MYSQL)
+        self.assertEqual(list(CustomerProfile.objects.values_list('pk', flat=True)), [customer.pk])
+        self.assertEqual(list(BankAccount.objects.values_list('pk', flat=True)), [bank.pk])
+
+    def test_new_users_are_replayed(self):
+        base = incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+        other = User.objects.create_user('other', password='secret')
+        bank = BankAccount.objects.create(creator=other, bank_name='Mellat')
+        checkpoint = incremental.create_incremental_backup(self.dir)
+        self.assertEqual([r['model'] for r in self.read_lines(checkpoint)[1:]],
+                         ['auth.user', 'dashboard.profile', 'dashboard.bankaccount'])
+
+        # حالت پایه: کاربر دوم هنوز وجود ندارد
+        other.delete()
+        paths = [os.path.join(self.dir, c.filename) for c in (base, checkpoint)]
+        incremental.replay_backups(paths[0], paths[1:], command=self.FAKE_MYSQL)
+
+        other = User.objects.get(username='other')
+        self.assertTrue(other.check_password('secret'))
+        self.assertEqual(Profile.objects.filter(user=other).count(), 1)
+        self.assertEqual(BankAccount.objects.get(creator=other).pk, bank.pk)
+
+    def test_untracked_writes_reset_the_chain(self):
+        def restore(fileobj, **kwargs):
+            return {'statements': 1}
+
+        job = mock.MagicMock()
+        job.file.name = 'dump.sql'
+        paths = {
+            'seed': lambda: BenchmarkDataset(users=1, customers=2, subscriptions=2, expenses=2, incomes=2,
+                                             months=1, end_year=1403, end_month=1).build(),
+            'restore job': lambda: jobs.run_restore(job, None),
+        }
+        for name, run in paths.items():
+            with self.subTest(name):
+                incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+                Expense.objects.create(creator=self.user, issue='a', price=1)
+                with mock.patch('dashboard.jobs.restore_dump', restore):
+                    run()
+                self.assertFalse(BackupCheckpoint.objects.exists())
+                self.assertFalse(ChangeLog.objects.exists())
+                with self.assertRaisesMessage(BackupError, 'No full backup yet'):
+                    incremental.create_incremental_backup(self.dir)
+
+    def test_broken_chain_is_rejected(self):
+        base = incremental.create_full_backup(self.dir, command=self.FAKE_DUMP)
+        Expense.objects.create(creator=self.user, issue='a', price=1)
+        first = incremental.create_incremental_backup(self.dir)
+        Expense.objects.create(creator=self.user, issue='b', price=2)
+        second = incremental.create_incremental_backup(self.dir)
+
+        base_path, first_path, second_path = (os.path.join(self.dir, c.filename) for c in (base, first, second))
+        with self.assertRaisesMessage(BackupError, 'missing or out-of-order'):
+            incremental.check_chain(base_path, [second_path])
+        with self.assertRaisesMessage(BackupError, 'is not a full backup'):
+            incremental.check_chain(first_path, [second_path])
+        self.assertEqual(len(incremental.check_chain(base_path, [first_path, second_path])), 2)
+
+
+class LogicalBackupTests(TransactionTestCase):
+    """خروجی موازی می‌گیرد (هر thread اتصال خودش را دارد، پس TransactionTestCase) و برمی‌گرداند."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='x')
+        self.bank = BankAccount.objects.create(creator=self.user, bank_name='ملی')
+        self.referrer = CustomerProfile.objects.create(creator=self.user, name='Reza')
+        self.customer = CustomerProfile.objects.create(creator=self.user, name='Ali', referred_by=self.referrer)
+        self.subscription = Subscription.objects.create(
+            creator=self.user, customer=self.customer, giga=10, price=3000, year=1403, month=1,
+            status='success', payment_date=date(2024, 3, 21), destination_bank=self.bank)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def test_export_and_import_round_trip(self):
+        created_at = self.customer.created_at
+        manifest = logical_backup.export_tables(self.dir, threads=4, chunk_size=1)
+        labels = [table['model'] for table in manifest['tables']]
+        self.assertLess(labels.index('auth.user'), labels.index('dashboard.customerprofile'))
+        self.assertLess(labels.index('dashboard.customerprofile'), labels.index('dashboard.subscription'))
+        rows = {table['model']: table['rows'] for table in manifest['tables']}
+        self.assertEqual(rows['dashboard.customerprofile'], 2)
+
+        Subscription.objects.all().delete()
+        CustomerProfile.objects.filter(pk=self.referrer.pk).update(name='changed')
+        BankAccount.objects.create(creator=self.user, bank_name='extra')
+        version = get_data_version(self.user)
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        url = reverse('dashboard:customer_referrers')
+        etag = self.client.get(url)['ETag']
+        incremental.create_full_backup(self.dir, command=[sys.executable, '-c', "print('-- dump')"])
+
+        logical_backup.import_tables(self.dir, batch_size=1)
+        # ردیف‌های وارد‌شده در ChangeLog نیستند؛ بک‌آپ بعدی باید کامل باشد
+        self.assertFalse(BackupCheckpoint.objects.exists())
+        # نسخه‌ی داده از هر نسخه‌ی قبل از import بزرگ‌تر است (ETag قدیمی 304 نمی‌گیرد)
+        self.assertEqual(get_data_version(self.user), version + 1)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(list(BankAccount.objects.values_list('bank_name', flat=True)), ['ملی'])
+        customer = CustomerProfile.objects.get(pk=self.customer.pk)
+        self.assertEqual(customer.referred_by.name, 'Reza')
+        self.assertEqual(customer.created_at, created_at)
+        subscription = Subscription.objects.get(pk=self.subscription.pk)
+        self.assertEqual((subscription.price, subscription.payment_date), (3000, date(2024, 3, 21)))
+        # کلید اصلی بعدی بعد از import تکراری نیست
+        self.assertGreater(BankAccount.objects.create(creator=self.user, bank_name='new').pk, self.bank.pk)
+
+    def test_import_restores_forward_self_references_and_user_tables(self):
+        # معرف بعد از مشتری ساخته شده و شناسه‌ی بزرگ‌تری دارد
+        late = CustomerProfile.objects.create(creator=self.user, name='Sara')
+        CustomerProfile.objects.filter(pk=self.referrer.pk).update(referred_by=late)
+        group = Group.objects.create(name='staff')
+        self.user.groups.add(group)
+        LogEntry.objects.create(user=self.user, object_repr='x', action_flag=1)
+        logical_backup.export_tables(self.dir, threads=1)
+
+        other = User.objects.create_user('other', password='x')
+        other.groups.add(group)
+        LogEntry.objects.create(user=other, object_repr='y', action_flag=1)
+
+        logical_backup.import_tables(self.dir, batch_size=1)
+        self.assertEqual(CustomerProfile.objects.get(pk=self.referrer.pk).referred_by_id, late.pk)
+        self.assertEqual(CustomerProfile.objects.get(pk=self.customer.pk).referred_by_id, self.referrer.pk)
+        # ردیف‌های وابسته به کاربر حذف‌شده یتیم نمی‌مانند
+        self.assertEqual(list(User.groups.through.objects.values_list('user_id', 'group_id')),
+                         [(self.user.pk, group.pk)])
+        self.assertEqual(list(LogEntry.objects.values_list('user_id', flat=True)), [self.user.pk])
+
+    def test_import_rejects_other_directories(self):
+        with self.assertRaisesMessage(BackupError, 'Cannot read manifest.json'):
+            logical_backup.import_tables(self.dir)
+
+
+class CustomerListTests(TestCase):
+    """جستجو و صفحه‌بندی لیست مشتریان در دیتابیس."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        referrer = CustomerProfile.objects.create(creator=cls.user, name='referrer')
+        for i in range(7):
+            customer = CustomerProfile.objects.create(creator=cls.user, name=f'customer-{i}', referred_by=referrer)
+            for month in range(1, i + 1):
+                Subscription.objects.create(creator=cls.user, customer=customer, giga=1, price=1, year=1403, month=month)
+        CustomerProfile.objects.create(creator=User.objects.create_user('other', password='x'), name='customer-x')
+
+    def test_keyset_pages_cover_all_matches(self):
+        names, after = [], None
+        while True:
+            page = get_customer_page(self.user, 'CUSTOMER', after=after, page_size=3)
+            names += [customer.name for customer in page['customers']]
+            if not page['next_cursor']:
+                break
+            after = page['next_cursor']
+        self.assertEqual(names, [f'customer-{i}' for i in range(7)])
+
+        page = get_customer_page(self.user, 'customer', before='customer-3', page_size=3)
+        self.assertEqual([c.name for c in page['customers']], ['customer-0', 'customer-1', 'customer-2'])
+        self.assertIsNone(page['previous_cursor'])
+        self.assertEqual(page['next_cursor'], 'customer-2')
+
+    def test_view_renders_one_page_with_constant_queries(self):
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        url = reverse('dashboard:customer_profile_list')
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url, {'q': 'customer'})
+        for i in range(7, 20):
+            CustomerProfile.objects.create(creator=self.user, name=f'customer-{i}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'q': 'customer'})
+        self.assertEqual(len(queries), len(before))
+
+        customers = {customer.name: customer for customer in response.context['customers']}
+        self.assertNotIn('customer-x', customers)
+        self.assertEqual(customers['customer-6'].subscription_count, 6)
+        self.assertEqual(customers['customer-6'].referred_by.name, 'referrer')
+        self.assertEqual(response.context['customer_count'], 20)
+        self.assertEqual(self.client.get(url, {'q': 'referrer'}).context['customer_count'], 1)
+        self.assertEqual(self.client.get(url).context['customer_count'], 21)
+
+
+    def test_search_matches_any_word_prefix(self):
+        ali = CustomerProfile.objects.create(creator=self.user, name='Ali Rezaei', phone_number='09121234567')
+        reza = CustomerProfile.objects.create(creator=self.user, name='Reza Karimi')
+        for query, expected in (('rez', [ali, reza]), ('rezaei ali', [ali]), ('0912', [ali]), ('ezaei', [])):
+            self.assertEqual(list(search_customers(self.user, query).order_by('pk')), expected, query)
+
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:mobile_customer_list'), {'q': 'Rezaei'})
+        self.assertEqual(list(response.context['customers']), [ali])
+        # تکمیل خودکار همچنان فقط پیشوند کل نام است
+        data = self.client.get(reverse('dashboard:autocomplete', args=['customers']), {'q': 'rez'}).json()
+        self.assertEqual([result['id'] for result in data['results']], [reza.pk])
+
+class AutocompleteTests(TestCase):
+    """فرم اشتراک فقط گزینه‌ی انتخاب‌شده را رندر می‌کند و بقیه از endpoint جستجو می‌آیند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.customers = [CustomerProfile.objects.create(creator=cls.user, name=f'ali-{i:02d}') for i in range(30)]
+        CustomerProfile.objects.create(creator=cls.user, name='reza')
+        CustomerProfile.objects.create(creator=User.objects.create_user('other', password='x'), name='ali-other')
+        cls.bank = BankAccount.objects.create(creator=cls.user, bank_name='Melli')
+
+    def setUp(self):
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+
+    def search(self, source, **params):
+        return self.client.get(reverse('dashboard:autocomplete', args=[source]), params).json()
+
+    def test_prefix_search_is_limited_and_scoped(self):
+        data = self.search('customers', q='ALI', limit=5)
+        self.assertEqual([r['text'] for r in data['results']], [f'ali-{i:02d}' for i in range(5)])
+        self.assertTrue(data['more'])
+        self.assertEqual(len(self.search('customers', q='ali', limit=1000)['results']), 30)
+        self.assertEqual(self.search('customers', q='eza')['results'], [])
+        self.assertEqual(self.search('banks', q='me')['results'], [{'id': self.bank.pk, 'text': 'Melli'}])
+        self.assertEqual(self.client.get(reverse('dashboard:autocomplete', args=['users'])).status_code, 404)
+
+    def test_form_renders_only_selected_options(self):
+        subscription = Subscription.objects.create(creator=self.user, customer=self.customers[3], giga=1, price=1,
+                                                   year=1403, month=1, referrer=self.customers[7])
+        html = SubscriptionForm(instance=subscription, user=self.user)['customer'].as_widget()
+        self.assertIn('data-autocomplete-url="/en/ajax/autocomplete/customers/"', html)
+        self.assertIn('ali-03', html)
+        self.assertNotIn('ali-04', html)
+
+        form = SubscriptionForm({'customer': self.customers[5].pk, 'year': 1403, 'month': 2, 'price': 10, 'giga': 1,
+                                 'status': 'pending', 'referrer': 'abc'}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('referrer', form.errors)
+        self.assertIn('ali-05', form['customer'].as_widget())
+
+
+class GlobalSearchTests(TestCase):
+    """ایندکس SearchToken با هر ذخیره/حذف به‌روز می‌شود و جستجو رتبه‌بندی و صفحه‌بندی می‌کند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.customer = CustomerProfile.objects.create(creator=cls.user, name='Server Rental', phone_number='0912')
+        cls.expense = Expense.objects.create(creator=cls.user, issue='Hetzner', description='server rental fee')
+        cls.income = OtherIncome.objects.create(creator=cls.user, name='Ali', description='rental refund')
+        CustomerProfile.objects.create(creator=User.objects.create_user('other', password='x'), name='server')
+
+    def titles(self, query, **kwargs):
+        return [result['title'] for result in search(self.user, query, **kwargs)]
+
+    def test_ranked_prefix_and_all_terms(self):
+        # وزن نام بیشتر از توضیحات است
+        self.assertEqual(self.titles('serv rent'), ['Server Rental', str(self.expense)])
+        self.assertEqual(self.titles('rental'), ['Server Rental', str(self.expense), 'Ali'])
+        self.assertEqual(self.titles('refund server'), [])
+        self.assertEqual(self.titles('   '), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.expense.issue = 'Domain'
+        self.expense.save()
+        self.assertEqual(self.titles('hetzner'), [])
+        self.assertEqual(self.titles('domain'), [str(self.expense)])
+
+        self.income.delete()
+        self.assertFalse(SearchToken.objects.filter(model='income').exists())
+
+        SearchToken.objects.all().delete()
+        rebuild_search_index()
+        self.assertEqual(self.titles('rental'), ['Server Rental', str(self.expense)])
+
+    def test_pagination_and_view(self):
+        for i in range(5):
+            CustomerProfile.objects.create(creator=self.user, name=f'Bulk {i}')
+        page = search(self.user, 'bulk', page=2, page_size=3)
+        self.assertEqual(page.paginator.count, 5)
+        self.assertEqual(len(page.object_list), 2)
+
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:global_search'), {'q': 'server'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['object'] for r in response.context['results']], [self.customer, self.expense])
+
+
+class PersianSearchKeyTests(TestCase):
+    """search_key شکل یکسان‌شده‌ی نام است و جستجوهای پیشوندی روی آن انجام می‌شوند."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.customer = CustomerProfile.objects.create(creator=cls.user, name='علي‌رضا كريمي ۱۲')
+
+    def test_normalizer(self):
+        self.assertEqual(normalize_search_key('  علي‌رضا  كريمي ١٢ '), 'علیرضا کریمی 12')
+        self.assertEqual(normalize_search_key('Melli  Bank'), 'melli bank')
+        self.assertEqual(normalize_search_key(None), '')
+
+    def test_keys_filled_on_save_and_backfill(self):
+        self.assertEqual(self.customer.search_key, 'علیرضا کریمی 12')
+        self.customer.name = 'رضا'
+        self.customer.save(update_fields=['name'])
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.search_key, 'رضا')
+        self.assertEqual(BankAccount.objects.create(creator=self.user, bank_name='ملّي').search_key, 'ملی')
+
+        CustomerProfile.objects.filter(pk=self.customer.pk).update(search_key='')
+        self.assertEqual(rebuild_search_keys([self.user]), 1)
+        self.assertEqual(CustomerProfile.objects.get(pk=self.customer.pk).search_key, 'رضا')
+
+    def test_prefix_lookups_ignore_spelling_variants(self):
+        for query in ('علیرضا', 'علي‌رضا ک', 'علی'):
+            page = get_customer_page(self.user, query)
+            self.assertEqual(page['customers'], [self.customer], query)
+        self.assertEqual(get_customer_page(self.user, 'رضا')['customers'], [])
+
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('dashboard:autocomplete', args=['customers']), {'q': 'علي‌ر'}).json()
+        self.assertEqual(data['results'], [{'id': self.customer.pk, 'text': self.customer.name}])
+
+
+class CustomerReferrersTests(TestCase):
+    """نقشه‌ی مشتری ← معرف با یک درخواست و ETag نسخه‌ی داده‌ی کاربر."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.referrer = CustomerProfile.objects.create(creator=cls.user, name='referrer')
+        cls.customer = CustomerProfile.objects.create(creator=cls.user, name='customer', referred_by=cls.referrer)
+        CustomerProfile.objects.create(creator=cls.user, name='no referrer')
+        other = User.objects.create_user('other', password='x')
+        CustomerProfile.objects.create(creator=other, name='foreign',
+                                       referred_by=CustomerProfile.objects.create(creator=other, name='x'))
+
+    def setUp(self):
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard:customer_referrers')
+
+    def test_map_is_scoped_and_revalidated_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json(), {'referrers': {
+            str(self.customer.pk): {'id': self.referrer.pk, 'text': 'referrer'}}})
+        self.assertIn('private', response['Cache-Control'])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.customer.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'referrers': {}})
+        self.assertNotEqual(response['ETag'], etag)
@@ -19,11 +19,14 @@ from .views import (
     add_transaction_view,
     expense_edit_view,
     other_income_edit_view,
-    get_customer_details,
+    customer_referrers_view,
+    autocomplete_view,
+    global_search_view,
     backup_panel,
     download_backup,
     telegram_backup,
     restore_db,
+    backup_job_status,
     main_dashboard_view,
     bank_report_view,
 )
@@ -138,14 +141,18 @@ urlpatterns = [
     path('expense/<int:pk>/edit/', expense_edit_view, name='expense_edit'),
     path('income/<int:pk>/edit/', other_income_edit_view, name='other_income_edit'),
 
+    path('search/', global_search_view, name='global_search'),
+
     # AJAX URLs
-    path('ajax/get-customer-details/', get_customer_details, name='get_customer_details'),
+    path('ajax/customer-referrers/', customer_referrers_view, name='customer_referrers'),
+    path('ajax/autocomplete/<str:source>/', autocomplete_view, name='autocomplete'),
 
     # backup url
     path('backup/panel/', backup_panel, name='backup_panel'),
     path('backup/download/', download_backup, name='backup_download'),
     path('backup/telegram/', telegram_backup, name='backup_telegram'),
     path('backup/restore/', restore_db, name='backup_restore'),
+    path('backup/jobs/<int:pk>/', backup_job_status, name='backup_job_status'),
 
     # Main Dashboard (New Home)
     path('', main_dashboard_view, name='main_dashboard'),
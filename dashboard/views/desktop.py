@@ -1,7 +1,4 @@
 import os
-import subprocess
-import requests
-import gzip
 from datetime import datetime
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -11,17 +8,17 @@ from django.contrib import messages
 from django.utils.translation import gettext as _
 from django.urls import reverse_lazy, reverse
 from django.db.models import Sum, Count, Q
-from django.db.models.functions import TruncMonth, TruncDay
+from django.db.models.functions import TruncDay
 from django.utils import timezone
 from itertools import chain
 from operator import attrgetter
 from datetime import timedelta
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_POST
 from django.template.defaulttags import register
 import jdatetime
 import pandas as pd
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 # بقیه ایمپورت‌ها مثل قبل (Sum, chain, timezone, render, etc.)
 from dashboard.forms.mobile_forms import MobileAuthenticationForm
 
@@ -33,8 +30,19 @@ from dashboard.forms import (
 )
 from dashboard.models import (
     Expense, OtherIncome, Profile, Subscription, CustomerProfile,
-    BankAccount
+    BankAccount, BackgroundJob
 )
+from dashboard.activity import decode_cursor, get_activity_page
+from dashboard.backup import BackupError, backup_filename, stream_gzip_dump
+from dashboard.autocomplete import SOURCES as AUTOCOMPLETE_SOURCES, autocomplete, parse_limit
+from dashboard.customers import get_customer_page, get_customer_referrers, search_customers
+from dashboard.jobs import enqueue, find_user_job, job_status, validate_restore_upload
+from dashboard.search import search
+from dashboard.reports import (
+    get_bank_flows, get_daily_series, get_monthly_series, get_report_totals, get_subscription_month_totals,
+    get_summary_totals, jalali_month_range, jalali_year_range
+)
+from dashboard.report_cache import cached_report, get_data_version
 
 from dashboard.views.mobile import mobile_home_view, mobile_add_transaction_view  # <--- این را اضافه کن
 
@@ -43,11 +51,6 @@ from dashboard.views.mobile import mobile_home_view, mobile_add_transaction_view
 # تنظیمات سیستم بک‌آپ (از متغیرهای محیطی)
 # ===================================================================
 DB_NAME = os.environ.get('DB_NAME')
-DB_USER = os.environ.get('DB_USER')
-DB_PASSWORD = os.environ.get('DB_PASSWORD')
-DB_HOST = os.environ.get('DB_HOST', 'db')  # نام سرویس دیتابیس در docker-compose
-BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
-CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 
 
 @register.filter
@@ -131,29 +134,16 @@ def add_transaction_view(request):
     other_incomes_base = OtherIncome.objects.filter(creator=request.user)
 
     year, month = int(selected_year), int(selected_month)
-    start_date_jalali = jdatetime.date(year, month, 1)
-    days_in_month = 31 if month < 7 else (30 if month < 12 else (30 if start_date_jalali.isleap() else 29))
-    end_date_jalali = jdatetime.date(year, month, days_in_month)
-    start_gregorian = start_date_jalali.togregorian()
-    end_gregorian = end_date_jalali.togregorian()
+    start_gregorian, end_gregorian = jalali_month_range(year, month)
 
     expenses_in_month = expenses_base.filter(spending_date__range=[start_gregorian, end_gregorian])
     other_incomes_in_month = other_incomes_base.filter(deposit_date__range=[start_gregorian, end_gregorian])
 
-    subscription_incomes_in_month = Subscription.objects.filter(
-        creator=request.user,
-        status='success',
-        payment_date__range=[start_gregorian, end_gregorian]
-    )
-
-    total_subscription_income = subscription_incomes_in_month.aggregate(total=Sum('price'))['total'] or 0
-    total_other_income = other_incomes_in_month.aggregate(total=Sum('price'))['total'] or 0
-    total_income_monthly = total_subscription_income + total_other_income
-
-    total_expenses_monthly = expenses_in_month.aggregate(total=Sum('price'))['total'] or 0
-    net_profit_monthly = total_income_monthly - total_expenses_monthly
-
-    server_costs_monthly = expenses_in_month.filter(is_server_cost=True).aggregate(total=Sum('price'))['total'] or 0
+    totals = get_report_totals(request.user, start_gregorian, end_gregorian)
+    total_income_monthly = totals['total_income']
+    total_expenses_monthly = totals['total_expenses']
+    net_profit_monthly = totals['net_profit']
+    server_costs_monthly = totals['server_costs']
     top_spending_monthly = expenses_in_month.values('issue').annotate(total=Sum('price'),
                                                                       count=Count('issue')).order_by('-total')[:5]
 
@@ -254,23 +244,23 @@ def subscription_dashboard_view(request):
         month=selected_month
     ).select_related('customer', 'referrer', 'destination_bank').order_by('customer__name')
 
+    # همین شرط‌ها برای مجموع حجم هم استفاده می‌شوند
+    list_filter = Q()
     if status_filter == 'paid':
-        subscriptions_query = subscriptions_query.filter(status='success')
+        list_filter &= Q(status='success')
     elif status_filter == 'unpaid':
-        subscriptions_query = subscriptions_query.filter(status='pending')
+        list_filter &= Q(status='pending')
 
     if search_query:
-        subscriptions_query = subscriptions_query.filter(
-            Q(customer__name__icontains=search_query) |
-            Q(referrer__name__icontains=search_query)
-        )
-
-    all_subscriptions_for_month = Subscription.objects.filter(creator=request.user, year=selected_year,
-                                                              month=selected_month)
-    total_giga = subscriptions_query.aggregate(total=Sum('giga'))['total'] or 0
-    paid_amount = all_subscriptions_for_month.filter(status='success').aggregate(total=Sum('price'))['total'] or 0
-    unpaid_amount = all_subscriptions_for_month.filter(status='pending').aggregate(total=Sum('price'))['total'] or 0
-    total_amount = paid_amount + unpaid_amount
+        list_filter &= Q(customer__name__icontains=search_query) | Q(referrer__name__icontains=search_query)
+
+    subscriptions_query = subscriptions_query.filter(list_filter)
+
+    month_totals = get_subscription_month_totals(request.user, selected_year, selected_month, giga_filter=list_filter)
+    total_giga = month_totals['giga']
+    paid_amount = month_totals['paid']
+    unpaid_amount = month_totals['unpaid']
+    total_amount = month_totals['total']
 
     context = {
         'form': form,
@@ -323,8 +313,11 @@ def subscription_delete_view(request, pk):
 
 @login_required
 def customer_profile_list_view(request):
-    customers = CustomerProfile.objects.filter(creator=request.user).order_by('name')
-    customer_count = customers.count()
+    # جستجو و صفحه‌بندی (keyset روی نام) در دیتابیس؛ هر درخواست فقط یک صفحه
+    query = request.GET.get('q', '').strip()
+    page = get_customer_page(request.user, query, after=request.GET.get('after'), before=request.GET.get('before'))
+    # تعداد مشتریان مطابق جستجو (بدون جستجو: همه)
+    customer_count = search_customers(request.user, query).count()
 
     if request.method == 'POST':
         form = CustomerProfileForm(request.POST, user=request.user)
@@ -339,7 +332,10 @@ def customer_profile_list_view(request):
 
     return render(request, 'dashboard/desktop/customer_profile_list.html', {
         'form': form,
-        'customers': customers,
+        'customers': page['customers'],
+        'next_cursor': page['next_cursor'],
+        'previous_cursor': page['previous_cursor'],
+        'query': query,
         'customer_count': customer_count
     })
 
@@ -362,59 +358,25 @@ def edit_customer_profile(request, pk):
 # ===================================================================
 # ویو گزارش مالی
 # ===================================================================
-@login_required
-def financial_report_view(request):
-    today_jalali = jdatetime.date.today()
-    selected_year = request.GET.get('year', str(today_jalali.year))
-    selected_month = request.GET.get('month')
-
-    expenses_base = Expense.objects.filter(creator=request.user)
-    other_incomes_base = OtherIncome.objects.filter(creator=request.user)
-    subscriptions_base = Subscription.objects.filter(creator=request.user, status='success')
-
-    expenses_stats = expenses_base
-    other_incomes_stats = other_incomes_base
-    subscription_incomes_stats = subscriptions_base
+def _financial_report_data(user, selected_year, selected_month, timeframe, today_gregorian):
+    """بخش‌های محاسباتی گزارش مالی (قابل کش شدن)."""
+    expenses_stats = Expense.objects.filter(creator=user)
 
+    summary_year = summary_month = None
     if selected_year and selected_year.isdigit():
-        year = int(selected_year)
-        start_date_jalali = jdatetime.date(year, 1, 1)
-        end_date_jalali = jdatetime.date(year, 12, 29)
-        if jdatetime.date(year, 1, 1).isleap():
-            end_date_jalali = jdatetime.date(year, 12, 30)
-
-        start_gregorian = start_date_jalali.togregorian()
-        end_gregorian = end_date_jalali.togregorian()
+        year = summary_year = int(selected_year)
+        start_gregorian, end_gregorian = jalali_year_range(year)
 
         if selected_month and selected_month.isdigit():
-            month = int(selected_month)
-            start_date_jalali = jdatetime.date(year, month, 1)
-            days_in_month = 31 if month < 7 else (30 if month < 12 else (30 if start_date_jalali.isleap() else 29))
-            end_date_jalali = jdatetime.date(year, month, days_in_month)
-            start_gregorian = start_date_jalali.togregorian()
-            end_gregorian = end_date_jalali.togregorian()
+            summary_month = int(selected_month)
+            start_gregorian, end_gregorian = jalali_month_range(year, summary_month)
 
         expenses_stats = expenses_stats.filter(spending_date__range=[start_gregorian, end_gregorian])
-        other_incomes_stats = other_incomes_stats.filter(deposit_date__range=[start_gregorian, end_gregorian])
-        subscription_incomes_stats = subscription_incomes_stats.filter(
-            payment_date__range=[start_gregorian, end_gregorian])
 
-    total_subscription_income = subscription_incomes_stats.aggregate(total=Sum('price'))['total'] or 0
-    total_other_income = other_incomes_stats.aggregate(total=Sum('price'))['total'] or 0
-    total_income = total_subscription_income + total_other_income
-    total_expenses = expenses_stats.aggregate(total=Sum('price'))['total'] or 0
-    net_profit = total_income - total_expenses
+    # شاخص‌های دوره از جدول خلاصه‌ی ماهانه و آمار امروز از تراکنش‌های امروز
+    totals = get_summary_totals(user, summary_year, summary_month)
+    today_totals = get_report_totals(user, today_gregorian, today_gregorian, today=today_gregorian)
 
-    today_gregorian = timezone.now().date()
-    total_today_income = (Subscription.objects.filter(creator=request.user, status='success',
-                                                      payment_date=today_gregorian).aggregate(s=Sum('price'))[
-                              's'] or 0) + \
-                         (OtherIncome.objects.filter(creator=request.user, deposit_date=today_gregorian).aggregate(
-                             s=Sum('price'))['s'] or 0)
-    total_today_expenses = \
-        Expense.objects.filter(creator=request.user, spending_date=today_gregorian).aggregate(s=Sum('price'))['s'] or 0
-
-    timeframe = request.GET.get('timeframe', 'monthly')
     chart_labels, income_data, expense_data = [], [], []
 
     chart_year = int(selected_year)
@@ -423,55 +385,21 @@ def financial_report_view(request):
 
     if timeframe == 'daily' and selected_month and selected_month.isdigit():
         chart_month = int(selected_month)
-        start_date = jdatetime.date(chart_year, chart_month, 1)
-        days_in_month = 31 if chart_month < 7 else 30
-        if chart_month == 12: days_in_month = 29 if not start_date.isleap() else 30
-
-        chart_labels = [d.strftime('%d') for d in [start_date + timedelta(days=i) for i in range(days_in_month)]]
-
-        month_start_g = start_date.togregorian()
-        month_end_g = (start_date + timedelta(days=days_in_month - 1)).togregorian()
-
-        income_q = subscriptions_base.filter(payment_date__range=[month_start_g, month_end_g])
-        other_income_q = other_incomes_base.filter(deposit_date__range=[month_start_g, month_end_g])
-        expense_q = expenses_base.filter(spending_date__range=[month_start_g, month_end_g])
-
-        for day in range(1, days_in_month + 1):
-            gregorian_day = jdatetime.date(chart_year, chart_month, day).togregorian()
-            daily_income = (income_q.filter(payment_date=gregorian_day).aggregate(s=Sum('price'))['s'] or 0) + \
-                           (other_income_q.filter(deposit_date=gregorian_day).aggregate(s=Sum('price'))['s'] or 0)
-            daily_expense = expense_q.filter(spending_date=gregorian_day).aggregate(s=Sum('price'))['s'] or 0
-            income_data.append(int(daily_income))
-            expense_data.append(int(daily_expense))
+        month_start_g, month_end_g = jalali_month_range(chart_year, chart_month)
+        days_in_month = (month_end_g - month_start_g).days + 1
+        chart_labels = [f'{day:02d}' for day in range(1, days_in_month + 1)]
+
+        income_data, expense_data = get_daily_series(user, month_start_g, month_end_g)
     else:
         timeframe = 'monthly'
         chart_labels = [jdatetime.date(1, i, 1).strftime('%B') for i in range(1, 13)]
 
-        year_start_g = jdatetime.date(chart_year, 1, 1).togregorian()
-        year_end_g = (
-                jdatetime.date(chart_year, 12, 1) + timedelta(days=30)).togregorian()
+        income_data, expense_data = get_monthly_series(user, [(chart_year, m) for m in range(1, 13)])
 
-        income_by_month = {i: 0 for i in range(1, 13)}
-        expense_by_month = {i: 0 for i in range(1, 13)}
-
-        all_incomes = subscriptions_base.filter(payment_date__year=year_start_g.year).annotate(
-            month_g=TruncMonth('payment_date')).values('month_g').annotate(total=Sum('price'))
-        all_other_incomes = other_incomes_base.filter(deposit_date__year=year_start_g.year).annotate(
-            month_g=TruncMonth('deposit_date')).values('month_g').annotate(total=Sum('price'))
-        all_expenses = expenses_base.filter(spending_date__year=year_start_g.year).annotate(
-            month_g=TruncMonth('spending_date')).values('month_g').annotate(total=Sum('price'))
-
-        for inc in all_incomes: income_by_month[inc['month_g'].month] += inc['total']
-        for inc in all_other_incomes: income_by_month[inc['month_g'].month] += inc['total']
-        for exp in all_expenses: expense_by_month[exp['month_g'].month] += exp['total']
-
-        income_data = [int(income_by_month.get(i, 0)) for i in range(1, 13)]
-        expense_data = [int(expense_by_month.get(i, 0)) for i in range(1, 13)]
-
-    recent_expenses = Expense.objects.filter(creator=request.user).order_by('-created_at')[:5]
-    recent_incomes = OtherIncome.objects.filter(creator=request.user).order_by('-created_at')[:5]
-    recent_customers = CustomerProfile.objects.filter(creator=request.user).order_by('-created_at')[:5]
-    recent_subscriptions = Subscription.objects.filter(creator=request.user, status='success').order_by(
+    recent_expenses = Expense.objects.filter(creator=user).order_by('-created_at')[:5]
+    recent_incomes = OtherIncome.objects.filter(creator=user).order_by('-created_at')[:5]
+    recent_customers = CustomerProfile.objects.filter(creator=user).order_by('-created_at')[:5]
+    recent_subscriptions = Subscription.objects.filter(creator=user, status='success').order_by(
         '-payment_date')[:5]
 
     recent_activities = sorted(
@@ -480,8 +408,48 @@ def financial_report_view(request):
         reverse=True
     )[:7]
 
-    top_expenses = expenses_stats.values('issue').annotate(total=Sum('price'), count=Count('issue')).order_by('-total')[
-        :10]
+    top_expenses = list(
+        expenses_stats.values('issue').annotate(total=Sum('price'), count=Count('issue')).order_by('-total')[:10])
+
+    return {
+        'total_income': totals['total_income'],
+        'total_expenses': totals['total_expenses'],
+        'net_profit': totals['net_profit'],
+        'total_today_income': today_totals['total_income_today'],
+        'total_today_expenses': today_totals['total_expenses_today'],
+        'chart_labels': chart_labels,
+        'income_data': income_data,
+        'expense_data': expense_data,
+        'recent_activities': recent_activities,
+        'current_timeframe': timeframe,
+        'top_expenses': top_expenses,
+    }
+
+
+@login_required
+def financial_report_view(request):
+    today_jalali = jdatetime.date.today()
+    selected_year = request.GET.get('year', str(today_jalali.year))
+    selected_month = request.GET.get('month')
+    timeframe = request.GET.get('timeframe', 'monthly')
+
+    expenses_stats = Expense.objects.filter(creator=request.user)
+    other_incomes_stats = OtherIncome.objects.filter(creator=request.user)
+
+    if selected_year and selected_year.isdigit():
+        start_gregorian, end_gregorian = jalali_year_range(int(selected_year))
+        if selected_month and selected_month.isdigit():
+            start_gregorian, end_gregorian = jalali_month_range(int(selected_year), int(selected_month))
+
+        expenses_stats = expenses_stats.filter(spending_date__range=[start_gregorian, end_gregorian])
+        other_incomes_stats = other_incomes_stats.filter(deposit_date__range=[start_gregorian, end_gregorian])
+
+    # تا وقتی داده‌های کاربر تغییر نکرده، جابه‌جایی بین ماه‌ها از کش خوانده می‌شود
+    today_gregorian = timezone.now().date()
+    report = cached_report(
+        request.user, 'financial_report', (selected_year, selected_month, timeframe, today_gregorian),
+        lambda: _financial_report_data(request.user, selected_year, selected_month, timeframe, today_gregorian),
+    )
 
     context = {
         'expenses': expenses_stats.order_by('-spending_date'),
@@ -490,17 +458,7 @@ def financial_report_view(request):
         'months': {i: jdatetime.date(1, i, 1).strftime('%B') for i in range(1, 13)},
         'selected_year': selected_year,
         'selected_month': selected_month,
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'net_profit': net_profit,
-        'total_today_income': total_today_income,
-        'total_today_expenses': total_today_expenses,
-        'chart_labels': chart_labels,
-        'income_data': income_data,
-        'expense_data': expense_data,
-        'recent_activities': recent_activities,
-        'current_timeframe': timeframe,
-        'top_expenses': top_expenses,
+        **report,
     }
     return render(request, 'dashboard/desktop/financial_report.html', context)
 
@@ -537,7 +495,7 @@ def profile_view(request):
             messages.success(request, _('Password changed successfully.'))
             return redirect('dashboard:profile')
         if 'change_avatar' in request.POST and profile_form.is_valid():
-            profile_form.save()
+            profile_form.save(commit=False).save(update_fields=['avatar'])
             messages.success(request, _('Your avatar was successfully updated!'))
             return redirect('dashboard:profile')
     else:
@@ -555,7 +513,7 @@ def set_theme_view(request):
     if theme in ['light', 'dark']:
         profile, created = Profile.objects.get_or_create(user=request.user)
         profile.theme = theme
-        profile.save()
+        profile.save(update_fields=['theme'])
         return JsonResponse({'status': 'ok'})
     return JsonResponse({'status': 'error'}, status=400)
 
@@ -639,19 +597,41 @@ def custom_403(request, exception):
     return render(request, '403.html', {}, status=403)
 
 
+def _customer_referrers_etag(request):
+    # نسخه‌ی داده با هر تغییر مشتری‌های کاربر بالا می‌رود (dashboard/signals.py)
+    return f'customers-{request.user.pk}-{get_data_version(request.user)}'
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@etag(_customer_referrers_etag)
+def customer_referrers_view(request):
+    """
+    نقشه‌ی مشتری ← معرف پیش‌فرض برای پر کردن خودکار فرم اشتراک؛ هر صفحه یک
+    بار می‌خواند و مرورگر با If-None-Match تا تغییر داده فقط 304 می‌گیرد.
+    """
+    return JsonResponse({'referrers': get_customer_referrers(request.user)})
+
+
 @login_required
-def get_customer_details(request):
-    customer_id = request.GET.get('customer_id')
-    if customer_id:
-        try:
-            customer = CustomerProfile.objects.get(id=customer_id)
-            referrer_id = customer.referred_by.id if customer.referred_by else None
-            return JsonResponse({'referrer_id': referrer_id})
-        except CustomerProfile.DoesNotExist:
-            return JsonResponse({'error': 'Customer not found'}, status=404)
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
-    return JsonResponse({'error': 'No ID provided'}, status=400)
+def autocomplete_view(request, source):
+    """نتیجه‌ی جستجوی پیشوندی برای select2 (``?q=`` و ``?limit=``)، فقط داده‌های خود کاربر."""
+    if source not in AUTOCOMPLETE_SOURCES:
+        return JsonResponse({'error': 'Unknown source'}, status=404)
+    return JsonResponse(autocomplete(
+        request.user, source, request.GET.get('q', ''), parse_limit(request.GET.get('limit'))))
+
+
+@login_required
+def global_search_view(request):
+    """جستجوی سراسری در مشتری‌ها، هزینه‌ها و درآمدهای کاربر (``?q=`` و ``?page=``)."""
+    query = request.GET.get('q', '').strip()
+    page = search(request.user, query, request.GET.get('page'))
+    return render(request, 'dashboard/desktop/search.html', {
+        'page_obj': page,
+        'results': page.object_list,
+        'global_search_query': query,
+    })
 
 
 # ===================================================================
@@ -662,120 +642,66 @@ def get_customer_details(request):
 @user_passes_test(lambda u: u.is_superuser)
 def backup_panel(request):
     """نمایش صفحه مدیریت بک‌آپ - فقط برای ادمین کل"""
-    return render(request, 'dashboard/desktop/backup_panel.html')
+    job = find_user_job(request.user, request.GET.get('job'))
+    return render(request, 'dashboard/desktop/backup_panel.html', {'job': job})
 
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def download_backup(request):
-    """دانلود مستقیم فایل SQL"""
-    filename = f"backup_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.sql"
-
-    # ✅ نکته مهم: دقیقاً همان دستوری که در تلگرام کار کرد (با --skip-ssl)
-    command = f"mysqldump --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' --no-tablespaces {DB_NAME}"
-
+    """دانلود مستقیم بک‌آپ (SQL فشرده با gzip) به صورت جریانی"""
     try:
-        # اجرای دستور
-        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output, error = process.communicate()
-
-        if process.returncode != 0:
-            # اگر خطایی بود، متن خطا را برگردان
-            return HttpResponse(f"Error creating backup: {error.decode('utf-8')}", status=500)
-
-        # اگر موفق بود، فایل را برای دانلود بفرست
-        response = HttpResponse(output, content_type='application/sql')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
-
+        # حافظه‌ی مصرفی ثابت است: دامپ تکه‌تکه فشرده و ارسال می‌شود
+        stream = stream_gzip_dump()
+    except BackupError as e:
+        # اگر خطایی بود، متن خطا را برگردان
+        return HttpResponse(f"Error creating backup: {e}", status=500)
     except Exception as e:
         return HttpResponse(f"System Error: {str(e)}", status=500)
 
+    response = StreamingHttpResponse(stream, content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="{backup_filename()}"'
+    # nginx پاسخ را بافر نکند تا دانلود همزمان با دامپ شروع شود
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
+@require_POST
 def telegram_backup(request):
-    """روش تضمینی: ساخت فایل در پایتون بدون وابستگی به شل پیچیده"""
-
-    # نام فایل‌ها
-    raw_filename = f"/tmp/{DB_NAME}_raw.sql"
-    zip_filename = f"/tmp/{DB_NAME}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.sql.gz"
-
-    # دستور mysqldump (ساده و بدون gzip در دستور)
-    command = f"mysqldump --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' --no-tablespaces {DB_NAME}"
-
-    try:
-        # 1. اجرای mysqldump و ذخیره در فایل خام
-        with open(raw_filename, 'w') as f:
-            process = subprocess.Popen(command, shell=True, stdout=f, stderr=subprocess.PIPE)
-            _, error = process.communicate()
-
-        if process.returncode != 0:
-            return JsonResponse({'status': 'error', 'message': f"Dump Error: {error.decode('utf-8')}"})
-
-        # 2. بررسی اینکه فایل خام خالی نباشد
-        if os.path.getsize(raw_filename) == 0:
-            return JsonResponse({'status': 'error', 'message': "Generated SQL file is empty!"})
-
-        # 3. فشرده‌سازی فایل با پایتون (Gzip)
-        with open(raw_filename, 'rb') as f_in:
-            with gzip.open(zip_filename, 'wb') as f_out:
-                f_out.writelines(f_in)
-
-        # 4. ارسال به تلگرام
-        caption = f"✅ Backup Successful (Python)\n📅 Date: {datetime.now()}\n🗄 DB: {DB_NAME}"
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendDocument"
-
-        with open(zip_filename, 'rb') as f:
-            files = {'document': f}
-            data = {'chat_id': CHAT_ID, 'caption': caption}
-            response = requests.post(url, files=files, data=data)
-
-        # 5. پاکسازی فایل‌های موقت
-        if os.path.exists(raw_filename): os.remove(raw_filename)
-        if os.path.exists(zip_filename): os.remove(zip_filename)
-
-        telegram_resp = response.json()
-        if response.status_code == 200 and telegram_resp.get('ok'):
-            return JsonResponse({'status': 'success', 'message': 'Backup sent successfully!'})
-        else:
-            return JsonResponse({'status': 'error', 'message': f"Telegram Error: {telegram_resp}"})
+    """ارسال بک‌آپ به تلگرام در صف کارها ثبت می‌شود؛ صفحه وضعیت را از backup_job_status می‌خواند."""
+    caption = f"✅ Backup Successful (Python)\n📅 Date: {datetime.now()}\n🗄 DB: {DB_NAME}"
+    job = enqueue('telegram_backup', request.user, payload={'caption': caption})
+    return JsonResponse({
+        'status': 'queued',
+        'message': _('Backup job queued.'),
+        'job_id': job.pk,
+        'status_url': reverse('dashboard:backup_job_status', args=[job.pk]),
+    })
 
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)})
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def restore_db(request):
-    """بازگردانی دیتابیس (خطرناک)"""
+    """بازگردانی دیتابیس (خطرناک) - فایل ذخیره و ریستور در صف کارها ثبت می‌شود"""
     if request.method == 'POST' and request.FILES.get('sql_file'):
-        sql_file = request.FILES['sql_file']
-        temp_path = f"/tmp/restore_{sql_file.name}"
+        upload = request.FILES['sql_file']
+        error = validate_restore_upload(upload)
+        if error:
+            messages.error(request, error)
+            return redirect('dashboard:backup_panel')
+        job = enqueue('restore', request.user, upload=upload)
+        return redirect(f"{reverse('dashboard:backup_panel')}?job={job.pk}")
 
-        with open(temp_path, 'wb+') as destination:
-            for chunk in sql_file.chunks():
-                destination.write(chunk)
-
-        if temp_path.endswith('.gz'):
-            cmd = f"gunzip < {temp_path} | mysql -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' {DB_NAME}"
-        else:
-            cmd = f"mysql -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' {DB_NAME} < {temp_path}"
-
-        try:
-            process = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
-            if process.returncode == 0:
-                messages.success(request, "Database restored successfully!")
-            else:
-                messages.error(request, f"Restore Failed: {process.stderr}")
-        except Exception as e:
-            messages.error(request, f"System Error: {str(e)}")
+    return redirect('dashboard:backup_panel')
 
-        return redirect('dashboard:backup_panel')
 
-    return redirect('dashboard:backup_panel')
+@login_required
+def backup_job_status(request, pk):
+    """وضعیت و پیشرفت یک کار پس‌زمینه (JSON)"""
+    job = get_object_or_404(BackgroundJob, pk=pk, creator=request.user)
+    return JsonResponse(job_status(job))
 
 
 @login_required
@@ -792,49 +718,55 @@ def main_dashboard_view(request):
     today = timezone.now().date()
 
     # 1. Daily Stats
-    subs_today = Subscription.objects.filter(creator=request.user, status='success', payment_date=today)
-    subs_income_today = subs_today.aggregate(total=Sum('price'))['total'] or 0
-    subs_count_today = subs_today.count()
-
-    other_income_today = \
-    OtherIncome.objects.filter(creator=request.user, deposit_date=today).aggregate(total=Sum('price'))['total'] or 0
-    expenses_today = Expense.objects.filter(creator=request.user, spending_date=today).aggregate(total=Sum('price'))[
-                         'total'] or 0
-
-    total_income_today = subs_income_today + other_income_today
-    net_profit_today = total_income_today - expenses_today
+    totals = get_report_totals(request.user, today, today, today=today)
+    subs_count_today = totals['subscription_count_today']
+    expenses_today = totals['total_expenses_today']
+    total_income_today = totals['total_income_today']
+    net_profit_today = totals['net_profit_today']
 
     # 2. Recent Activity (Desktop needs Pagination)
-    all_expenses = Expense.objects.filter(creator=request.user).order_by('-created_at')
-    all_incomes = OtherIncome.objects.filter(creator=request.user).order_by('-created_at')
-    all_subscriptions = Subscription.objects.filter(creator=request.user, status='success').order_by('-payment_date')
-
-    full_activity_list = sorted(
-        chain(all_expenses, all_incomes, all_subscriptions),
-        key=lambda instance: getattr(instance, 'created_at', None) or getattr(instance, 'payment_date', None),
-        reverse=True
-    )
-
-    paginator = Paginator(full_activity_list, 20)
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    # Ordered and paged inside the database (keyset pagination with a cursor)
+    if request.GET.get('before'):
+        feed = get_activity_page(request.user, decode_cursor(request.GET['before']), older=False)
+    else:
+        feed = get_activity_page(request.user, decode_cursor(request.GET.get('after')))
 
     context = {
         'total_income_today': total_income_today,
         'expenses_today': expenses_today,
         'net_profit_today': net_profit_today,
         'subs_count_today': subs_count_today,
-        'page_obj': page_obj,
+        'activities': feed['activities'],
+        'next_cursor': feed['next_cursor'],
+        'previous_cursor': feed['previous_cursor'],
     }
 
     return render(request, 'dashboard/desktop/main_dashboard.html', context)
 
 
+def _bank_report_stats(user, year_num, month_num, start_date, end_date):
+    """گردش ماهانه‌ی هر بانک و جمع کل (قابل کش شدن)."""
+    # سه کوئری گروه‌بندی‌شده برای همه‌ی بانک‌ها (به جای سه کوئری برای هر بانک)
+    banks = BankAccount.objects.filter(creator=user)
+    flows = get_bank_flows(user, start_date, end_date, subscription_filter=Q(year=year_num, month=month_num))
+    empty_flow = {'subs_income': 0, 'other_income': 0, 'total_expense': 0, 'net_flow': 0}
+    bank_stats = []
+    total_assets = 0
+
+    for bank in banks:
+        flow = flows.get(bank.id, empty_flow)
+        total_assets += flow['net_flow']
+
+        bank_stats.append({
+            'bank': bank,
+            'subs_income': flow['subs_income'],
+            'other_income': flow['other_income'],
+            'total_expense': flow['total_expense'],
+            'net_balance': flow['net_flow']
+        })
+    return bank_stats, total_assets
+
+
 @login_required
 def bank_report_view(request):
     # دریافت تاریخ امروز برای تنظیم پیش‌فرض‌ها
@@ -851,60 +783,16 @@ def bank_report_view(request):
 
     # محاسبه تاریخ شروع و پایان برای فیلتر کردن
     try:
-        start_date = jdatetime.date(year_num, month_num, 1).togregorian()
-        if month_num == 12:
-            end_date = jdatetime.date(year_num + 1, 1, 1).togregorian()
-        else:
-            end_date = jdatetime.date(year_num, month_num + 1, 1).togregorian()
-    except Exception:
-        start_date = current_date.togregorian()
-        end_date = current_date.togregorian()
+        start_date, end_date = jalali_month_range(year_num, month_num)
+    except ValueError:
+        year_num, month_num = current_date.year, current_date.month
+        start_date, end_date = jalali_month_range(year_num, month_num)
 
     # --- شروع پردازش بانک‌ها ---
-    banks = BankAccount.objects.filter(creator=request.user)
-    bank_stats = []
-    total_assets = 0
-
-    for bank in banks:
-        # A. محاسبه اشتراک‌ها
-        subs_qs = Subscription.objects.filter(
-            creator=request.user,
-            destination_bank=bank,
-            status='success',
-            year=year_num,
-            month=month_num
-        )
-        subs_income = subs_qs.aggregate(total=Sum('price'))['total'] or 0
-
-        # B. محاسبه سایر درآمدها
-        other_qs = OtherIncome.objects.filter(
-            creator=request.user,
-            destination_bank=bank,
-            deposit_date__gte=start_date,
-            deposit_date__lt=end_date
-        )
-        other_income = other_qs.aggregate(total=Sum('price'))['total'] or 0
-
-        # C. محاسبه هزینه‌ها
-        expense_qs = Expense.objects.filter(
-            creator=request.user,
-            source_bank=bank,
-            spending_date__gte=start_date,
-            spending_date__lt=end_date
-        )
-        total_expense = expense_qs.aggregate(total=Sum('price'))['total'] or 0
-
-        # D. محاسبه موجودی خالص
-        net_balance = (subs_income + other_income) - total_expense
-        total_assets += net_balance
-
-        bank_stats.append({
-            'bank': bank,
-            'subs_income': subs_income,
-            'other_income': other_income,
-            'total_expense': total_expense,
-            'net_balance': net_balance
-        })
+    bank_stats, total_assets = cached_report(
+        request.user, 'bank_report', (year_num, month_num),
+        lambda: _bank_report_stats(request.user, year_num, month_num, start_date, end_date),
+    )
 
     # --- تنظیمات هوشمند تقویم ---
 
@@ -1,5 +1,3 @@
-import os
-import requests
 from django.shortcuts import render, redirect, get_object_or_404
 from operator import attrgetter
 from django.contrib.auth.decorators import login_required
@@ -9,15 +7,13 @@ from django.utils.translation import gettext as _
 from django.urls import reverse
 from itertools import chain
 import jdatetime
-from datetime import datetime, timedelta, date
-import subprocess # برای اجرای اسکریپت تلگرام
-import gzip
+from datetime import datetime, date
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 import json
 from django.utils import timezone
 from django.core.management import call_command
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 
@@ -31,67 +27,33 @@ from dashboard.models import (
 from dashboard.forms import (
     ExpenseForm, OtherIncomeForm, SubscriptionForm,BankAccountForm,CustomerProfileForm
 )
+from dashboard.reports import (
+    get_bank_flows, get_monthly_series, get_report_totals, get_subscription_month_totals, jalali_month_range
+)
+from dashboard.activity import decode_date_cursor, get_transaction_page, get_transaction_sources
+from dashboard.backup import BackupError, backup_filename, stream_gzip_dump
+from dashboard.customers import search_customers
+from dashboard.jobs import enqueue, find_user_job, validate_restore_upload
+from dashboard.report_cache import cached_report
 
 
 # ==========================================
 # 1. صفحه خانه موبایل (Dashboard Summary)
 # ==========================================
-@login_required
-def mobile_home_view(request):
-    """
-    نمایش کارت‌های آمار و تراکنش‌های اخیر با دیتای واقعی
-    """
-    user = request.user
-
+def _mobile_home_data(user, today):
+    """کارت‌های آمار و تراکنش‌های اخیر صفحه خانه (قابل کش شدن)."""
     # --- 1. محاسبه موجودی کل (Total Balance) ---
     # موجودی کل = مجموع موجودی همه بانک‌ها
-    banks = BankAccount.objects.filter(creator=user)
-    total_balance = 0
-    for bank in banks:
-        # متد balance که قبلاً نوشتیم یا محاسبه دستی
-        # اینجا محاسبه دستی می‌کنیم برای اطمینان
-        inc = 0
-        if hasattr(bank, 'other_incomes'):
-            inc += bank.other_incomes.aggregate(s=Sum('price'))['s'] or 0
-        elif hasattr(bank, 'otherincome_set'):
-            inc += bank.otherincome_set.aggregate(s=Sum('price'))['s'] or 0
-
-        sub = 0
-        # چک کردن نام ریلیشن‌ها
-        sub_manager = getattr(bank, 'subscriptions', None) or getattr(bank, 'subscription_set', None) or getattr(bank,
-                                                                                                                 'subscription',
-                                                                                                                 None)
-        if sub_manager:
-            sub = sub_manager.filter(status='success').aggregate(s=Sum('price'))['s'] or 0
-
-        exp = 0
-        exp_manager = getattr(bank, 'expenses', None) or getattr(bank, 'expense_set', None)
-        if exp_manager:
-            exp = exp_manager.aggregate(s=Sum('price'))['s'] or 0
-
-        total_balance += (inc + sub) - exp
+    # موجودی هر بانک در دفتر موجودی نگهداری می‌شود (dashboard/signals.py)
+    total_balance = BankAccount.objects.filter(creator=user).aggregate(s=Sum('balance'))['s'] or 0
 
     # --- 2. محاسبه درآمد و هزینه ماه جاری ---
-    today = jdatetime.date.today()
-    start_month = jdatetime.date(today.year, today.month, 1).togregorian()
-    # محاسبه پایان ماه
-    if today.month < 12:
-        end_month = jdatetime.date(today.year, today.month + 1, 1).togregorian() - timedelta(days=1)
-    else:
-        end_month = jdatetime.date(today.year + 1, 1, 1).togregorian() - timedelta(days=1)
+    start_month, end_month = jalali_month_range(today.year, today.month)
 
-    # کوئری‌های این ماه
-    month_subs = \
-    Subscription.objects.filter(creator=user, payment_date__range=(start_month, end_month), status='success').aggregate(
-        s=Sum('price'))['s'] or 0
-    month_other_inc = \
-    OtherIncome.objects.filter(creator=user, deposit_date__range=(start_month, end_month)).aggregate(s=Sum('price'))[
-        's'] or 0
-    total_income_month = month_subs + month_other_inc
-
-    total_expense_month = \
-    Expense.objects.filter(creator=user, spending_date__range=(start_month, end_month)).aggregate(s=Sum('price'))[
-        's'] or 0
+    # یک کوئری شرطی برای هر مدل
+    totals = get_report_totals(user, start_month, end_month)
+    total_income_month = totals['total_income']
+    total_expense_month = totals['total_expenses']
 
     # --- 3. تراکنش‌های اخیر (Recent Activity) ---
     # 5 مورد آخر از هر کدام
@@ -138,12 +100,26 @@ def mobile_home_view(request):
                 'date': item.jalali_payment_date,
                 'bank_name': item.destination_bank.bank_name if item.destination_bank else ''
             })
-    current_date_shamsi = jdatetime.date.today().strftime('%B %Y')  # مثلا: دی 1403
-    context = {
+    return {
         'total_balance': total_balance,
         'total_income': total_income_month,
         'total_expense': total_expense_month,
         'recent_transactions': recent_transactions,
+    }
+
+
+@login_required
+def mobile_home_view(request):
+    """
+    نمایش کارت‌های آمار و تراکنش‌های اخیر با دیتای واقعی
+    """
+    # تا وقتی داده‌های کاربر تغییر نکرده، از کش خوانده می‌شود
+    today = jdatetime.date.today()
+    data = cached_report(request.user, 'mobile_home', (today,), lambda: _mobile_home_data(request.user, today))
+
+    current_date_shamsi = jdatetime.date.today().strftime('%B %Y')  # مثلا: دی 1403
+    context = {
+        **data,
         'current_date_display': current_date_shamsi
     }
     return render(request, 'dashboard/mobile/home.html', context)
@@ -152,6 +128,33 @@ def mobile_home_view(request):
 # 2. لیست تراکنش‌ها (Transactions List)
 # ==========================================
 
+TRANSACTION_ICONS = {'expense': 'fa-bag-shopping', 'income': 'fa-arrow-down', 'subscription': 'fa-crown'}
+TRANSACTION_PAGE_SIZE = 30
+
+
+def _transaction_item(row):
+    """ردیف خام لیست تراکنش‌ها به فرمت تمپلیت."""
+    kind = row['kind_name']
+    item = {
+        'id': row['id'],
+        'type': 'sub' if kind == 'subscription' else kind,
+        'title': row['title'],
+        'subtitle': row['subtitle'] or '',
+        'amount': row['price'],
+        'date': row['jalali_date'] or _("Not Set"),
+        'is_income': kind != 'expense',
+        'icon': 'fa-server' if row['is_server'] else TRANSACTION_ICONS[kind],
+    }
+    if kind == 'expense':
+        item['title'] = item['title'] or _("Expense")
+    elif kind == 'income':
+        item['title'] = item['title'] or _("Income")
+    else:
+        item['status'] = row['state']
+        item['subtitle'] = f"{_('Ref')}: {row['subtitle']}" if row['subtitle'] else _("Direct")
+    return item
+
+
 @login_required
 def mobile_transaction_list_view(request):
     filter_type = request.GET.get('type', 'all')
@@ -162,85 +165,41 @@ def mobile_transaction_list_view(request):
     try:
         selected_year = int(request.GET.get('year', today.year))
         selected_month = int(request.GET.get('month', today.month))
+        jalali_month_range(selected_year, selected_month)
     except ValueError:
         selected_year = today.year
         selected_month = today.month
 
-    start_date_shamsi = jdatetime.date(selected_year, selected_month, 1)
-    if selected_month < 12:
-        end_date_shamsi = jdatetime.date(selected_year, selected_month + 1, 1) - timedelta(days=1)
-    else:
-        end_date_shamsi = jdatetime.date(selected_year + 1, 1, 1) - timedelta(days=1)
+    # مرتب‌سازی و صفحه‌بندی (keyset) در دیتابیس؛ هر درخواست فقط یک صفحه‌ی ثابت
+    sources = get_transaction_sources(
+        request.user, selected_year, selected_month, filter_type, status_filter, search_query)
+    cursor = decode_date_cursor(request.GET.get('cursor'))
+    page = get_transaction_page(sources, cursor, TRANSACTION_PAGE_SIZE)
 
-    start_gregorian = start_date_shamsi.togregorian()
-    end_gregorian = end_date_shamsi.togregorian()
+    next_url = None
+    if page['next_cursor']:
+        params = request.GET.copy()
+        params.pop('partial', None)
+        params['cursor'] = page['next_cursor']
+        next_url = f"?{params.urlencode()}"
 
-    expenses = Expense.objects.none()
-    incomes = OtherIncome.objects.none()
-    subs = Subscription.objects.none()
+    context = {
+        'transactions': [_transaction_item(row) for row in page['transactions']],
+        'next_url': next_url,
+    }
+    # درخواست‌های اسکرول بی‌پایان فقط ردیف‌های صفحه‌ی بعد را می‌گیرند
+    if request.GET.get('partial'):
+        return render(request, 'dashboard/mobile/transaction_items.html', context)
 
     stats = {'total_giga': 0, 'total_revenue': 0, 'paid_amount': 0, 'unpaid_amount': 0}
-
-    if filter_type in ['all', 'expense']:
-        expenses = Expense.objects.filter(creator=request.user, spending_date__range=(start_gregorian, end_gregorian))
-        if search_query:
-            expenses = expenses.filter(Q(issue__icontains=search_query) | Q(description__icontains=search_query))
-
-    if filter_type in ['all', 'income']:
-        incomes = OtherIncome.objects.filter(creator=request.user, deposit_date__range=(start_gregorian, end_gregorian))
-        if search_query:
-            incomes = incomes.filter(Q(name__icontains=search_query) | Q(description__icontains=search_query))
-
     if filter_type in ['all', 'sub']:
-        all_subs_month = Subscription.objects.filter(creator=request.user, year=selected_year, month=selected_month)
-        stats['total_giga'] = all_subs_month.aggregate(s=Sum('giga'))['s'] or 0
-        stats['paid_amount'] = all_subs_month.filter(status='success').aggregate(s=Sum('price'))['s'] or 0
-        stats['unpaid_amount'] = all_subs_month.filter(status='pending').aggregate(s=Sum('price'))['s'] or 0
-        stats['total_revenue'] = stats['paid_amount'] + stats['unpaid_amount']
-
-        subs = Subscription.objects.filter(creator=request.user, year=selected_year, month=selected_month)
-        if status_filter == 'paid': subs = subs.filter(status='success')
-        elif status_filter == 'unpaid': subs = subs.filter(status='pending')
-        if search_query:
-            subs = subs.filter(Q(customer__name__icontains=search_query) | Q(referrer__name__icontains=search_query))
-
-    activity_list = []
-    for item in expenses:
-        activity_list.append({
-            'id': item.id, 'type': 'expense',
-            'title': item.issue or _("Expense"),
-            'subtitle': item.source_bank.bank_name if item.source_bank else '',
-            'amount': item.price,
-            'date': item.jalali_spending_date,
-            'is_income': False,
-            'icon': 'fa-server' if item.is_server_cost else 'fa-bag-shopping',
-        })
-    for item in incomes:
-        activity_list.append({
-            'id': item.id, 'type': 'income',
-            'title': item.name or _("Income"),
-            'subtitle': item.destination_bank.bank_name if item.destination_bank else '',
-            'amount': item.price,
-            'date': item.jalali_deposit_date,
-            'is_income': True,
-            'icon': 'fa-arrow-down'
-        })
-    for item in subs:
-        activity_list.append({
-            'id': item.id, 'type': 'sub',
-            'title': item.customer.name,
-            'subtitle': f"{_('Ref')}: {item.referrer.name}" if item.referrer else _("Direct"),
-            'amount': item.price,
-            'date': item.jalali_payment_date,
-            'is_income': True,
-            'status': item.status,
-            'icon': 'fa-crown'
-        })
-
-    activity_list.sort(key=lambda x: str(x['date']) if x['date'] else "0000/00/00", reverse=True)
+        month_totals = get_subscription_month_totals(request.user, selected_year, selected_month)
+        stats['total_giga'] = month_totals['giga']
+        stats['paid_amount'] = month_totals['paid']
+        stats['unpaid_amount'] = month_totals['unpaid']
+        stats['total_revenue'] = month_totals['total']
 
-    context = {
-        'transactions': activity_list,
+    context.update({
         'filter_type': filter_type,
         'status_filter': status_filter,
         'search_query': search_query,
@@ -249,7 +208,7 @@ def mobile_transaction_list_view(request):
         'years_list': range(1402, 1406),
         'months_list': range(1, 13),
         'stats': stats,
-    }
+    })
     return render(request, 'dashboard/mobile/transaction_list.html', context)
 
 
@@ -470,8 +429,7 @@ def mobile_profile_view(request):
             if avatar:
                 # حذف آواتار قبلی اگر وجود دارد (اختیاری)
                 profile.avatar = avatar
-
-            profile.save()
+                profile.save(update_fields=['avatar'])
             messages.success(request, _("Profile updated successfully."))
             return redirect('dashboard:mobile_profile')
 
@@ -493,12 +451,7 @@ def mobile_backup_view(request):
     """
     مدیریت بکاپ (SQL برای دانلود و تلگرام) - اصلاح شده و نهایی
     """
-    # تنظیمات دیتابیس
-    db_settings = settings.DATABASES['default']
-    DB_HOST = db_settings.get('HOST', 'localhost')
-    DB_USER = db_settings.get('USER', '')
-    DB_PASSWORD = db_settings.get('PASSWORD', '')
-    DB_NAME = db_settings.get('NAME', '')
+    DB_NAME = settings.DATABASES['default'].get('NAME', '')
 
     # تنظیمات تلگرام
     BOT_TOKEN = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
@@ -511,26 +464,20 @@ def mobile_backup_view(request):
         # ---------------------------------------------------------
         if 'create_backup' in request.POST:
             try:
-                filename = f"backup_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.sql"
-
-                # دستور mysqldump با --skip-ssl
-                command = f"mysqldump --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' --no-tablespaces {DB_NAME}"
-
-                process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                output, error = process.communicate()
-
-                if process.returncode != 0:
-                    messages.error(request, f"Backup Error: {error.decode('utf-8')}")
-                    return redirect('dashboard:mobile_backup')
-
-                response = HttpResponse(output, content_type='application/sql')
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                return response
-
+                # دامپ به صورت جریانی و فشرده (gzip) ارسال می‌شود؛ حافظه‌ی مصرفی ثابت است
+                stream = stream_gzip_dump()
+            except BackupError as e:
+                messages.error(request, f"Backup Error: {e}")
+                return redirect('dashboard:mobile_backup')
             except Exception as e:
                 messages.error(request, f"System Error: {str(e)}")
                 return redirect('dashboard:mobile_backup')
 
+            response = StreamingHttpResponse(stream, content_type='application/gzip')
+            response['Content-Disposition'] = f'attachment; filename="{backup_filename()}"'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
         # ---------------------------------------------------------
         # B. ارسال به تلگرام
         # ---------------------------------------------------------
@@ -539,81 +486,26 @@ def mobile_backup_view(request):
                 messages.error(request, "Error: Bot Token or Chat ID is missing in settings.")
                 return redirect('dashboard:mobile_backup')
 
-            try:
-                raw_filename = f"/tmp/{DB_NAME}_raw.sql"
-                zip_filename = f"/tmp/{DB_NAME}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.sql.gz"
-
-                command = f"mysqldump --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' --no-tablespaces {DB_NAME}"
-
-                with open(raw_filename, 'w') as f:
-                    process = subprocess.Popen(command, shell=True, stdout=f, stderr=subprocess.PIPE)
-                    # ✅ اصلاح مهم: استفاده از stdout_data به جای _
-                    stdout_data, error = process.communicate()
-
-                if process.returncode != 0:
-                    messages.error(request, f"Dump Error: {error.decode('utf-8')}")
-                    return redirect('dashboard:mobile_backup')
-
-                with open(raw_filename, 'rb') as f_in:
-                    with gzip.open(zip_filename, 'wb') as f_out:
-                        f_out.writelines(f_in)
-
-                caption = f"✅ Mobile Backup (SQL)\n📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n🗄 DB: {DB_NAME}"
-                url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendDocument"
-
-                with open(zip_filename, 'rb') as f:
-                    files = {'document': f}
-                    data = {'chat_id': CHAT_ID, 'caption': caption}
-                    response = requests.post(url, files=files, data=data)
-
-                if os.path.exists(raw_filename): os.remove(raw_filename)
-                if os.path.exists(zip_filename): os.remove(zip_filename)
-
-                if response.status_code == 200 and response.json().get('ok'):
-                    messages.success(request, _("Backup sent to Telegram successfully!"))
-                else:
-                    messages.error(request, f"Telegram API Error: {response.text}")
-
-            except Exception as e:
-                messages.error(request, f"Process Error: {str(e)}")
-
-            return redirect('dashboard:mobile_backup')
+            # دامپ و آپلود در worker (run_jobs) انجام می‌شود؛ صفحه پیشرفت را نشان می‌دهد
+            caption = f"✅ Mobile Backup (SQL)\n📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n🗄 DB: {DB_NAME}"
+            job = enqueue('telegram_backup', request.user, payload={'caption': caption})
+            return redirect(f"{reverse('dashboard:mobile_backup')}?job={job.pk}")
 
         # ---------------------------------------------------------
         # C. ریستور (Restore)
         # ---------------------------------------------------------
         elif 'restore_backup' in request.POST and request.FILES.get('backup_file'):
-            try:
-                sql_file = request.FILES['backup_file']
-                temp_path = f"/tmp/restore_{sql_file.name}"
-
-                with open(temp_path, 'wb+') as destination:
-                    for chunk in sql_file.chunks():
-                        destination.write(chunk)
-
-                # ✅ اصلاح قبلی: استفاده از --skip-ssl
-                if temp_path.endswith('.gz'):
-                    cmd = f"gunzip < {temp_path} | mysql --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' {DB_NAME}"
-                else:
-                    cmd = f"mysql --skip-ssl -h {DB_HOST} -u {DB_USER} -p'{DB_PASSWORD}' {DB_NAME} < {temp_path}"
-
-                process = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-
-                if process.returncode == 0:
-                    messages.success(request, _("Database restored successfully."))
-                else:
-                    messages.error(request, f"Restore Failed: {process.stderr}")
-
-            except Exception as e:
-                messages.error(request, f"System Error: {str(e)}")
-
-            return redirect('dashboard:mobile_backup')
+            upload = request.FILES['backup_file']
+            error = validate_restore_upload(upload)
+            if error:
+                messages.error(request, error)
+                return redirect('dashboard:mobile_backup')
+            # فایل در worker تکه‌تکه از gzip باز و به mysql داده می‌شود (dashboard/backup.py)
+            job = enqueue('restore', request.user, upload=upload)
+            return redirect(f"{reverse('dashboard:mobile_backup')}?job={job.pk}")
 
-    # ✅ حالا اینجا دیگر ارور نمی‌دهد چون متغیر _ در بالا استفاده نشده است
-    return render(request, 'dashboard/mobile/backup.html', {'title': _('Database Backup')})
+    context = {'title': _('Database Backup'), 'job': find_user_job(request.user, request.GET.get('job'))}
+    return render(request, 'dashboard/mobile/backup.html', context)
 
 
 @login_required
@@ -627,68 +519,26 @@ def mobile_bank_list_view(request):
     selected_month = int(request.GET.get('month', current_date.month))
 
     # محاسبه بازه زمانی (تاریخ شروع و پایان ماه انتخاب شده به میلادی)
-    start_shamsi = jdatetime.date(selected_year, selected_month, 1)
-    if selected_month < 12:
-        end_shamsi = jdatetime.date(selected_year, selected_month + 1, 1) - timedelta(days=1)
-    else:
-        end_shamsi = jdatetime.date(selected_year + 1, 1, 1) - timedelta(days=1)
-
-    start_g = start_shamsi.togregorian()
-    end_g = end_shamsi.togregorian()
+    start_g, end_g = jalali_month_range(selected_year, selected_month)
 
     # لیست بانک‌ها
     banks = BankAccount.objects.filter(creator=request.user)
 
+    # سه کوئری گروه‌بندی‌شده برای همه‌ی بانک‌ها
+    flows = get_bank_flows(request.user, start_g, end_g)
     total_net_flow = 0
 
     for bank in banks:
-        # مدیریت نام ریلیشن‌ها (مثل قبل هوشمند)
-        # 1. درآمدها (در بازه زمانی انتخاب شده)
-        if hasattr(bank, 'other_incomes'):
-            inc_manager = bank.other_incomes
-        else:
-            inc_manager = getattr(bank, 'otherincome_set', None)
-
-        inc = inc_manager.filter(deposit_date__range=(start_g, end_g)).aggregate(s=Sum('price'))[
-                  's'] or 0 if inc_manager else 0
-
-        # 2. اشتراک‌ها (در بازه زمانی)
-        if hasattr(bank, 'subscriptions'):
-            sub_manager = bank.subscriptions
-        elif hasattr(bank, 'subscription_set'):
-            sub_manager = bank.subscription_set
-        elif hasattr(bank, 'subscription'):
-            sub_manager = bank.subscription
-        else:
-            sub_manager = None
-
-        if sub_manager:
-            sub = sub_manager.filter(status='success', payment_date__range=(start_g, end_g)).aggregate(s=Sum('price'))[
-                      's'] or 0
-        else:
-            sub = 0
-
-        # 3. هزینه‌ها (در بازه زمانی)
-        if hasattr(bank, 'expenses'):
-            exp_manager = bank.expenses
-        else:
-            exp_manager = getattr(bank, 'expense_set', None)
-
-        exp = exp_manager.filter(spending_date__range=(start_g, end_g)).aggregate(s=Sum('price'))[
-                  's'] or 0 if exp_manager else 0
-
-        # محاسبات
-        total_income = inc + sub
-        net_flow = total_income - exp
+        flow = flows.get(bank.id, {'subs_income': 0, 'other_income': 0, 'total_expense': 0, 'net_flow': 0})
 
         # ذخیره در آبجکت برای نمایش در تمپلیت
-        bank.stat_income = total_income
-        bank.stat_expense = exp
-        bank.stat_net_flow = net_flow
-        bank.stat_subs = sub
-        bank.stat_other = inc
+        bank.stat_income = flow['subs_income'] + flow['other_income']
+        bank.stat_expense = flow['total_expense']
+        bank.stat_net_flow = flow['net_flow']
+        bank.stat_subs = flow['subs_income']
+        bank.stat_other = flow['other_income']
 
-        total_net_flow += net_flow
+        total_net_flow += flow['net_flow']
 
     # ساخت لیست سال‌ها و ماه‌ها برای دراپ‌داون
     years = range(1402, 1406)
@@ -778,48 +628,24 @@ def mobile_financial_report_view(request):
     """ گزارشات مالی با نمودار """
 
     # 1. محاسبه دیتای 6 ماه اخیر برای نمودار خطی
-    labels = []
-    income_data = []
-    expense_data = []
-
     today = jdatetime.date.today()
     current_month = today.month
     current_year = today.year
 
-    # لوپ روی 6 ماه گذشته
+    # لیست 6 ماه گذشته (سال، ماه)
+    months = []
     for i in range(5, -1, -1):
         m = current_month - i
         y = current_year
         if m <= 0:
             m += 12
             y -= 1
+        months.append((y, m))
 
-        # نام ماه
-        month_name = jdatetime.date(y, m, 1).strftime('%B')
-        labels.append(month_name)
-
-        # محاسبه بازه تاریخ میلادی برای آن ماه
-        start_shamsi = jdatetime.date(y, m, 1)
-        if m < 12:
-            end_shamsi = jdatetime.date(y, m + 1, 1) - timedelta(days=1)
-        else:
-            end_shamsi = jdatetime.date(y + 1, 1, 1) - timedelta(days=1)
-
-        start_g = start_shamsi.togregorian()
-        end_g = end_shamsi.togregorian()
-
-        # جمع درآمدها (سایر + سابسکرایبشن)
-        inc = OtherIncome.objects.filter(creator=request.user, deposit_date__range=(start_g, end_g)).aggregate(
-            s=Sum('price'))['s'] or 0
-        sub = Subscription.objects.filter(creator=request.user, payment_date__range=(start_g, end_g),
-                                          status='success').aggregate(s=Sum('price'))['s'] or 0
-        income_data.append(inc + sub)
-
-        # جمع هزینه‌ها
-        exp = \
-        Expense.objects.filter(creator=request.user, spending_date__range=(start_g, end_g)).aggregate(s=Sum('price'))[
-            's'] or 0
-        expense_data.append(exp)
+    labels = [jdatetime.date(y, m, 1).strftime('%B') for y, m in months]
+    # گروه‌بندی بر اساس ماه شمسی در دیتابیس (یک کوئری برای هر مدل)
+    income_data, expense_data = cached_report(
+        request.user, 'mobile_financial_report', months, lambda: get_monthly_series(request.user, months))
 
     # 2. آمار کلی برای نمودار دایره‌ای (کل دوران)
     total_income_all = sum(income_data)  # یا کوئری کلی
@@ -844,12 +670,9 @@ def mobile_financial_report_view(request):
 @login_required
 def mobile_customer_list_view(request):
     """ لیست مشتریان (Users) """
-    customers = CustomerProfile.objects.filter(creator=request.user).order_by('-created_at')
-
-    # جستجو
+    # جستجو (پیشوند کل نام یا پیشوند هر کلمه‌ی نام و شماره)
     search_query = request.GET.get('q', '')
-    if search_query:
-        customers = customers.filter(name__icontains=search_query)
+    customers = search_customers(request.user, search_query).order_by('-created_at')
 
     context = {
         'customers': customers,
@@ -0,0 +1,57 @@
+// select2 با داده‌ی راه دور برای <select data-autocomplete-url="..."> (RemoteSelect در فرم‌ها)
+// گزینه‌های select2 را برای یک المان برمی‌گرداند؛ برای لیست‌های معمولی همان options.
+function autocompleteOptions(select, options) {
+    const url = $(select).data('autocomplete-url');
+    if (!url) {
+        return options;
+    }
+    return Object.assign({}, options, {
+        ajax: {
+            url: url,
+            dataType: 'json',
+            delay: 250,
+            cache: true,
+            data: function (params) { return { q: params.term || '' }; },
+            processResults: function (data) { return { results: data.results }; }
+        }
+    });
+}
+
+// select2 را روی هر المان با گزینه‌های مناسب خودش فعال می‌کند
+function initSelect2($elements, options) {
+    $elements.each(function () {
+        $(this).select2(autocompleteOptions(this, options));
+    });
+}
+
+// انتخاب یک مقدار در لیست راه دور (مثلاً پر کردن خودکار معرف)؛ اگر گزینه‌اش هنوز نیست ساخته می‌شود
+function selectRemoteOption($select, id, text) {
+    if (!id) {
+        $select.val('').trigger('change');
+        return;
+    }
+    if (!$select.find('option[value="' + id + '"]').length) {
+        $select.append(new Option(text, id, false, false));
+    }
+    $select.val(String(id)).trigger('change');
+}
+
+// نقشه‌ی مشتری ← معرف پیش‌فرض ({id: {id, text}})؛ هر صفحه فقط یک بار درخواست می‌دهد
+// و با ETag پاسخ تا تغییر داده‌ها یک 304 کوچک است. خروجی promise جی‌کوئری است.
+const customerReferrerMaps = {};
+
+function loadCustomerReferrers(url) {
+    if (!customerReferrerMaps[url]) {
+        const request = $.ajax({ url: url, dataType: 'json' }).then(function (data) {
+            return data.referrers;
+        });
+        // درخواست ناموفق نگه داشته نمی‌شود تا انتخاب بعدی دوباره تلاش کند
+        request.fail(function () {
+            if (customerReferrerMaps[url] === request) {
+                delete customerReferrerMaps[url];
+            }
+        });
+        customerReferrerMaps[url] = request;
+    }
+    return customerReferrerMaps[url];
+}